@@ -0,0 +1,33 @@
+"""
+Time the new-releases scraper backends against the saved fixture page.
+Run from project root dir: python scripts/bench_new_releases_parse.py [iterations]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from showsaver.processors.dropout import HTML_BACKEND, _parse_new_releases  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parents[1] / 'tests' / 'fixtures' / 'dropout_new_releases.html'
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    html = FIXTURE.read_text(encoding='utf-8')
+
+    backends = ['bs4-full', 'bs4']
+    if HTML_BACKEND == 'lxml':
+        backends.append('lxml')
+
+    baseline = None
+    for backend in backends:
+        seconds = timeit.timeit(lambda: _parse_new_releases(html, backend), number=iterations) / iterations
+        baseline = baseline or seconds
+        default = ' (default)' if backend == HTML_BACKEND else ''
+        print(f'{backend + default:<20} {seconds * 1000:8.2f} ms/parse  {baseline / seconds:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
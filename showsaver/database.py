@@ -1,21 +1,68 @@
+import json
 import sqlite3
+import threading
 import time
 
-from showsaver.env import DB_PATH
+from typing import Any
+
+from showsaver.env import DB_PATH, RUN_MODE
 from showsaver.text import DOUBLE_QUOTE, FULLWIDTH_DOUBLE_QUOTE, normalize_title
 
+# Applied once to each new connection; journal_mode=WAL is persistent and set by init_db
+CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA synchronous=NORMAL",     # durable across app crashes in WAL mode, fsyncs only at checkpoints
+    "PRAGMA mmap_size=268435456",    # 256 MiB
+    "PRAGMA cache_size=-16000",      # 16 MiB
+)
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+
+# Bumped after every write to dropout_episodes, so readers can tell whether rows they cached are stale
+_episodes_version = 0
+_episodes_version_lock = threading.Lock()
+
+
+def _bump_episodes_version() -> None:
+    global _episodes_version
+    with _episodes_version_lock:
+        _episodes_version += 1
+
+
+def get_dropout_episodes_version() -> int:
+    if RUN_MODE == 'api':
+        # Episodes are also written by the downloader process; count writes from every process
+        return int(get_shared_state_version('dropout_episodes'))
+    return _episodes_version
+
 
 def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    # Rows behave like dicts
-    conn.row_factory = sqlite3.Row
+    """
+    Return this thread's connection to DB_PATH, opening it on first use. Use it as
+    `with get_connection() as conn:`, which commits or rolls back but leaves it open for reuse.
+    """
+    connections = _local.__dict__.setdefault('connections', {})
+    conn = connections.get(str(DB_PATH))
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, cached_statements=STATEMENT_CACHE_SIZE)
+        # Rows behave like dicts
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        connections[str(DB_PATH)] = conn
     return conn
 
 
+def close_connection() -> None:
+    """Close this thread's cached connections."""
+    for conn in _local.__dict__.pop('connections', {}).values():
+        conn.close()
+
+
 def init_db() -> None:
     with get_connection() as conn:
         conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA busy_timeout=5000")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS dropout_episodes (
                      url_path             TEXT PRIMARY KEY,
@@ -25,12 +72,77 @@ def init_db() -> None:
                      thumbnail            TEXT NOT NULL,
                      duration             INTEGER NOT NULL,
                      fetched_at           REAL NOT NULL,  -- unix timestamp; touched by any upsert
-                     metadata_fetched_at  REAL            -- unix timestamp; set only by full yt-dlp upsert
+                     metadata_fetched_at  REAL,           -- unix timestamp; set only by full yt-dlp upsert
+                     item_id              INTEGER         -- data-item-id from the new-releases page
             )
         """)
         cols = {row['name'] for row in conn.execute("PRAGMA table_info(dropout_episodes)")}
         if 'metadata_fetched_at' not in cols:
             conn.execute("ALTER TABLE dropout_episodes ADD COLUMN metadata_fetched_at REAL")
+        if 'item_id' not in cols:
+            conn.execute("ALTER TABLE dropout_episodes ADD COLUMN item_id INTEGER")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS dropout_season_urls (
+                     slug                 TEXT PRIMARY KEY,
+                     url                  TEXT NOT NULL,
+                     season               INTEGER NOT NULL,
+                     matched_at           REAL NOT NULL   -- unix timestamp of the last probe hit
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS download_jobs (
+                     id                   TEXT PRIMARY KEY,
+                     url                  TEXT NOT NULL,
+                     status               TEXT NOT NULL,  -- queued | downloading | completed | failed
+                     queued_at            TEXT NOT NULL,  -- ISO timestamps, matching the in-memory job status
+                     started_at           TEXT,
+                     completed_at         TEXT,
+                     error                TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS dropout_release_pages (
+                     url                  TEXT PRIMARY KEY,
+                     etag                 TEXT,
+                     last_modified        TEXT,
+                     release_urls         TEXT NOT NULL,  -- JSON list of release URLs parsed from the page
+                     fetched_at           REAL NOT NULL   -- unix timestamp of the last 200 response
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS download_jobs_url ON download_jobs (url)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS metadata_requests (
+                     url_path             TEXT PRIMARY KEY,
+                     url                  TEXT NOT NULL,
+                     priority             INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sponsorblock_segments (
+                     video_id             TEXT NOT NULL,
+                     service              TEXT NOT NULL,
+                     categories           TEXT NOT NULL,  -- JSON list the segments were requested for
+                     segments             TEXT NOT NULL,  -- JSON list from /api/skipSegments; [] caches a miss
+                     fetched_at           REAL NOT NULL,
+                     PRIMARY KEY (video_id, service)
+            )
+        """)
+        # State shared between RUN_MODE=api processes and the downloader (python -m showsaver.workers)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS shared_state (
+                     name                 TEXT PRIMARY KEY,
+                     version              TEXT NOT NULL,
+                     payload              TEXT            -- JSON
+            )
+        """)
+        conn.execute("INSERT OR IGNORE INTO shared_state (name, version) VALUES ('dropout_episodes', '0')")
+        for event in ('INSERT', 'UPDATE'):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS dropout_episodes_{event.lower()}_version AFTER {event} ON dropout_episodes
+                BEGIN
+                    UPDATE shared_state SET version = CAST(version AS INTEGER) + 1 WHERE name = 'dropout_episodes';
+                END
+            """)
         conn.execute(
             "UPDATE dropout_episodes SET title = replace(title, ?, ?) WHERE instr(title, ?) > 0",
             (FULLWIDTH_DOUBLE_QUOTE, normalize_title(FULLWIDTH_DOUBLE_QUOTE), FULLWIDTH_DOUBLE_QUOTE),
@@ -39,6 +151,7 @@ def init_db() -> None:
             "UPDATE dropout_episodes SET title = replace(title, ?, ?) WHERE instr(title, ?) > 0",
             (DOUBLE_QUOTE, normalize_title(DOUBLE_QUOTE), DOUBLE_QUOTE),
         )
+    _bump_episodes_version()
 
 
 def upsert_dropout_episode_basic(url_path: str, url: str, episode_title: str, thumbnail: str, duration_secs: int) -> None:
@@ -55,6 +168,31 @@ def upsert_dropout_episode_basic(url_path: str, url: str, episode_title: str, th
                 duration = excluded.duration,
                 fetched_at = excluded.fetched_at
         """, (url_path, url, episode_title, thumbnail, duration_secs, time.time()))
+    _bump_episodes_version()
+
+
+def upsert_dropout_episodes_basic(episodes: list[dict]) -> None:
+    """
+    Bulk upsert_dropout_episode_basic in a single transaction.
+    Each dict needs url_path, url, title, thumbnail and duration, and may carry the page's item_id.
+    """
+    now = time.time()
+    with get_connection() as conn:
+        conn.executemany("""
+            INSERT INTO dropout_episodes (url_path, url, show_name, title, thumbnail, duration, fetched_at, item_id)
+            VALUES (?, ?, '', ?, ?, ?, ?, ?)
+            ON CONFLICT(url_path) DO UPDATE SET
+                url = excluded.url,
+                title = excluded.title,
+                thumbnail = excluded.thumbnail,
+                duration = excluded.duration,
+                fetched_at = excluded.fetched_at,
+                item_id = COALESCE(excluded.item_id, item_id)
+        """, [
+            (e['url_path'], e['url'], normalize_title(e['title']), e['thumbnail'], e['duration'], now, e.get('item_id'))
+            for e in episodes
+        ])
+    _bump_episodes_version()
 
 
 def upsert_dropout_episode(url_path: str, url: str, show_name: str, episode_title: str, thumbnail: str, duration_secs: int) -> None:
@@ -73,6 +211,7 @@ def upsert_dropout_episode(url_path: str, url: str, show_name: str, episode_titl
                 fetched_at = excluded.fetched_at,
                 metadata_fetched_at = excluded.metadata_fetched_at
         """, (url_path, url, show_name, episode_title, thumbnail, duration_secs, now, now))
+    _bump_episodes_version()
 
 
 def get_dropout_episode(url_path: str) -> dict | None:
@@ -83,7 +222,239 @@ def get_dropout_episode(url_path: str) -> dict | None:
     return dict(row) if row else None
 
 
+def get_dropout_episodes(url_paths: list[str]) -> dict[str, dict]:
+    """Rows for the given url_paths in one query, keyed by url_path. Unknown paths are omitted."""
+    if not url_paths:
+        return {}
+    placeholders = ', '.join('?' * len(url_paths))
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM dropout_episodes WHERE url_path IN ({placeholders})", list(url_paths)
+        ).fetchall()
+    return {r['url_path']: dict(r) for r in rows}
+
+
 def get_all_dropout_episodes() -> list[dict]:
     with get_connection() as conn:
         rows = conn.execute("SELECT * FROM dropout_episodes").fetchall()
     return [dict(r) for r in rows]
+
+
+def get_dropout_season_url(slug: str) -> dict | None:
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM dropout_season_urls WHERE slug = ?", (slug,)
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def upsert_dropout_season_url(slug: str, url: str, season: int) -> None:
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO dropout_season_urls (slug, url, season, matched_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(slug) DO UPDATE SET
+                url = excluded.url,
+                season = excluded.season,
+                matched_at = excluded.matched_at
+        """, (slug, url, season, time.time()))
+
+
+def delete_dropout_season_url(slug: str) -> None:
+    with get_connection() as conn:
+        conn.execute("DELETE FROM dropout_season_urls WHERE slug = ?", (slug,))
+
+
+def get_recent_dropout_seasons(limit: int) -> list[int]:
+    """Distinct seasons from past probe hits, most recently matched first."""
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT season FROM dropout_season_urls
+            GROUP BY season
+            ORDER BY MAX(matched_at) DESC
+            LIMIT ?
+        """, (limit,)).fetchall()
+    return [r['season'] for r in rows]
+
+
+def get_dropout_release_page(url: str) -> dict | None:
+    """HTTP validators and parsed release URLs from the last successful fetch of a releases page."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM dropout_release_pages WHERE url = ?", (url,)
+        ).fetchone()
+    if not row:
+        return None
+    page = dict(row)
+    page['release_urls'] = json.loads(page['release_urls'])
+    return page
+
+
+def upsert_dropout_release_page(url: str, etag: str | None, last_modified: str | None, release_urls: list[str]) -> None:
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO dropout_release_pages (url, etag, last_modified, release_urls, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                release_urls = excluded.release_urls,
+                fetched_at = excluded.fetched_at
+        """, (url, etag, last_modified, json.dumps(release_urls), time.time()))
+
+
+def get_sponsorblock_segments(video_id: str, service: str) -> dict | None:
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM sponsorblock_segments WHERE video_id = ? AND service = ?", (video_id, service)
+        ).fetchone()
+    if not row:
+        return None
+    entry = dict(row)
+    entry['categories'] = json.loads(entry['categories'])
+    entry['segments'] = json.loads(entry['segments'])
+    return entry
+
+
+def upsert_sponsorblock_segments(video_id: str, service: str, categories: list[str], segments: list[dict]) -> None:
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO sponsorblock_segments (video_id, service, categories, segments, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(video_id, service) DO UPDATE SET
+                categories = excluded.categories,
+                segments = excluded.segments,
+                fetched_at = excluded.fetched_at
+        """, (video_id, service, json.dumps(categories), json.dumps(segments), time.time()))
+
+
+def insert_download_job(job_id: str, url: str, queued_at: str) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT INTO download_jobs (id, url, status, queued_at) VALUES (?, ?, 'queued', ?)",
+            (job_id, url, queued_at),
+        )
+
+
+def insert_download_job_if_new(job_id: str, url: str, queued_at: str) -> bool:
+    """Insert a queued job unless the URL already has a job that has not failed. Returns True if inserted."""
+    with get_connection() as conn:
+        cursor = conn.execute("""
+            INSERT INTO download_jobs (id, url, status, queued_at)
+            SELECT ?, ?, 'queued', ?
+            WHERE NOT EXISTS (SELECT 1 FROM download_jobs WHERE url = ? AND status != 'failed')
+        """, (job_id, url, queued_at, url))
+    return cursor.rowcount == 1
+
+
+def claim_download_job(job_id: str, started_at: str) -> bool:
+    """Atomically move a queued job to downloading. Returns False if it was not queued."""
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE download_jobs SET status = 'downloading', started_at = ? WHERE id = ? AND status = 'queued'",
+            (started_at, job_id),
+        )
+    return cursor.rowcount == 1
+
+
+def finish_download_job(job_id: str, status: str, completed_at: str, error: str | None=None) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE download_jobs SET status = ?, completed_at = ?, error = ? WHERE id = ?",
+            (status, completed_at, error, job_id),
+        )
+
+
+def delete_download_job(job_id: str) -> None:
+    with get_connection() as conn:
+        conn.execute("DELETE FROM download_jobs WHERE id = ?", (job_id,))
+
+
+def delete_download_jobs(status: str) -> None:
+    with get_connection() as conn:
+        conn.execute("DELETE FROM download_jobs WHERE status = ?", (status,))
+
+
+def requeue_interrupted_download_jobs() -> int:
+    """Put jobs that were mid-download when the process stopped back in the queue."""
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE download_jobs SET status = 'queued', started_at = NULL WHERE status = 'downloading'"
+        )
+    return cursor.rowcount
+
+
+def get_download_jobs(status: str, limit: int | None=None) -> list[dict]:
+    """Jobs with the given status in the order they were queued; with limit, only the most recent ones."""
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT * FROM (
+                SELECT rowid AS seq, * FROM download_jobs WHERE status = ? ORDER BY rowid DESC LIMIT ?
+            ) ORDER BY seq
+        """, (status, -1 if limit is None else limit)).fetchall()
+    return [{key: r[key] for key in r.keys() if key != 'seq'} for r in rows]
+
+
+def get_download_job_urls(status: str) -> dict[str, str]:
+    """url -> job id for every job with the given status."""
+    with get_connection() as conn:
+        rows = conn.execute("SELECT url, id FROM download_jobs WHERE status = ?", (status,)).fetchall()
+    return {r['url']: r['id'] for r in rows}
+
+
+def get_download_job(job_id: str) -> dict | None:
+    with get_connection() as conn:
+        row = conn.execute("SELECT * FROM download_jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def count_download_jobs(status: str) -> int:
+    with get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM download_jobs WHERE status = ?", (status,)).fetchone()[0]
+
+
+def request_metadata(url: str, url_path: str, priority: int) -> None:
+    """Ask the downloader process for a metadata fetch, keeping the most urgent priority requested."""
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO metadata_requests (url_path, url, priority) VALUES (?, ?, ?)
+            ON CONFLICT(url_path) DO UPDATE SET priority = MIN(priority, excluded.priority)
+        """, (url_path, url, priority))
+
+
+def take_metadata_requests() -> list[dict]:
+    """Remove and return all pending metadata requests, most urgent first."""
+    with get_connection() as conn:
+        rows = conn.execute("DELETE FROM metadata_requests RETURNING url_path, url, priority").fetchall()
+    return sorted((dict(r) for r in rows), key=lambda r: r['priority'])
+
+
+def get_shared_state(name: str) -> dict | None:
+    with get_connection() as conn:
+        row = conn.execute("SELECT version, payload FROM shared_state WHERE name = ?", (name,)).fetchone()
+    if not row:
+        return None
+    return {'version': row['version'], 'payload': json.loads(row['payload']) if row['payload'] else None}
+
+
+def get_shared_state_version(name: str) -> str | None:
+    with get_connection() as conn:
+        row = conn.execute("SELECT version FROM shared_state WHERE name = ?", (name,)).fetchone()
+    return row['version'] if row else None
+
+
+def put_shared_state(name: str, version: str, payload: Any) -> None:
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO shared_state (name, version, payload) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET version = excluded.version, payload = excluded.payload
+        """, (name, version, json.dumps(payload)))
+
+
+def get_data_version() -> int:
+    """
+    SQLite's data_version for this thread's connection: it changes whenever another connection,
+    in this process or any other, commits a change to the database.
+    """
+    with get_connection() as conn:
+        return conn.execute("PRAGMA data_version").fetchone()[0]
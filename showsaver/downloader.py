@@ -1,41 +1,32 @@
 import os
 import requests
-import shutil
+import threading
 import time
 import yt_dlp
 import yt_dlp.postprocessor.metadataparser
 
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from enum import StrEnum
 from os import PathLike
 
+from showsaver import database, ytdl_pool
 from showsaver.env import (
-    CONFIG_DIR, TMP_DIR, DO_CLEANUP, YTDLP_PROGRESS_LOG_INTERVAL
+    CONFIG_DIR, TMP_DIR, DO_CLEANUP, PLAYLIST_PREFETCH_WORKERS, POSTPROCESS_MODE, PROGRESS_UPDATE_RATE,
+    SEASON_PROBE_WORKERS, YTDLP_PROGRESS_LOG_INTERVAL
 )
+from showsaver.notifier import sonarr_notifier
+from showsaver.placement import PlacementResult, place_file
 from showsaver.processors import Processor
-from showsaver.sonarr import refresh_and_rescan_series
+from showsaver.progress import ProgressUpdate, StreamType
+from showsaver.remux import RewriteStats, SinglePassPP, run_postprocessors
+from showsaver.sponsorblock import CachedSponsorBlockPP
 from showsaver.text import normalize_title
 
 
-class StreamType(StrEnum):
-    VIDEO = 'video'
-    AUDIO = 'audio'
-    VIDEO_AUDIO = 'video+audio'
-
-
-@dataclass(frozen=True, slots=True)
-class ProgressUpdate:
-    percent: float
-    total_bytes: float
-    speed_bytes: float
-    eta: float
-    step: int
-    total_steps: int
-    step_type: StreamType
-
-
 ProgressCallback = Callable[[ProgressUpdate], None]
+# Receives job status fields to merge, e.g. status_callback(extractions=1)
+StatusCallback = Callable[..., None]
 
 YT_REPLACE_COLON_ACTION = {
     'actions': [
@@ -111,37 +102,99 @@ BASE_YT_OPTS = {
 # https://github.com/yt-dlp/yt-dlp/blob/00dcde728635633eee969ad4d498b9f233c4a94e/yt_dlp/YoutubeDL.py#L212
 
 
+METADATA_YT_OPTS = {
+    **BASE_YT_OPTS,
+    'skip_download' : True,
+    'extract_flat': 'in_playlist',
+    'postprocessors': [
+        YT_REPLACE_COLON_ACTION
+    ]
+}
+
+
 # the info file has the show name and season number, we need these for building the destination path on the server
 def get_metadata(show_url: str):
-    dlp_opts = {
-        **BASE_YT_OPTS,
-        'skip_download' : True,
-        'extract_flat': 'in_playlist',
-        'postprocessors': [
-            YT_REPLACE_COLON_ACTION
-        ]
-    }
-    with yt_dlp.YoutubeDL(dlp_opts) as yt:
+    with ytdl_pool.metadata_pool.checkout(METADATA_YT_OPTS) as yt:
         print('Downloading metadata for url: ' + show_url)
         info_dict = yt.extract_info(show_url)
         print('Metadata download complete!')
         return info_dict
 
 
-def download_show(
-    show_url: str,
-    info_dict,
-    progress_callback: ProgressCallback | None = None,
-    processor: Processor | None=None,
-) -> str:
-    download_state: dict = {'current_step': 0, 'steps': [], 'last_filename': None}
+# Info dicts resolved ahead of time for playlist entries, consumed by process_url.
+# Format URLs in them are signed and expire, so entries are only trusted for a while.
+PREFETCHED_INFO_TTL = 60 * 60
+_prefetched_info: dict[str, tuple[float, dict]] = {}
+_prefetched_info_lock = threading.Lock()
+
+
+def _store_prefetched_info(url: str, info_dict) -> None:
+    now = time.monotonic()
+    with _prefetched_info_lock:
+        for stale_url in [u for u, (at, _) in _prefetched_info.items() if now - at > PREFETCHED_INFO_TTL]:
+            del _prefetched_info[stale_url]
+        _prefetched_info[url] = (now, info_dict)
+
+
+def _take_prefetched_info(url: str):
+    with _prefetched_info_lock:
+        entry = _prefetched_info.pop(url, None)
+    if entry and time.monotonic() - entry[0] <= PREFETCHED_INFO_TTL:
+        return entry[1]
+    return None
+
+
+def _prefetch_metadata(url: str):
+    try:
+        return get_metadata(url)
+    except Exception as e:
+        print(f'Metadata prefetch failed for {url}: {e}')
+        return None
+
+
+def expand_playlist(info_dict) -> list[str]:
+    """
+    Resolve every playlist entry's metadata with PLAYLIST_PREFETCH_WORKERS concurrent extractions and
+    cache the results for the download stage. Returns entry URLs sorted by season and episode;
+    entries whose prefetch failed follow in playlist order and are extracted again when processed.
+    """
+    entry_urls = [e['url'] for e in info_dict.get('entries', []) if e.get('url')]
+    with ThreadPoolExecutor(max_workers=PLAYLIST_PREFETCH_WORKERS) as pool:
+        entry_infos = list(pool.map(_prefetch_metadata, entry_urls))
+
+    resolved = []
+    unresolved = []
+    for url, entry_info in zip(entry_urls, entry_infos):
+        if entry_info and entry_info.get('_type', 'video') == 'video':
+            _store_prefetched_info(url, entry_info)
+            resolved.append((entry_info.get('season_number') or 0, entry_info.get('episode_number') or 0, url))
+        else:
+            unresolved.append(url)
+    resolved.sort(key=lambda r: (r[0], r[1]))
+    return [url for _, _, url in resolved] + unresolved
+
+
+PROGRESS_UPDATE_INTERVAL = 1 / PROGRESS_UPDATE_RATE
+
+
+def make_progress_hook(progress_callback: ProgressCallback, interval: float=PROGRESS_UPDATE_INTERVAL):
+    """
+    yt-dlp progress hook that reports to progress_callback at most once per interval, plus on every
+    step change and when a step finishes. Skipped calls allocate nothing.
+    """
+    download_state: dict = {'current_step': 0, 'steps': [], 'last_filename': None, 'stream_type': None, 'last_update': 0.0}
 
     def progress_hook_callback(download_progress):
-        if progress_callback and download_progress['status'] == 'downloading':
+        if download_progress['status'] != 'downloading':
+            return
+
+        # Detect new step (filename changes)
+        filename = download_progress.get('filename', '')
+        new_step = filename != download_state['last_filename']
+        if new_step:
             info = download_progress.get('info_dict', {})
             vcodec = info.get('vcodec', 'none')
             acodec = info.get('acodec', 'none')
-            filename = download_progress.get('filename', '')
 
             if vcodec != 'none' and acodec == 'none':
                 stream_type = StreamType.VIDEO
@@ -150,69 +203,136 @@ def download_show(
             else:
                 stream_type = StreamType.VIDEO_AUDIO
 
-            # Detect new step (filename changes)
-            if filename != download_state['last_filename']:
-                download_state['last_filename'] = filename
-                if stream_type not in download_state['steps']:
-                    download_state['steps'].append(stream_type)
-                    download_state['current_step'] = len(download_state['steps'])
-
-            # Calculate progress
-            total = download_progress.get('total_bytes') or download_progress.get('total_bytes_estimate')
-            percent = 0.0
-            if total:
-                percent = (download_progress.get('downloaded_bytes', 0) / total) * 100
-
-            progress_callback(ProgressUpdate(
-                percent=percent,
-                total_bytes=total or 0.0,
-                speed_bytes=download_progress.get('speed', 0.0) or 0.0,
-                eta=download_progress.get('eta', 0.0) or 0.0,
-                step=download_state['current_step'],
-                total_steps=max(len(download_state['steps']), download_state['current_step']),
-                step_type=stream_type,
-            ))
+            download_state['last_filename'] = filename
+            download_state['stream_type'] = stream_type
+            if stream_type not in download_state['steps']:
+                download_state['steps'].append(stream_type)
+                download_state['current_step'] = len(download_state['steps'])
+
+        total = download_progress.get('total_bytes') or download_progress.get('total_bytes_estimate')
+        downloaded = download_progress.get('downloaded_bytes', 0)
+        finished = bool(total) and downloaded >= total
+        now = time.monotonic()
+        if not (new_step or finished) and now - download_state['last_update'] < interval:
+            return
+        download_state['last_update'] = now
+
+        # Calculate progress
+        percent = 0.0
+        if total:
+            percent = (downloaded / total) * 100
+
+        progress_callback(ProgressUpdate(
+            percent=percent,
+            total_bytes=total or 0.0,
+            speed_bytes=download_progress.get('speed', 0.0) or 0.0,
+            eta=download_progress.get('eta', 0.0) or 0.0,
+            step=download_state['current_step'],
+            total_steps=max(len(download_state['steps']), download_state['current_step']),
+            step_type=download_state['stream_type'],
+        ))
+
+    return progress_hook_callback
+
+
+SPONSORBLOCK_CATEGORIES = ['sponsor', 'selfpromo', 'interaction', 'intro', 'outro']
+
+# Run by the postprocess stage on the downloaded file, so they don't hold up the next download.
+# In single-pass mode both are done by one SinglePassPP with the same options.
+FFMPEG_POSTPROCESSORS = [
+    {
+        'key': 'ModifyChapters',
+        'remove_sponsor_segments': SPONSORBLOCK_CATEGORIES,
+        'sponsorblock_chapter_title': '[SponsorBlock]: ' '%(category_names)l',
+    },
+    {
+        'key': 'FFmpegEmbedSubtitle',
+        'already_have_subtitle': False
+    },
+]
 
+
+class _CaptureInfoPP(yt_dlp.postprocessor.PostProcessor):
+    """Keeps the final info dict of a download (file, subtitle and SponsorBlock paths) for postprocess_show."""
+
+    def __init__(self, downloader=None):
+        super().__init__(downloader)
+        self.info = None
+
+    def run(self, info):
+        self.info = info
+        return [], info
+
+
+def download_show(
+    show_url: str,
+    info_dict,
+    progress_callback: ProgressCallback | None = None,
+    processor: Processor | None=None,
+    on_extract: Callable[[], None] | None = None,
+) -> tuple[str, dict]:
+    """
+    Download an episode and its subtitles, and look up its SponsorBlock segments.
+    The ffmpeg rewrites are left to postprocess_show. Returns the file path and the info dict to pass it.
+    """
     dlp_opts = {
         **BASE_YT_OPTS,
         'outtmpl' : {'default' : '%(series)s - S%(season_number)02dE%(episode_number)02d - %(title)s WEBDL-1080p.%(ext)s'},
         'postprocessors': [
-            {
-                'api': 'https://sponsor.ajay.app',
-                'key': 'SponsorBlock',
-                'when': 'after_filter',
-                'categories': ['sponsor', 'selfpromo', 'interaction', 'intro', 'outro']
-            },
-            {
-                'key': 'ModifyChapters',
-                'remove_sponsor_segments': ['sponsor', 'selfpromo', 'interaction', 'intro', 'outro'],
-                'sponsorblock_chapter_title': '[SponsorBlock]: ' '%(category_names)l',
-            },
-            {
-                'key': 'FFmpegEmbedSubtitle',
-                'already_have_subtitle': False
-            },
             YT_REPLACE_COLON_ACTION
         ],
         'writesubtitles' : True,
-        'progress_hooks' : [progress_hook_callback]
+        'progress_hooks' : [make_progress_hook(progress_callback)] if progress_callback else []
     }
     if processor:
         processor.process_dlp_opts(dlp_opts, info_dict)
     info_dict['title'] = normalize_title(info_dict.get('title', ''))
-    with yt_dlp.YoutubeDL(dlp_opts) as yt:
-        yt.download(show_url)
+    capture = _CaptureInfoPP()
+    with ytdl_pool.create_youtube_dl(dlp_opts) as yt:
+        # Segment lookups go through the local cache instead of always asking the SponsorBlock API
+        yt.add_post_processor(CachedSponsorBlockPP(yt, categories=SPONSORBLOCK_CATEGORIES), when='after_filter')
+        yt.add_post_processor(capture, when='after_move')
+        # Re-run format selection and the download on the info dict we already extracted,
+        # rather than letting yt.download() extract the page a second time.
+        try:
+            yt.process_ie_result(yt.sanitize_info(info_dict, remove_private_keys=True), download=True)
+        except (yt_dlp.utils.DownloadError, yt_dlp.utils.ReExtractInfo) as e:
+            # Format URLs may have expired since extraction; fall back to a fresh extraction
+            print(f'Download from extracted info failed ({e}), re-extracting: {show_url}')
+            if on_extract:
+                on_extract()
+            yt.download(show_url)
         show_file_name = yt.evaluate_outtmpl(dlp_opts['outtmpl']['default'], info_dict)
+    ytdl_pool.save_cookies()
     show_path = os.path.abspath(os.path.join(dlp_opts['paths']['home'], show_file_name))
-    return show_path
+    return show_path, capture.info or {**info_dict, 'filepath': show_path}
+
+
+def _ffmpeg_postprocessors(yt) -> list:
+    options = {pp['key']: {k: v for k, v in pp.items() if k != 'key'} for pp in FFMPEG_POSTPROCESSORS}
+    if POSTPROCESS_MODE == 'separate':
+        return [yt_dlp.postprocessor.get_postprocessor(key)(yt, **opts) for key, opts in options.items()]
+    return [SinglePassPP(yt, **options['ModifyChapters'], **options['FFmpegEmbedSubtitle'])]
+
+
+def postprocess_show(show_path: str, downloaded_info: dict) -> tuple[str, RewriteStats]:
+    """
+    Cut SponsorBlock segments, rewrite chapters and embed subtitles.
+    Returns the resulting file path and how much rewriting of the file that took.
+    """
+    info = {**downloaded_info, 'filepath': show_path}
+    with ytdl_pool.create_youtube_dl(BASE_YT_OPTS) as yt:
+        info, stats = run_postprocessors(yt, _ffmpeg_postprocessors(yt), info)
+    return info.get('filepath') or show_path, stats
 
 
 def copy_to_destination(
     info_dict,
     show_path: str,
     base_destination_path: str,
-    processor: Processor | None=None
-) -> None:
+    processor: Processor | None=None,
+    allow_move: bool=False,
+) -> PlacementResult:
     show_name = info_dict.get('series', '')
     season_number = info_dict.get('season_number', 0)
     season_folder = 'Specials' if season_number == 0 else 'Season ' + str(season_number)
@@ -231,9 +351,51 @@ def copy_to_destination(
     os.makedirs(full_destination_path, exist_ok=True)
     os.chmod(full_destination_path, 0o775)
 
-    shutil.copy2(show_path, full_episode_path)
+    result = place_file(show_path, full_episode_path, allow_move=allow_move)
     os.chmod(full_episode_path, 0o664)
-    print("Copy complete!")
+    print(f'Copy complete! ({result.strategy}, {result.seconds:.2f}s)')
+    return result
+
+
+DIM20_SEASON_URL = 'https://watch.dropout.tv/dimension-20/season:{season}/videos/{slug}'
+MAX_PROBE_SEASON = 99
+RECENT_PROBE_SEASONS = 5
+
+# Season probes share one pooled session so concurrent HEADs reuse connections
+_probe_session = requests.Session()
+_probe_session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=SEASON_PROBE_WORKERS))
+
+
+def _probe_url(url: str) -> bool:
+    try:
+        r = _probe_session.head(url, timeout=10)
+    except requests.RequestException as e:
+        print(f'Probe failed for {url}: {e}')
+        return False
+    # Rate limiting (429), 403 and server errors say nothing about whether the page exists
+    return 200 <= r.status_code < 400
+
+
+def _season_probe_order() -> list[int]:
+    recent = [s for s in database.get_recent_dropout_seasons(RECENT_PROBE_SEASONS) if 1 <= s <= MAX_PROBE_SEASON]
+    return recent + [s for s in range(1, MAX_PROBE_SEASON + 1) if s not in recent]
+
+
+def _probe_season_url(slug: str) -> tuple[str, int] | None:
+    """
+    Probe season URLs for an episode slug, SEASON_PROBE_WORKERS at a time, starting with the most
+    recently matched seasons. Returns the first hit in probe order and its season.
+    """
+    seasons = _season_probe_order()
+    with ThreadPoolExecutor(max_workers=SEASON_PROBE_WORKERS) as pool:
+        for start in range(0, len(seasons), SEASON_PROBE_WORKERS):
+            batch = seasons[start:start + SEASON_PROBE_WORKERS]
+            urls = [DIM20_SEASON_URL.format(season=season, slug=slug) for season in batch]
+            print(f'Trying seasons {batch[0]}..{batch[-1]} for: {slug}')
+            for season, url, found in zip(batch, urls, pool.map(_probe_url, urls)):
+                if found:
+                    return url, season
+    return None
 
 
 def find_corrected_url(show_url: str, info_dict):
@@ -244,19 +406,27 @@ def find_corrected_url(show_url: str, info_dict):
         # https://watch.dropout.tv/dimension-20/season:27/videos/poppy-persona-non-grata
         # https://watch.dropout.tv/videos/poppy-persona-non-grata
         file_name_part = show_url.rsplit('/', 1)[-1]
-        for i in range(1, 100):
-            url_to_try = f'https://watch.dropout.tv/dimension-20/season:{i}/videos/{file_name_part}'
+        cached = database.get_dropout_season_url(file_name_part)
+        if cached:
+            try:
+                print(f'Found corrected url: {cached["url"]}')
+                return cached['url'], get_metadata(cached['url'])
+            except Exception as e:
+                # A stale or bad match; forget it and probe again
+                print(str(e))
+                database.delete_dropout_season_url(file_name_part)
+        probed = _probe_season_url(file_name_part)
+        if probed:
+            url_to_try, season = probed
             try:
-                print(f'Trying url: {url_to_try}')
-                r = requests.head(url_to_try)
-                if r.status_code == 404:
-                    continue
-
                 print(f'Found corrected url: {url_to_try}')
                 new_info_dict = get_metadata(url_to_try)
-                return url_to_try, new_info_dict
             except Exception as e:
                 print(str(e))
+                return None, None
+            # Only persisted once extraction has confirmed the match
+            database.upsert_dropout_season_url(file_name_part, url_to_try, season)
+            return url_to_try, new_info_dict
     return None, None
 
 
@@ -272,45 +442,118 @@ def process_urls(url_list: list[str], desired_destination: PathLike) -> None:
         print("No initial Urls provided.")
 
 
-def process_url(
+@dataclass
+class Episode:
+    """An episode on its way through the job stages: extract, download, postprocess, place, notify."""
+    url: str
+    info_dict: dict
+    processor: Processor | None = None
+    extractions: int = 0
+    show_path: str = ''
+    downloaded_info: dict | None = None
+
+
+def _count_extraction(episode: Episode, status_callback: StatusCallback | None) -> None:
+    episode.extractions += 1
+    if status_callback:
+        status_callback(extractions=episode.extractions)
+
+
+def extract_episode(
     show_url: str,
-    desired_destination: PathLike,
-    progress_callback: ProgressCallback | None = None,
     processor: Processor | None=None,
-) -> list[str] | None:
-    info_dict = get_metadata(show_url)
+    status_callback: StatusCallback | None = None,
+) -> Episode | list[str]:
+    """Extract stage: resolve metadata and the canonical URL. A playlist returns its entry URLs instead."""
+    # Playlist entries normally arrive with their metadata already fetched by expand_playlist;
+    # that extraction was done on this job's behalf, so it still counts towards it.
+    info_dict = _take_prefetched_info(show_url) or get_metadata(show_url)
+    episode = Episode(show_url, info_dict, processor)
+    _count_extraction(episode, status_callback)
 
     # If we have a playlist return the urls to be processed individually
     if info_dict.get('_type') == 'playlist':
-        return [e['url'] for e in info_dict.get('entries', []) if e.get('url')]
+        return expand_playlist(info_dict)
 
     corrected_url, corrected_info_dict = find_corrected_url(show_url, info_dict)
     if corrected_url and corrected_info_dict:
-        show_url = corrected_url
-        info_dict = corrected_info_dict
+        _count_extraction(episode, status_callback)
+        episode.url = corrected_url
+        episode.info_dict = corrected_info_dict
 
     if processor:
-        processor.process_info_dict(info_dict)
+        processor.process_info_dict(episode.info_dict)
+    return episode
 
-    show_path = download_show(show_url, info_dict, progress_callback, processor)
 
-    copy_to_destination(info_dict, show_path, str(desired_destination), processor)
+def download_episode(
+    episode: Episode,
+    progress_callback: ProgressCallback | None = None,
+    status_callback: StatusCallback | None = None,
+) -> None:
+    """Download stage."""
+    episode.show_path, episode.downloaded_info = download_show(
+        episode.url, episode.info_dict, progress_callback, episode.processor,
+        on_extract=lambda: _count_extraction(episode, status_callback),
+    )
+
+
+def postprocess_episode(episode: Episode, status_callback: StatusCallback | None = None) -> RewriteStats:
+    """Postprocess stage: the ffmpeg rewrites of the downloaded file."""
+    episode.show_path, stats = postprocess_show(episode.show_path, episode.downloaded_info or {})
+    if status_callback:
+        status_callback(bytes_rewritten=stats.bytes_rewritten, ffmpeg_seconds=stats.ffmpeg_seconds)
+    return stats
+
+
+def place_episode(
+    episode: Episode,
+    desired_destination: PathLike,
+    status_callback: StatusCallback | None = None,
+) -> PlacementResult:
+    """Place stage: put the file in the library and clean up the temp copy."""
+    # With cleanup on, the temp file is deleted right after, so it may be moved rather than copied
+    placement = copy_to_destination(
+        episode.info_dict, episode.show_path, str(desired_destination), episode.processor, allow_move=DO_CLEANUP
+    )
+    if status_callback:
+        status_callback(placement_strategy=str(placement.strategy), placement_seconds=placement.seconds)
 
-    # Trigger Sonarr rescan (optional)
+    if DO_CLEANUP:
+        if os.path.exists(episode.show_path):
+            os.remove(episode.show_path)
+    return placement
+
+
+def notify_episode(episode: Episode) -> None:
+    """Notify stage: queue a Sonarr rescan (optional); the notifier coalesces them per series."""
     try:
-        show_name = info_dict.get('series')
+        show_name = episode.info_dict.get('series')
         if show_name:
             override_name = show_name
             should_trigger_rename = False
-            if processor:
-                override_name = processor.process_show_name(show_name)
-                should_trigger_rename = processor.should_trigger_rename(info_dict)
-            refresh_and_rescan_series(show_name, override_name, should_trigger_rename)
+            if episode.processor:
+                override_name = episode.processor.process_show_name(show_name)
+                should_trigger_rename = episode.processor.should_trigger_rename(episode.info_dict)
+            sonarr_notifier.request(show_name, override_name, should_trigger_rename)
     except Exception as e:
         print(f"Sonarr integration warning: {e}")
 
-    if DO_CLEANUP:
-        if os.path.exists(show_path):
-            os.remove(show_path)
 
+def process_url(
+    show_url: str,
+    desired_destination: PathLike,
+    progress_callback: ProgressCallback | None = None,
+    processor: Processor | None=None,
+    status_callback: StatusCallback | None = None,
+) -> list[str] | None:
+    """Run every stage for one URL on the calling thread. Returns the entry URLs for a playlist."""
+    episode = extract_episode(show_url, processor, status_callback)
+    if isinstance(episode, list):
+        return episode
+
+    download_episode(episode, progress_callback, status_callback)
+    postprocess_episode(episode, status_callback)
+    place_episode(episode, desired_destination, status_callback)
+    notify_episode(episode)
     return None
@@ -33,6 +33,33 @@ URL = os.getenv("SHOW_URL", "")
 
 DO_CLEANUP = string_to_bool(os.getenv("AUTO_CLEANUP_TMP", "true"))
 YTDLP_PROGRESS_LOG_INTERVAL = float(os.getenv("YTDLP_PROGRESS_LOG_INTERVAL", "5.0"))
+# Workers per job stage: extract -> download -> postprocess (ffmpeg) -> place (copy) -> notify
+EXTRACT_WORKERS = max(1, int(os.getenv("EXTRACT_WORKERS", "1")))
+DOWNLOAD_WORKERS = max(1, int(os.getenv("DOWNLOAD_WORKERS", "1")))
+POSTPROCESS_WORKERS = max(1, int(os.getenv("POSTPROCESS_WORKERS", "1")))
+PLACE_WORKERS = max(1, int(os.getenv("PLACE_WORKERS", "1")))
+# single-pass: cut SponsorBlock segments, rewrite chapters and embed subtitles in one ffmpeg run (default)
+# separate: one ffmpeg run per yt-dlp postprocessor (ModifyChapters, then FFmpegEmbedSubtitle)
+POSTPROCESS_MODE = os.getenv("POSTPROCESS_MODE", "single-pass").lower()
+STAGE_QUEUE_SIZE = max(1, int(os.getenv("STAGE_QUEUE_SIZE", "1")))  # jobs that may wait between two stages
+SEASON_PROBE_WORKERS = max(1, int(os.getenv("SEASON_PROBE_WORKERS", "8")))
+PLAYLIST_PREFETCH_WORKERS = max(1, int(os.getenv("PLAYLIST_PREFETCH_WORKERS", "4")))
+METADATA_WORKERS = max(1, int(os.getenv("METADATA_WORKERS", "3")))
+METADATA_RATE_LIMIT = float(os.getenv("METADATA_RATE_LIMIT", "2.0"))  # requests/sec per host; 0 disables
+# Each open /queue/events stream holds a server thread; keep this below gunicorn's --threads (see Dockerfile)
+QUEUE_EVENTS_MAX_STREAMS = max(1, int(os.getenv("QUEUE_EVENTS_MAX_STREAMS", "8")))
+PROGRESS_UPDATE_RATE = max(0.1, float(os.getenv("PROGRESS_UPDATE_RATE", "4.0")))  # progress updates/sec per download
+
+#
+# Process layout
+#
+
+# all: one process serves the web app and runs the downloads (default)
+# api: web app only (any number of gunicorn workers); reads job state shared by the downloader process
+# The downloader process is not a RUN_MODE: it is `python -m showsaver.workers`, sharing /config with the
+# RUN_MODE=api containers, and publishes job state through the database there.
+RUN_MODE = os.getenv("RUN_MODE", "all").lower()
+SHARED_STATE_POLL_INTERVAL = float(os.getenv("SHARED_STATE_POLL_INTERVAL", "0.25"))  # seconds
 
 #
 # Database
@@ -40,9 +67,28 @@ YTDLP_PROGRESS_LOG_INTERVAL = float(os.getenv("YTDLP_PROGRESS_LOG_INTERVAL", "5.
 
 DB_PATH = CONFIG_DIR / "showsaver.db"
 
+#
+# yt-dlp
+#
+
+COOKIE_PATH = CONFIG_DIR / "cookies.txt"  # shared by every YoutubeDL instance, kept across restarts
+
+#
+# SponsorBlock
+#
+
+SPONSORBLOCK_API = os.getenv("SPONSORBLOCK_API", "https://sponsor.ajay.app")
+SPONSORBLOCK_CACHE_TTL = float(os.getenv("SPONSORBLOCK_CACHE_TTL", str(7 * 24 * 60 * 60)))  # seconds to reuse found segments
+SPONSORBLOCK_NEGATIVE_TTL = float(os.getenv("SPONSORBLOCK_NEGATIVE_TTL", str(6 * 60 * 60)))  # seconds to reuse "no segments"
+SPONSORBLOCK_OFFLINE = string_to_bool(os.getenv("SPONSORBLOCK_OFFLINE", "false"))  # only use cached segments, never call the API
+
 #
 # Sonarr Integration (optional)
 #
 
 SONARR_URL = os.getenv("SONARR_URL", "")  # e.g., "http://localhost:8989"
 SONARR_API_KEY = os.getenv("SONARR_API_KEY", "")
+SONARR_SERIES_CACHE_TTL = float(os.getenv("SONARR_SERIES_CACHE_TTL", "3600"))  # seconds; a lookup miss refreshes early
+SONARR_NOTIFY_QUIET_WINDOW = float(os.getenv("SONARR_NOTIFY_QUIET_WINDOW", "120"))  # seconds without a new episode before a series is rescanned
+SONARR_NOTIFY_MAX_ATTEMPTS = max(1, int(os.getenv("SONARR_NOTIFY_MAX_ATTEMPTS", "5")))
+SONARR_NOTIFY_RETRY_BACKOFF = float(os.getenv("SONARR_NOTIFY_RETRY_BACKOFF", "10"))  # seconds before the first retry; doubles each attempt
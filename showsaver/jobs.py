@@ -0,0 +1,17 @@
+"""
+Job state as the web app sees it: this process's own state (showsaver.state), or with RUN_MODE=api
+the downloader process's state shared through the database (showsaver.shared_state).
+"""
+from showsaver.env import RUN_MODE
+
+if RUN_MODE == 'api':
+    from showsaver.shared_state import (  # noqa: F401
+        clear_completed_jobs, count_jobs, get_job_status, get_metadata_stats, get_queue_snapshot,
+        get_sonarr_status, get_state_version, queue_metadata, queue_url, wait_for_state_change
+    )
+else:
+    from showsaver.notifier import get_sonarr_status  # noqa: F401
+    from showsaver.state import (  # noqa: F401
+        clear_completed_jobs, count_jobs, get_job_status, get_metadata_stats, get_queue_snapshot,
+        get_state_version, queue_metadata, queue_url, wait_for_state_change
+    )
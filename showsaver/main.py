@@ -1,29 +1,15 @@
 import logging
-import os
-import queue
-import threading
-import yt_dlp
-import yt_dlp.version
 
-
-from datetime import datetime
 from flask import Flask
 from flask_smorest import Api
 
 from showsaver import database
-from showsaver import downloader
-from showsaver.env import (
-    CONFIG_DIR, SHOW_DIR, DEBUG, ENABLE_MEMORY_PROFILING, WAIT_FOR_DEBUGGER, FLASK_PORT, URL
-)
-from showsaver.processors import dropout
+from showsaver import workers
+from showsaver.env import DEBUG, ENABLE_MEMORY_PROFILING, WAIT_FOR_DEBUGGER, FLASK_PORT, RUN_MODE
 from showsaver.routes.downloads import bp as downloads_bp
 from showsaver.routes.dropout import bp as dropout_bp
+from showsaver.routes.sonarr import bp as sonarr_bp
 from showsaver.routes.views import bp as views_bp
-from showsaver.sonarr import is_sonarr_enabled
-from showsaver.state import (
-    download_queue, download_status, download_history, thread_lock, queue_url,
-    metadata_queue, metadata_in_flight
-)
 from showsaver.version import __version__
 
 # Enable remote debugging when debugging is enabled
@@ -46,8 +32,6 @@ if ENABLE_MEMORY_PROFILING:
     tracemalloc.start(10)
     print('tracemalloc started.')
 
-URL_LIST_FILE_PATH = os.path.join(CONFIG_DIR, 'urls.txt')
-
 app = Flask(__name__)
 app.config['API_TITLE'] = 'Show-Saver API'
 app.config['API_VERSION'] = __version__
@@ -67,6 +51,7 @@ app.register_blueprint(views_bp)
 api = Api(app)
 api.register_blueprint(downloads_bp)
 api.register_blueprint(dropout_bp)
+api.register_blueprint(sonarr_bp)
 
 if ENABLE_MEMORY_PROFILING:
     from showsaver.routes.debug import bp as debug_bp
@@ -80,130 +65,15 @@ class _NoQueueFilter(logging.Filter):
 logging.getLogger('werkzeug').addFilter(_NoQueueFilter())
 
 
-def download_worker() -> None:
-    """Background worker that processes download queue"""
-    print('Download thread started.')
-    while True:
-        try:
-            item = download_queue.get(timeout=1)
-            if item is None:
-                break
-
-            url = item['url']
-            job_id = item['id']
-
-            # Any updates to data here must be reflected to JobStatusSchema
-            with thread_lock:
-                download_status[job_id]['status'] = 'downloading'
-                download_status[job_id]['started_at'] = datetime.now().isoformat()
-
-            try:
-                def update_progress(progress: downloader.ProgressUpdate) -> None:
-                    with thread_lock:
-                        status = download_status[job_id]
-                        status['progress'] = int(progress.percent)
-                        status['total_bytes'] = progress.total_bytes
-                        status['speed_bytes'] = progress.speed_bytes
-                        status['eta'] = progress.eta
-                        status['step'] = progress.step
-                        status['step_type'] = str(progress.step_type)
-                        status['total_steps'] = progress.total_steps
-
-                expanded = downloader.process_url(url, SHOW_DIR, progress_callback=update_progress, processor=dropout.DropoutProcessor())
-
-                if expanded is not None:
-                    for entry_url in expanded:
-                        queue_url(entry_url)
-                    with thread_lock:
-                        download_status.pop(job_id, None)
-                    download_queue.task_done()
-                    continue
-
-                with thread_lock:
-                    download_status[job_id]['status'] = 'completed'
-                    download_status[job_id]['completed_at'] = datetime.now().isoformat()
-                    download_status[job_id]['file_path'] = ''
-                    download_status[job_id]['size'] = 0
-                    download_history.append(download_status[job_id].copy())
-
-            except Exception as e:
-                print(str(e))
-                with thread_lock:
-                    download_status[job_id]['status'] = 'failed'
-                    download_status[job_id]['error'] = str(e)
-                    download_status[job_id]['completed_at'] = datetime.now().isoformat()
-
-            download_queue.task_done()
-
-        except queue.Empty:
-            continue
-
-
-def metadata_worker() -> None:
-    """Background worker that fills in episode metadata via yt-dlp."""
-    print('Metadata thread started.')
-    while True:
-        try:
-            episode_url_data = metadata_queue.get(timeout=1)
-        except queue.Empty:
-            continue
-
-        url_path = episode_url_data['url_path']
-        full_url = episode_url_data['url']
-        try:
-            dropout.fetch_and_store_episode_info(full_url)
-            print(f'Metadata fetch succeeded for {full_url}')
-        except Exception as e:
-            print(f'Metadata fetch failed for {full_url}: {e}')
-        finally:
-            if url_path is not None:
-                with thread_lock:
-                    metadata_in_flight.discard(url_path)
-            metadata_queue.task_done()
-
-
-def get_urls_to_process() -> list[str]:
-    urls = []
-    if URL:
-        urls.append(URL)
-
-    with open(URL_LIST_FILE_PATH, 'r') as url_list_file:
-        file_urls = [line.strip() for line in url_list_file if line.strip()]
-        urls.extend(file_urls)
-
-    return urls
-
-
-def create_config_files():
-    netrc_path = os.path.join(CONFIG_DIR, '.netrc')
-    if not os.path.exists(netrc_path):
-        with open(netrc_path, 'w') as netrc_file:
-            print('Created .netrc file: ' + netrc_path)
-
-    if not os.path.exists(URL_LIST_FILE_PATH):
-        with open(URL_LIST_FILE_PATH, 'w') as url_list_file:
-            print('Created url text file: ' + URL_LIST_FILE_PATH)
-
-
 def _initialize():
     """Initialize app - runs on module load for gunicorn compatibility."""
     try:
         database.init_db()
-        create_config_files()
-
-        print("yt-dlp version: " + yt_dlp.version.__version__)
-        if is_sonarr_enabled():
-            print("Sonarr integration enabled")
-        else:
-            print("Sonarr integration disabled")
-
-        for url in get_urls_to_process():
-            queue_url(url)
-
-        download_thread = threading.Thread(target=download_worker, daemon=True)
-        download_thread.start()
-        metadata_thread = threading.Thread(target=metadata_worker, daemon=True)
-        metadata_thread.start()
+        if RUN_MODE == 'api':
+            # Jobs are run by the downloader process (python -m showsaver.workers)
+            print("API mode: sharing job state with the downloader process")
+            return
+        workers.start_workers()
     except Exception as e:
         print(f"Initialization error: {e}")
         import traceback
@@ -0,0 +1,346 @@
+import queue
+import threading
+import time
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from showsaver import sonarr
+from showsaver.env import SONARR_NOTIFY_MAX_ATTEMPTS, SONARR_NOTIFY_QUIET_WINDOW, SONARR_NOTIFY_RETRY_BACKOFF
+
+COMMAND_POLL_INTERVAL = 3     # seconds between polls of a rescan a rename waits on
+COMMAND_TIMEOUT = 30          # seconds a rename waits for its rescan before going ahead anyway
+MAX_RETRY_BACKOFF = 600       # seconds
+
+
+@dataclass
+class _PendingSeries:
+    title: str
+    due: float
+    rescans: int = 0
+    renames: int = 0
+    attempts: int = 0
+
+
+@dataclass
+class _Lookup:
+    """A request whose series could not be looked up (Sonarr unreachable); retried like a failed command."""
+    request: tuple[str, str, bool]
+    due: float
+    attempts: int = 0
+
+
+@dataclass
+class _Rescan:
+    pending: _PendingSeries
+    command_id: Any
+    deadline: float
+    next_poll: float
+
+
+@dataclass
+class _SeriesStats:
+    title: str
+    state: str = 'idle'
+    rescans_requested: int = 0
+    renames_requested: int = 0
+    commands_sent: int = 0
+    commands_saved: int = 0
+    attempts: int = 0
+    last_error: str | None = None
+    last_sent_at: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'title': self.title,
+            'state': self.state,
+            'rescans_requested': self.rescans_requested,
+            'renames_requested': self.renames_requested,
+            'commands_sent': self.commands_sent,
+            'commands_saved': self.commands_saved,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'last_sent_at': self.last_sent_at,
+        }
+
+
+@dataclass
+class _Stats:
+    commands_requested: int = 0
+    commands_sent: int = 0
+    commands_saved: int = 0
+    retries: int = 0
+    failed: int = 0
+    last_error: str | None = None
+    last_error_at: float | None = None
+    last_success_at: float | None = None
+    series: dict[int, _SeriesStats] = field(default_factory=dict)
+
+
+class SonarrNotifier:
+    """
+    Post-download stage that tells Sonarr about new episodes.
+
+    Download threads only enqueue a request. The notifier thread resolves the series and holds it
+    until no request for that series has arrived for quiet_window seconds, then sends one
+    RescanSeries for it; series that asked for a rename and come due together share one RenameSeries.
+    A season batch therefore costs Sonarr one folder walk instead of one per episode.
+
+    Nothing here blocks on Sonarr for long: a rename waits for its rescan by polling the command from
+    the run() loop, and a failed command (or series lookup) is retried with exponential backoff up to
+    max_attempts.
+    """
+
+    def __init__(self, quiet_window: float, max_attempts: int=SONARR_NOTIFY_MAX_ATTEMPTS,
+                 retry_backoff: float=SONARR_NOTIFY_RETRY_BACKOFF):
+        self.quiet_window = quiet_window
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._requests: queue.Queue[tuple[str, str, bool]] = queue.Queue()
+        self._pending: dict[int, _PendingSeries] = {}
+        self._rescanning: dict[int, _Rescan] = {}
+        self._lookups: list[_Lookup] = []
+        self._stats = _Stats()
+        self._stats_lock = threading.Lock()
+
+    def request(self, show_name: str, override_name: str | None=None, do_rename: bool=False) -> None:
+        """Ask for a rescan (and optionally a rename) of a series. Never blocks on Sonarr."""
+        if not sonarr.is_sonarr_enabled():
+            return
+        self._requests.put((show_name, override_name or show_name, do_rename))
+
+    def _set_state(self, series_id: int, state: str, error: str | None=None) -> None:
+        with self._stats_lock:
+            series_stats = self._stats.series[series_id]
+            series_stats.state = state
+            if error:
+                series_stats.last_error = error
+                self._stats.last_error = error
+                self._stats.last_error_at = time.time()
+
+    def _set_idle(self, series_id: int) -> None:
+        self._set_state(series_id, 'waiting' if series_id in self._pending else 'idle')
+
+    def _add(self, show_name: str, override_name: str, do_rename: bool, now: float) -> None:
+        series_id = sonarr.find_series_by_name(show_name, override_name)
+        if series_id is None:
+            print(f"Sonarr: Series '{show_name}' not found in library")
+            return
+
+        pending = self._pending.get(series_id)
+        if pending is None:
+            pending = self._pending[series_id] = _PendingSeries(override_name, now)
+        # A retry keeps its backoff; otherwise the quiet window restarts
+        if not pending.attempts:
+            pending.due = now + self.quiet_window
+        pending.rescans += 1
+        pending.renames += do_rename
+
+        with self._stats_lock:
+            self._stats.commands_requested += 1 + do_rename
+            series_stats = self._stats.series.setdefault(series_id, _SeriesStats(override_name))
+            series_stats.rescans_requested += 1
+            series_stats.renames_requested += do_rename
+            if series_stats.state in ('idle', 'failed'):
+                series_stats.state = 'waiting'
+
+    def _take(self, request: tuple[str, str, bool], now: float, lookup: _Lookup | None=None) -> None:
+        try:
+            self._add(*request, now)
+        except Exception as e:
+            self._retry_lookup(lookup or _Lookup(request, now), e, now)
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.retry_backoff * 2 ** (attempts - 1), MAX_RETRY_BACKOFF)
+
+    def _retry_lookup(self, lookup: _Lookup, error: Exception, now: float) -> None:
+        print(f"Sonarr integration warning: {error}")
+        lookup.attempts += 1
+        with self._stats_lock:
+            self._stats.last_error = str(error)
+            self._stats.last_error_at = time.time()
+            if lookup.attempts >= self.max_attempts:
+                self._stats.failed += 1
+            else:
+                self._stats.retries += 1
+        if lookup.attempts >= self.max_attempts:
+            print(f"Sonarr: Giving up on series '{lookup.request[1]}' after {lookup.attempts} attempt(s)")
+            return
+        lookup.due = now + self._backoff(lookup.attempts)
+        self._lookups.append(lookup)
+
+    def _retry_lookups(self, now: float) -> None:
+        due = [lookup for lookup in self._lookups if lookup.due <= now]
+        if not due:
+            return
+        self._lookups = [lookup for lookup in self._lookups if lookup.due > now]
+        for lookup in due:
+            self._take(lookup.request, now, lookup)
+
+    def drain(self, now: float | None=None) -> int:
+        """Take every queued request into the pending set. Returns how many were taken."""
+        now = time.monotonic() if now is None else now
+        taken = 0
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                return taken
+            self._take(request, now)
+            taken += 1
+
+    def _retry(self, series_id: int, pending: _PendingSeries, error: Exception, now: float) -> None:
+        print(f"Sonarr integration warning: {error}")
+        pending.attempts += 1
+        if pending.attempts >= self.max_attempts:
+            print(f"Sonarr: Giving up on series '{pending.title}' after {pending.attempts} attempt(s)")
+            self._set_state(series_id, 'failed', str(error))
+            with self._stats_lock:
+                self._stats.failed += 1
+                self._stats.series[series_id].attempts = pending.attempts
+            return
+
+        pending.due = now + self._backoff(pending.attempts)
+        # Requests that arrived meanwhile were merged into a new pending entry; fold them in
+        merged = self._pending.pop(series_id, None)
+        if merged:
+            pending.rescans += merged.rescans
+            pending.renames += merged.renames
+        self._pending[series_id] = pending
+        self._set_state(series_id, 'retrying', str(error))
+        with self._stats_lock:
+            self._stats.retries += 1
+            self._stats.series[series_id].attempts = pending.attempts
+
+    def _record_sent(self, series_ids: list[int], saved: dict[int, int], extra_saved: int=0) -> None:
+        with self._stats_lock:
+            self._stats.commands_sent += 1
+            self._stats.commands_saved += extra_saved
+            self._stats.last_success_at = time.time()
+            for series_id in series_ids:
+                series_stats = self._stats.series[series_id]
+                series_stats.commands_sent += 1
+                series_stats.commands_saved += saved[series_id]
+                series_stats.last_sent_at = self._stats.last_success_at
+                self._stats.commands_saved += saved[series_id]
+
+    def _send_rescans(self, now: float) -> list[int]:
+        due = [series_id for series_id, pending in self._pending.items() if pending.due <= now]
+        ready_to_rename: dict[int, _PendingSeries] = {}
+        for series_id in due:
+            pending = self._pending.pop(series_id)
+            if not pending.rescans:
+                # Only the rename failed last time
+                ready_to_rename[series_id] = pending
+                continue
+            try:
+                command_id = sonarr.rescan_series(series_id).get('id')
+            except Exception as e:
+                self._retry(series_id, pending, e, now)
+                continue
+            print(f"Sonarr: Triggered rescan for series '{pending.title}' (ID: {series_id}, "
+                  f"{pending.rescans} request(s))")
+            self._record_sent([series_id], {series_id: pending.rescans - 1})
+            pending.rescans = 0
+            pending.attempts = 0
+            if not pending.renames:
+                self._set_idle(series_id)
+            elif command_id:
+                # Renames must see the rescanned files, so they wait for the rescan to finish
+                self._rescanning[series_id] = _Rescan(pending, command_id, now + COMMAND_TIMEOUT, now)
+                self._set_state(series_id, 'rescanning')
+            else:
+                ready_to_rename[series_id] = pending
+        self._send_renames(ready_to_rename, now)
+        return due
+
+    def _poll_rescans(self, now: float) -> None:
+        finished: dict[int, _PendingSeries] = {}
+        for series_id, rescan in list(self._rescanning.items()):
+            if rescan.next_poll > now:
+                continue
+            status = 'timeout'
+            if now < rescan.deadline:
+                try:
+                    status = sonarr.get_command_status(rescan.command_id)
+                except Exception as e:
+                    print(f"Sonarr integration warning: {e}")
+                    status = ''
+                if status not in sonarr.TERMINAL_COMMAND_STATUSES:
+                    rescan.next_poll = now + COMMAND_POLL_INTERVAL
+                    continue
+            print(f"Sonarr: Rescan finished with status '{status}' for '{rescan.pending.title}'")
+            del self._rescanning[series_id]
+            finished[series_id] = rescan.pending
+        self._send_renames(finished, now)
+
+    def _send_renames(self, ready: dict[int, _PendingSeries], now: float) -> None:
+        if not ready:
+            return
+        series_ids = list(ready)
+        try:
+            sonarr.rename_series(series_ids)
+        except Exception as e:
+            for series_id, pending in ready.items():
+                self._retry(series_id, pending, e, now)
+            return
+        print(f"Sonarr: Triggered rename for series IDs {series_ids}")
+        # One RenameSeries covered every series in the batch
+        self._record_sent(series_ids, {series_id: ready[series_id].renames - 1 for series_id in series_ids},
+                          extra_saved=len(series_ids) - 1)
+        for series_id in series_ids:
+            self._set_idle(series_id)
+
+    def flush(self, now: float | None=None) -> list[int]:
+        """
+        Send commands for every series whose quiet window (or retry backoff) has passed, and renames
+        for rescans that have finished. Returns the ids whose rescan window came due.
+        """
+        now = time.monotonic() if now is None else now
+        self._retry_lookups(now)
+        due = self._send_rescans(now)
+        self._poll_rescans(now)
+        return due
+
+    def _next_wakeup(self) -> float | None:
+        times = [pending.due for pending in self._pending.values()]
+        times += [rescan.next_poll for rescan in self._rescanning.values()]
+        times += [lookup.due for lookup in self._lookups]
+        return min(times, default=None)
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'commands_requested': self._stats.commands_requested,
+                'commands_sent': self._stats.commands_sent,
+                'commands_saved': self._stats.commands_saved,
+                'retries': self._stats.retries,
+                'failed': self._stats.failed,
+                'pending_series': len(self._pending) + len(self._rescanning),
+                'queued_requests': self._requests.qsize(),
+                'pending_lookups': len(self._lookups),
+                'last_error': self._stats.last_error,
+                'last_error_at': self._stats.last_error_at,
+                'last_success_at': self._stats.last_success_at,
+                'series': {str(series_id): stats.as_dict() for series_id, stats in self._stats.series.items()},
+            }
+
+    def run(self) -> None:
+        while True:
+            wakeup = self._next_wakeup()
+            timeout = None if wakeup is None else max(0.0, wakeup - time.monotonic())
+            try:
+                request = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                self._take(request, time.monotonic())
+                self.drain()
+            self.flush()
+
+
+sonarr_notifier = SonarrNotifier(SONARR_NOTIFY_QUIET_WINDOW)
+
+
+def get_sonarr_status() -> dict[str, Any]:
+    return {'enabled': sonarr.is_sonarr_enabled(), **sonarr_notifier.get_stats()}
@@ -0,0 +1,84 @@
+"""
+Job stages. A download job moves through extract -> download -> postprocess -> place -> notify.
+Each stage has its own worker threads and hands jobs to the next stage through a bounded queue,
+so one episode's network-bound download overlaps with the ffmpeg remux and copy of the previous
+one, while a slow stage makes the stages before it wait instead of piling up work.
+"""
+import queue
+import threading
+
+from collections.abc import Callable
+from typing import Any
+
+EXTRACT = 'extract'
+DOWNLOAD = 'download'
+POSTPROCESS = 'postprocess'
+PLACE = 'place'
+NOTIFY = 'notify'
+STAGES = (EXTRACT, DOWNLOAD, POSTPROCESS, PLACE, NOTIFY)
+
+
+class Stage:
+    """
+    Runs handler on every item put in inbox, on `workers` threads. The handler returns the item to
+    pass to the next stage, or None if the item stops here (it failed, or the job is done).
+
+    An exception that escapes the handler (or the handoff) drops that item and is passed to
+    on_error(item, exception); the worker thread carries on with the next item.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Any],
+        workers: int,
+        inbox: queue.Queue | None = None,
+        queue_size: int = 1,
+        on_error: Callable[[Any, Exception], None] | None = None,
+    ):
+        self.name = name
+        self.workers = workers
+        self.inbox = inbox if inbox is not None else queue.Queue(maxsize=queue_size)
+        self.next: Stage | None = None
+        self._handler = handler
+        self._on_enqueue: Callable[[Any, str], None] | None = None
+        self._on_error = on_error
+
+    def then(self, stage: 'Stage', on_enqueue: Callable[[Any, str], None] | None = None) -> 'Stage':
+        """Send this stage's results to stage; on_enqueue(item, stage_name) is called before each handoff."""
+        self.next = stage
+        self._on_enqueue = on_enqueue
+        return stage
+
+    def _work(self) -> None:
+        print(f'Stage thread started: {threading.current_thread().name}')
+        while True:
+            item = self.inbox.get()
+            try:
+                self._process(item)
+            except Exception as e:
+                print(f'Stage {self.name} failed on {item!r}: {e}')
+                self._report_error(item, e)
+            finally:
+                self.inbox.task_done()
+
+    def _process(self, item: Any) -> None:
+        result = self._handler(item)
+        if result is None or self.next is None:
+            return
+        if self._on_enqueue:
+            self._on_enqueue(result, self.next.name)
+        # Blocks while the next stage is full
+        self.next.inbox.put(result)
+
+    def _report_error(self, item: Any, error: Exception) -> None:
+        if not self._on_error:
+            return
+        try:
+            self._on_error(item, error)
+        except Exception as e:
+            print(f'Stage {self.name} could not report failure of {item!r}: {e}')
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f'{self.name}-worker-{i + 1}', daemon=True).start()
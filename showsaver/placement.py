@@ -0,0 +1,107 @@
+import fcntl
+import os
+import shutil
+import sys
+import time
+
+from dataclasses import dataclass
+from enum import StrEnum
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+class PlacementStrategy(StrEnum):
+    RENAME = 'rename'
+    HARDLINK = 'hardlink'
+    REFLINK = 'reflink'
+    COPY_FILE_RANGE = 'copy_file_range'
+    SENDFILE = 'sendfile'
+    BUFFERED_COPY = 'buffered_copy'
+
+
+@dataclass(frozen=True, slots=True)
+class PlacementResult:
+    strategy: PlacementStrategy
+    seconds: float
+
+
+def _same_filesystem(src: str, dst: str) -> bool:
+    return os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev
+
+
+def _rename(src: str, dst: str) -> None:
+    os.replace(src, dst)
+
+
+def _hardlink(src: str, dst: str) -> None:
+    if os.path.lexists(dst):
+        os.remove(dst)
+    os.link(src, dst)
+
+
+def _reflink(src: str, dst: str) -> None:
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def _copy_file_range(src: str, dst: str) -> None:
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def _sendfile(src: str, dst: str) -> None:
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+
+def _buffered_copy(src: str, dst: str) -> None:
+    shutil.copyfile(src, dst)
+
+
+def _strategies(src: str, dst: str, allow_move: bool):
+    same_fs = _same_filesystem(src, dst)
+    if allow_move and same_fs:
+        yield PlacementStrategy.RENAME, _rename
+    if same_fs:
+        yield PlacementStrategy.HARDLINK, _hardlink
+    if sys.platform.startswith('linux'):
+        yield PlacementStrategy.REFLINK, _reflink
+    if hasattr(os, 'copy_file_range'):
+        yield PlacementStrategy.COPY_FILE_RANGE, _copy_file_range
+    if hasattr(os, 'sendfile'):
+        yield PlacementStrategy.SENDFILE, _sendfile
+    yield PlacementStrategy.BUFFERED_COPY, _buffered_copy
+
+
+def place_file(src: str, dst: str, allow_move: bool = False) -> PlacementResult:
+    """
+    Put src at dst using the cheapest strategy that works:
+    rename (only if allow_move), hardlink, reflink, copy_file_range, sendfile, then a buffered copy.
+
+    Rename consumes src, so callers only allow it when the source would be deleted anyway.
+    Copy strategies also copy permission bits and timestamps, like shutil.copy2.
+    """
+    start = time.monotonic()
+    last_error: OSError | None = None
+    for strategy, place in _strategies(src, dst, allow_move):
+        try:
+            place(src, dst)
+        except OSError as e:
+            last_error = e
+            continue
+        if strategy not in (PlacementStrategy.RENAME, PlacementStrategy.HARDLINK):
+            shutil.copystat(src, dst)
+        return PlacementResult(strategy, time.monotonic() - start)
+    raise last_error or OSError(f'Unable to place {src} at {dst}')
@@ -1,25 +1,57 @@
 import showsaver.database as database
+import showsaver.ytdl_pool as ytdl_pool
 from showsaver.downloader import BASE_YT_OPTS
+from showsaver.jobs import queue_metadata
 from showsaver.processors import Processor
-from showsaver.state import queue_metadata
+from showsaver.state import METADATA_PRIORITY_BACKLOG, METADATA_PRIORITY_VISIBLE
 
+import re
 import requests
 import time
-import yt_dlp
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from dataclasses import dataclass, field
 from typing import Any
 from urllib.parse import urlparse
 
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
 DROPOUT_NEW_RELEASES_URL = "https://watch.dropout.tv/new-releases"
 
 # Cache for new releases found on last scrape
 _new_releases_cache = {
     'data': None,
-    'timestamp': 0
+    'timestamp': 0,
+    'rows': None,   # (database episodes version, urls, rows) served to polls while 'data' is fresh
 }
 CACHE_TTL = 300  # 5 minutes
+DISPLAYED_RELEASES = 9  # the frontend renders the first 9 releases; their metadata is fetched first
 METADATA_CACHE_TTL = 7 * 24 * 60 * 60 # 1 week in seconds
 
+# Scraper backends, fastest first:
+#   lxml      - lxml.html tree + XPath for the collection items (used when lxml is installed)
+#   bs4       - BeautifulSoup html.parser, building only li.js-collection-item subtrees
+#   bs4-full  - BeautifulSoup html.parser over the whole page; the original behaviour, kept for benchmarks
+HTML_BACKEND = 'lxml' if lxml else 'bs4'
+
+# Matched with a regex because the items carry several classes
+_COLLECTION_ITEM_CLASS = re.compile(r'(^|\s)js-collection-item(\s|$)')
+_COLLECTION_ITEMS = SoupStrainer('li', class_=_COLLECTION_ITEM_CLASS)
+_COLLECTION_ITEMS_XPATH = "//li[contains(concat(' ', normalize-space(@class), ' '), ' js-collection-item ')]"
+_DURATION_XPATH = ".//div[contains(concat(' ', normalize-space(@class), ' '), ' duration-container ')]"
+
+# One pooled session for page fetches; conditional requests use the validators stored in SQLite
+_scrape_session = requests.Session()
+
+_scrape_stats: dict[str, Any] = {
+    'requests': 0,
+    'not_modified': 0,   # 304 responses: parse and upsert skipped
+    'last_parse_seconds': None,
+    'last_new_items': None,     # items processed by the last 200 response; fewer than the page when incremental
+}
+
 SHOW_NAME_OVERRIDES = {
     'Very Important People' : 'Very Important People (2023)',
     'Don\'t Hug Me I\'m Scared' : 'Don\'t Hug Me I\'m Scared (2022)'
@@ -136,44 +168,109 @@ def _time_to_sec(t: str) -> int:
         return m * 60 + s
 
 
-def _get_new_releases_bs() -> list[dict[str, Any]] | None:
+def _release_item(item_id: str, thumbnail: str | None, href: str, title: str, duration_txt: str | None) -> dict[str, Any] | None:
+    # Items without a duration aren't videos
+    if duration_txt is None:
+        return None
+    return {
+        'title': title,
+        'url': href.replace('/new-releases', ''),
+        'thumbnail': thumbnail,
+        'duration': _time_to_sec(duration_txt.strip()),  # seconds
+        'id': int(item_id),
+    }
+
+
+def _iter_release_items_lxml(html: str):
+    root = lxml.html.fromstring(html)
+    for list_item in root.xpath(_COLLECTION_ITEMS_XPATH):
+        img = list_item.find('.//img')
+        link = list_item.xpath('.//a[@href]')[0]
+        duration_container = list_item.xpath(_DURATION_XPATH)
+        yield _release_item(
+            list_item.attrib['data-item-id'],
+            img.get('src') if img is not None else None,
+            link.attrib['href'],
+            list_item.find('.//strong').attrib['title'],
+            duration_container[0].text_content() if duration_container else None,
+        )
+
+
+def _iter_release_items_bs(html: str, strain: bool):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=_COLLECTION_ITEMS if strain else None)
+    for list_item in soup.find_all('li', class_=_COLLECTION_ITEM_CLASS):
+        img = list_item.find('img')
+        duration_container = list_item.find('div', class_='duration-container')
+        yield _release_item(
+            list_item['data-item-id'],
+            img['src'] if img else None,
+            list_item.find('a', href=True)['href'],
+            list_item.find('strong')['title'],
+            duration_container.text if duration_container else None,
+        )
+
+
+def _iter_new_releases(html: str, backend: str=HTML_BACKEND):
+    """Release items from the new-releases page, lazily and in page order."""
+    if backend == 'lxml':
+        items = _iter_release_items_lxml(html)
+    else:
+        items = _iter_release_items_bs(html, strain=(backend == 'bs4'))
+    return (item for item in items if item)
+
+
+def _parse_new_releases(html: str, backend: str=HTML_BACKEND) -> list[dict[str, Any]]:
+    """Extract release items from the new-releases page, in page order."""
+    return list(_iter_new_releases(html, backend))
+
+
+@dataclass(frozen=True, slots=True)
+class _ReleasesPage:
+    not_modified: bool
+    videos: list[dict[str, Any]] = field(default_factory=list)
+    etag: str | None = None
+    last_modified: str | None = None
+    stopped_at: int | None = None   # first already-known item id, when an incremental scrape stopped early
+
+
+def _get_new_releases_bs(validators: dict | None=None, known_ids: set[int] | None=None) -> _ReleasesPage | None:
     """
     Use BeautifulSoup to parse webpage to fetch new releases.
+    With validators from a previous fetch the request is conditional, and a 304 skips parsing.
+    With known_ids, processing stops at the first item already known, so only newer items are returned.
     """
-    response = requests.get(DROPOUT_NEW_RELEASES_URL)
-
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+    response = _scrape_session.get(DROPOUT_NEW_RELEASES_URL, headers=headers, timeout=30)
+    _scrape_stats['requests'] += 1
+
+    if response.status_code == 304:
+        _scrape_stats['not_modified'] += 1
+        return _ReleasesPage(not_modified=True)
     if response.status_code == 200:
         try:
-            soup = BeautifulSoup(response.text, 'html.parser')
-
+            start = time.perf_counter()
             videos = []
-            list_items = soup.find_all('li', class_='js-collection-item')
-            for list_item in list_items:
-                if list_item:
-                    img = list_item.find('img')
-                    thumbnail = img['src'] if img else None
-                    link = list_item.find('a', href=True)
-
-                    title = list_item.find('strong')['title']
-                    url = link['href'].replace('/new-releases', '')
-                    id = int(list_item['data-item-id'])
-
-                    duration_container = list_item.find('div', class_='duration-container')
-                    if duration_container:
-                        duration_txt = duration_container.text.strip()
-                        duration = _time_to_sec(duration_txt)
-
-                        extracted_data = {
-                            'title': title,
-                            'url': url,
-                            'thumbnail': thumbnail,
-                            'duration': duration,  # seconds
-                            'id': id,
-                        }
-
-                        videos.append(extracted_data)
-
-            return videos
+            stopped_at = None
+            for video in _iter_new_releases(response.text):
+                if known_ids and video['id'] in known_ids:
+                    stopped_at = video['id']
+                    break
+                videos.append(video)
+            _scrape_stats['last_parse_seconds'] = time.perf_counter() - start
+            _scrape_stats['last_new_items'] = len(videos)
+            return _ReleasesPage(
+                not_modified=False,
+                videos=videos,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                stopped_at=stopped_at,
+            )
         except Exception as e:
             print(e)
     else:
@@ -181,6 +278,14 @@ def _get_new_releases_bs() -> list[dict[str, Any]] | None:
     return None
 
 
+def get_scrape_stats() -> dict[str, Any]:
+    requests_made = _scrape_stats['requests']
+    return {
+        **_scrape_stats,
+        'not_modified_rate': _scrape_stats['not_modified'] / requests_made if requests_made else None,
+    }
+
+
 def _get_url_path(url: str) -> str:
     parsed_url = urlparse(url)
     stripped_path = parsed_url.path.rstrip('/')
@@ -202,56 +307,141 @@ def _update_database_episode(video_info: dict) -> None:
     )
 
 
-def get_new_releases(force_refresh: bool=False):
+def _row_to_video(row: dict) -> dict[str, Any]:
+    # Database row in the shape of a scraped release
+    return {
+        'url_path': row['url_path'],
+        'title': row['title'],
+        'url': row['url'],
+        'thumbnail': row['thumbnail'],
+        'duration': row['duration'],
+        'id': row['item_id'],
+        'show_name': row['show_name'],
+        'metadata_fetched_at': row['metadata_fetched_at'],
+    }
+
+
+def _get_cached_release_rows(urls: list[str]) -> list[dict]:
+    """
+    DB rows for the cached release URLs, shaped like scraped releases. Rows are kept in memory until an episode upsert (e.g. from
+    the metadata workers) bumps the database version, so a poll costs at most one batched SELECT.
+    """
+    version = database.get_dropout_episodes_version()
+    cached_rows = _new_releases_cache['rows']
+    if cached_rows and cached_rows[0] == version and cached_rows[1] == urls:
+        return cached_rows[2]
+
+    url_paths = [_get_url_path(u) for u in urls]
+    rows_by_path = database.get_dropout_episodes(url_paths)
+    rows = [_row_to_video(rows_by_path[p]) for p in url_paths if p in rows_by_path]
+    _new_releases_cache['rows'] = (version, urls, rows)
+    return rows
+
+
+def _queue_missing_metadata(index: int, url: str, url_path: str, row: dict) -> None:
+    metadata_fetched_at = row.get('metadata_fetched_at')
+    if not row.get('show_name') and (time.time() - (metadata_fetched_at or 0)) > METADATA_CACHE_TTL:
+        priority = METADATA_PRIORITY_VISIBLE if index < DISPLAYED_RELEASES else METADATA_PRIORITY_BACKLOG
+        queue_metadata(url, url_path, priority)
+
+
+def get_new_releases_version() -> str | None:
+    """
+    Identifies what get_new_releases() would return from its cache right now: it changes with each
+    scrape and each episode upsert. None when the cache is stale, i.e. the next call will scrape.
+    """
+    if not _new_releases_cache['data'] or time.time() - _new_releases_cache['timestamp'] >= CACHE_TTL:
+        return None
+    return f"{_new_releases_cache['timestamp']}-{database.get_dropout_episodes_version()}"
+
+
+def get_new_releases(force_refresh: bool=False, incremental: bool=True):
     """
     Get list of new releases from Dropout using yt-dlp.
     Returns dict with 'success', 'videos' list, 'cached' flag.
+
+    An incremental scrape stops at the first item already on the stored page. Only the newer items
+    are upserted; the rest of the list comes from the stored page's rows.
     """
     if not force_refresh and _new_releases_cache['data'] and (time.time() - _new_releases_cache['timestamp'] < CACHE_TTL):
-        fetched = [row for row in (database.get_dropout_episode(_get_url_path(u)) for u in _new_releases_cache['data']) if row]
+        fetched = _get_cached_release_rows(_new_releases_cache['data'])
         if fetched:
             return {'success': True, 'videos': fetched, 'cached': True}
-    
+
     try:
-        scraped = _get_new_releases_bs() or []
+        known_page = database.get_dropout_release_page(DROPOUT_NEW_RELEASES_URL)
+        known_rows = _get_cached_release_rows(known_page['release_urls']) if incremental and known_page else []
+        known_ids = {row['id'] for row in known_rows if row['id'] is not None}
+        page = _get_new_releases_bs(known_page, known_ids)
+
+        if page and page.not_modified:
+            # Page unchanged since the stored fetch, whose rows are already in the database
+            _new_releases_cache['data'] = known_page['release_urls']
+            _new_releases_cache['timestamp'] = time.time()
+            videos = _get_cached_release_rows(known_page['release_urls'])
+            for index, row in enumerate(videos):
+                _queue_missing_metadata(index, row['url'], row['url_path'], row)
+            return {'success': True, 'videos': videos, 'cached': True}
+
+        scraped = page.videos if page else []
+        url_paths = [_get_url_path(v['url']) for v in scraped]
+        # Preserve any existing show_name in data. One transaction and one read for the whole page.
+        database.upsert_dropout_episodes_basic([
+            {
+                'url_path': url_path,
+                'url': v['url'],
+                'title': v.get('title', ''),
+                'thumbnail': v.get('thumbnail', ''),
+                'duration': v.get('duration', -1),
+                'item_id': v.get('id'),
+            }
+            for url_path, v in zip(url_paths, scraped)
+        ])
+        rows = database.get_dropout_episodes(url_paths)
+
         videos = []
-        for v in scraped:
-            url_path = _get_url_path(v['url'])
-            # Preserve any existing show_name in data
-            database.upsert_dropout_episode_basic(
-                url_path=url_path,
-                url=v['url'],
-                episode_title=v.get('title', ''),
-                thumbnail=v.get('thumbnail', ''),
-                duration_secs=v.get('duration', -1),
-            )
-            row = database.get_dropout_episode(url_path) or {}
-            metadata_fetched_at = row.get('metadata_fetched_at')
+        for index, (url_path, v) in enumerate(zip(url_paths, scraped)):
+            row = rows.get(url_path) or {}
             merged = {
                 **v,
                 'show_name': row.get('show_name', ''),
-                'metadata_fetched_at': metadata_fetched_at,
+                'metadata_fetched_at': row.get('metadata_fetched_at'),
             }
             videos.append(merged)
+            _queue_missing_metadata(index, v['url'], url_path, row)
+
+        if page and page.stopped_at is not None:
+            # Everything from the first known item down is unchanged; keep the page length stable
+            start = next(i for i, row in enumerate(known_rows) if row['id'] == page.stopped_at)
+            room = max(len(known_rows) - len(videos), 0)
+            reused = known_rows[start:start + room]
+            # Not re-scraped, but rows still missing metadata need queuing as on a full scrape
+            for index, row in enumerate(reused, start=len(videos)):
+                _queue_missing_metadata(index, row['url'], row['url_path'], row)
+            videos.extend(reused)
 
-            if not merged['show_name'] and (time.time() - (metadata_fetched_at or 0)) > METADATA_CACHE_TTL:
-                queue_metadata(v['url'], url_path)
-        
         _new_releases_cache['data'] = [v['url'] for v in videos if v]
         _new_releases_cache['timestamp'] = time.time()
+        _new_releases_cache['rows'] = None
+        if page:
+            database.upsert_dropout_release_page(
+                DROPOUT_NEW_RELEASES_URL, page.etag, page.last_modified, _new_releases_cache['data'],
+            )
         return {'success': True, 'videos': videos, 'cached': False}
     except Exception as e:
         return {'success': False, 'error': str(e), 'videos': []}
 
 
+EPISODE_INFO_YT_OPTS = {
+    **BASE_YT_OPTS,
+    'skip_download': True,
+    'quiet': True,
+}
+
+
 def fetch_and_store_episode_info(episode_url: str) -> dict[str, Any]:
     # Run yt-dlp, upsert the full row to DB. Returns the info dict or raises.
-    opts = {
-        **BASE_YT_OPTS,
-        'skip_download': True,
-        'quiet': True,
-    }
-    with yt_dlp.YoutubeDL(opts) as ydl:
+    with ytdl_pool.metadata_pool.checkout(EPISODE_INFO_YT_OPTS) as ydl:
         info = ydl.extract_info(episode_url, download=False)
     
     episode_info = {
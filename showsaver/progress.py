@@ -0,0 +1,75 @@
+import time
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+
+class StreamType(StrEnum):
+    VIDEO = 'video'
+    AUDIO = 'audio'
+    VIDEO_AUDIO = 'video+audio'
+
+
+@dataclass(frozen=True, slots=True)
+class ProgressUpdate:
+    percent: float
+    total_bytes: float
+    speed_bytes: float
+    eta: float
+    step: int
+    total_steps: int
+    step_type: StreamType
+
+    def as_fields(self) -> dict[str, Any]:
+        """Job status fields for this update; must match JobStatusSchema."""
+        return {
+            'progress': int(self.percent),
+            'total_bytes': self.total_bytes,
+            'speed_bytes': self.speed_bytes,
+            'eta': self.eta,
+            'step': self.step,
+            'step_type': str(self.step_type),
+            'total_steps': self.total_steps,
+        }
+
+
+class ProgressPublisher:
+    """
+    Latest progress of each downloading job. A download thread publishes by swapping in a whole,
+    immutable ProgressUpdate, without taking any lock; readers just see whichever update is current.
+
+    Listeners are told about changes by flush(), which run() calls once per interval, so many
+    publishes between two flushes cost a single on_change call.
+    """
+
+    def __init__(self, interval: float, on_change: Callable[[], None]):
+        self.interval = interval
+        self._on_change = on_change
+        self._latest: dict[str, ProgressUpdate] = {}
+        self._dirty = False
+
+    def publish(self, job_id: str, progress: ProgressUpdate) -> None:
+        self._latest[job_id] = progress
+        self._dirty = True
+
+    def get(self, job_id: str) -> ProgressUpdate | None:
+        return self._latest.get(job_id)
+
+    def pop(self, job_id: str) -> ProgressUpdate | None:
+        return self._latest.pop(job_id, None)
+
+    def flush(self) -> bool:
+        """Call on_change if anything was published since the last flush."""
+        if not self._dirty:
+            return False
+        # Cleared first, so a publish racing with on_change is picked up by the next flush
+        self._dirty = False
+        self._on_change()
+        return True
+
+    def run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
@@ -0,0 +1,160 @@
+import copy
+import os
+import time
+
+from dataclasses import dataclass
+
+from yt_dlp.postprocessor.ffmpeg import FFmpegEmbedSubtitlePP, FFmpegMetadataPP, FFmpegSubtitlesConvertorPP
+from yt_dlp.postprocessor.modify_chapters import DEFAULT_SPONSORBLOCK_CHAPTER_TITLE, ModifyChaptersPP
+from yt_dlp.utils import ISO639Utils, PostProcessingError, prepend_extension, replace_extension
+
+
+@dataclass(frozen=True, slots=True)
+class RewriteStats:
+    bytes_rewritten: int = 0
+    ffmpeg_seconds: float = 0.0
+
+
+class SinglePassPP(ModifyChaptersPP):
+    """
+    ModifyChapters and FFmpegEmbedSubtitle in one ffmpeg run. The SponsorBlock cut (the concat demuxer
+    over the kept ranges of the video and its subtitles), the rewritten chapter list and the subtitle
+    mux all go into one output, so the episode is rewritten once instead of once per postprocessor.
+
+    Without segments to remove the cut is skipped and only the subtitles are muxed; with neither,
+    the file is left alone.
+    """
+
+    def __init__(self, downloader=None, remove_sponsor_segments=None, *,
+                 sponsorblock_chapter_title=DEFAULT_SPONSORBLOCK_CHAPTER_TITLE, already_have_subtitle=False):
+        super().__init__(downloader, remove_sponsor_segments=remove_sponsor_segments,
+                         sponsorblock_chapter_title=sponsorblock_chapter_title)
+        self._already_have_subtitle = already_have_subtitle
+
+    def _plan_cut(self, info) -> list[dict]:
+        """
+        ModifyChaptersPP.run up to the point it rewrites the file: updates info's chapters and
+        duration, and returns the concat demuxer options for the kept ranges ([] if nothing is cut).
+        """
+        chapters, sponsor_chapters = self._mark_chapters_to_remove(
+            copy.deepcopy(info.get('chapters')) or [],
+            copy.deepcopy(info.get('sponsorblock_chapters')) or [])
+        if not any(c.get('remove') for c in chapters + sponsor_chapters):
+            return []
+
+        self._fixup_chapters(info)
+        real_duration = self._get_real_video_duration(info['filepath'])
+        if not chapters:
+            chapters = [{'start_time': 0, 'end_time': info.get('duration') or real_duration, 'title': info['title']}]
+
+        new_chapters, cuts = self._remove_marked_arrange_sponsors(chapters + sponsor_chapters)
+        if not cuts:
+            info['chapters'] = new_chapters
+            return []
+        if not new_chapters:
+            self.report_warning('You have requested to remove the entire video, which is not possible')
+            return []
+
+        original_duration, new_duration = info.get('duration'), new_chapters[-1]['end_time']
+        if self._duration_mismatch(real_duration, original_duration, 1):
+            if not self._duration_mismatch(real_duration, new_duration):
+                self.to_screen('Skipping the cut since the video appears to be already cut')
+                return []
+            if not info.get('__real_download'):
+                raise PostProcessingError('Cannot cut video since the real and expected durations mismatch. '
+                                          'Different chapters may have already been removed')
+
+        info['chapters'], info['duration'] = new_chapters, new_duration
+        return self._make_concat_opts(cuts, real_duration)
+
+    def _subtitles_to_embed(self, info) -> list[tuple[str, dict]]:
+        """The (lang, sub_info) pairs FFmpegEmbedSubtitlePP would embed."""
+        ext = info['ext']
+        if ext not in FFmpegEmbedSubtitlePP.SUPPORTED_EXTS:
+            return []
+        subtitles = []
+        for lang, sub_info in (info.get('requested_subtitles') or {}).items():
+            if not os.path.exists(sub_info.get('filepath', '')):
+                self.report_warning(f'Skipping embedding {lang} subtitle because the file is missing')
+            elif sub_info['ext'] == 'json':
+                self.report_warning('JSON subtitles cannot be embedded')
+            elif ext != 'webm' or sub_info['ext'] == 'vtt':
+                subtitles.append((lang, sub_info))
+        return subtitles
+
+    def run(self, info):
+        concat_opts = self._plan_cut(info)
+        subtitles = self._subtitles_to_embed(info)
+        if not concat_opts and not subtitles:
+            self.to_screen('No segments to cut or subtitles to embed')
+            return [], info
+
+        filename = info['filepath']
+        work_files = []
+
+        def source(path: str, cut: bool=True) -> tuple[str, list[str]]:
+            if not (concat_opts and cut):
+                return path, []
+            spec = f'{path}.concat'
+            with open(spec, 'w', encoding='utf-8') as f:
+                f.writelines(self._concat_spec([path] * len(concat_opts), concat_opts))
+            work_files.append(spec)
+            return spec, ['-f', 'concat', '-safe', '0']
+
+        inputs = [source(filename)]
+        opts = list(self.stream_copy_opts(ext=info['ext']))
+        if subtitles:
+            # Replace, rather than add to, any subtitles already in the file
+            opts += ['-map', '-0:s']
+        for i, (lang, sub_info) in enumerate(subtitles):
+            cuttable = sub_info['ext'] in FFmpegSubtitlesConvertorPP.SUPPORTED_EXTS
+            if concat_opts and not cuttable:
+                self.report_warning(f'Cannot remove chapters from {sub_info["ext"]} subtitles; they are now out of sync')
+            inputs.append(source(sub_info['filepath'], cut=cuttable))
+            opts += ['-map', f'{len(inputs) - 1}:0', f'-metadata:s:s:{i}', f'language={ISO639Utils.short2long(lang) or lang}']
+            if sub_info.get('name'):
+                opts += [f'-metadata:s:s:{i}', f'handler_name={sub_info["name"]}', f'-metadata:s:s:{i}', f'title={sub_info["name"]}']
+        if concat_opts and info.get('chapters'):
+            # The concat demuxer drops the source chapters; map the rewritten ones from a metadata file
+            metadata_filename = replace_extension(filename, 'meta')
+            list(FFmpegMetadataPP._get_chapter_opts(info['chapters'], metadata_filename))
+            work_files.append(metadata_filename)
+            inputs.append((metadata_filename, []))
+            opts += ['-map_chapters', str(len(inputs) - 1)]
+
+        temp_filename = prepend_extension(filename, 'temp')
+        self.to_screen(f'Rewriting "{filename}" in one pass ({"cut, " if concat_opts else ""}{len(subtitles)} subtitle(s))')
+        try:
+            self.real_run_ffmpeg(inputs, [(temp_filename, opts)])
+        finally:
+            self._delete_downloaded_files(*work_files, msg=None)
+        os.replace(temp_filename, filename)
+
+        files_to_delete = [] if self._already_have_subtitle else [sub_info['filepath'] for _, sub_info in subtitles]
+        return files_to_delete, info
+
+
+def _file_id(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def run_postprocessors(yt, postprocessors: list, info: dict) -> tuple[dict, RewriteStats]:
+    """
+    Run postprocessors on info['filepath'] in order. A postprocessor that writes a new copy of the file
+    (a new inode, since ffmpeg writes to a temp file and renames it over) adds the new file's size and
+    its wall time to the stats; one that leaves the file alone adds nothing.
+    """
+    bytes_rewritten, ffmpeg_seconds = 0, 0.0
+    for pp in postprocessors:
+        before = _file_id(info['filepath'])
+        start = time.monotonic()
+        info = yt.run_pp(pp, info)
+        elapsed = time.monotonic() - start
+        if _file_id(info['filepath']) not in (None, before):
+            bytes_rewritten += os.path.getsize(info['filepath'])
+            ffmpeg_seconds += elapsed
+    return info, RewriteStats(bytes_rewritten, ffmpeg_seconds)
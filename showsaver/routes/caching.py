@@ -0,0 +1,45 @@
+from flask import Response, current_app, request
+
+from showsaver.shared_state import PROCESS_TAG
+
+
+class VersionedResponseCache:
+    """
+    Holds the serialized JSON body of one endpoint for the latest state version it was built at.
+    Clients revalidating with a matching If-None-Match get a 304 without the body being rebuilt.
+    """
+
+    def __init__(self, name: str, process_scoped: bool=True):
+        # Versions that only mean something within this process get the process tag added to the ETag
+        self._tag = f'{name}-{PROCESS_TAG}' if process_scoped else name
+        self._entry: tuple[object, str] | None = None   # (version, body); swapped whole, never mutated
+
+    def etag(self, version: object) -> str:
+        return f'"{self._tag}-{version}"'
+
+    def not_modified(self, version: object) -> Response | None:
+        etag = self.etag(version)
+        if not request.if_none_match.contains_weak(etag.strip('"')):
+            return None
+        return Response(status=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+    def get(self, version: object) -> str | None:
+        entry = self._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        return None
+
+    def put(self, version: object, payload: dict) -> str:
+        body = current_app.json.dumps(payload)
+        self._entry = (version, body)
+        return body
+
+    def response(self, body: str, version: object | None=None) -> Response:
+        """JSON response for body; with an ETag when the version it was built at is known."""
+        headers = {'Cache-Control': 'no-cache'}
+        if version is not None:
+            headers['ETag'] = self.etag(version)
+        return Response(body, mimetype='application/json', headers=headers)
+
+    def clear(self) -> None:
+        self._entry = None
@@ -1,14 +1,34 @@
+import json
+import threading
+import time
+
+from flask import Response
 from flask_smorest import Blueprint, abort
 
+from showsaver import database
+from showsaver.routes.caching import VersionedResponseCache
 from showsaver.schemas import (
     HistoryResponseSchema,
     QueueResponseSchema, StatusResponseSchema,
     SubmitRequestSchema, SubmitResponseSchema,
 )
-from showsaver.state import download_history, download_status, thread_lock, queue_url
+from showsaver.env import QUEUE_EVENTS_MAX_STREAMS, RUN_MODE
+from showsaver.jobs import (
+    clear_completed_jobs, count_jobs, get_job_status, get_queue_snapshot, get_state_version, queue_url,
+    wait_for_state_change
+)
 
 bp = Blueprint('downloads', __name__, description='Download queue operations')
 
+QUEUE_EVENTS_KEEPALIVE = 15  # seconds between comment lines on an idle stream, so dropped clients are noticed
+QUEUE_EVENTS_MAX_AGE = 300   # streams are closed after this long; EventSource reconnects by itself
+QUEUE_EVENTS_RETRY_AFTER = 30  # seconds; sent with the 503 for streams over the limit
+_queue_event_streams = threading.BoundedSemaphore(QUEUE_EVENTS_MAX_STREAMS)
+
+_queue_schema = QueueResponseSchema()
+# Shared versions already identify the downloader process, so API workers agree on ETags
+_queue_cache = VersionedResponseCache('queue', process_scoped=RUN_MODE != 'api')
+
 
 @bp.route('/submit', methods=['POST'])
 @bp.arguments(SubmitRequestSchema)
@@ -16,7 +36,7 @@ bp = Blueprint('downloads', __name__, description='Download queue operations')
 def submit(payload):
     url = payload['text']
     job_id = queue_url(url)
-    queue_position = len([v for v in download_status.values() if v['status'] == 'queued'])
+    queue_position = count_jobs('queued')
 
     return {
         'success': True,
@@ -32,36 +52,127 @@ def submit(payload):
 @bp.response(200, StatusResponseSchema)
 @bp.alt_response(404)
 def get_status(job_id):
-    with thread_lock:
-        if job_id in download_status:
-            return {'success': True, 'status': download_status[job_id]}
-        return abort(404, message='Job not found')
+    job_status = get_job_status(job_id)
+    if job_status:
+        return {'success': True, 'status': job_status}
+    return abort(404, message='Job not found')
+
+
+def _queue_payload(snapshot: dict) -> dict:
+    return {
+        'success': True,
+        'queued': snapshot['queued'],
+        'downloading': snapshot['downloading'],
+        'completed': snapshot['completed'],
+        'queue_size': len(snapshot['queued']),
+        'total_queue_size': len(snapshot['queued']) + len(snapshot['downloading']),
+        'stages': snapshot['stages'],
+    }
+
+
+def _queue_delta(previous: dict, current: dict) -> dict:
+    """
+    Changes between two serialized queue payloads. New jobs are sent whole, existing jobs only
+    with the fields that changed, and jobs that left the queue by id. History and stage backlogs
+    are resent when they change.
+    """
+    previous_jobs = {job['id']: job for job in previous['downloading'] + previous['queued']}
+    current_jobs = {job['id']: job for job in current['downloading'] + current['queued']}
+
+    changed = []
+    for job_id, job in current_jobs.items():
+        old = previous_jobs.get(job_id)
+        if old is None:
+            changed.append(job)
+            continue
+        fields = {key: value for key, value in job.items() if old.get(key) != value}
+        if fields:
+            changed.append({'id': job_id, **fields})
+
+    delta = {}
+    if changed:
+        delta['changed'] = changed
+    removed = [job_id for job_id in previous_jobs if job_id not in current_jobs]
+    if removed:
+        delta['removed'] = removed
+    if current['completed'] != previous['completed']:
+        delta['completed'] = current['completed']
+    if current['stages'] != previous['stages']:
+        delta['stages'] = current['stages']
+    return delta
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
 
 
 @bp.route('/queue', methods=['GET'])
 @bp.response(200, QueueResponseSchema)
+@bp.alt_response(304, description='Queue unchanged since the ETag in If-None-Match')
 def get_queue():
-    with thread_lock:
-        queued = [v for v in download_status.values() if v['status'] == 'queued']
-        downloading = [v for v in download_status.values() if v['status'] == 'downloading']
-        completed = download_history[-10:] if download_history else []
+    """Active jobs and recent history.
+
+    The serialized payload is cached per state version, so repeat polls only rebuild it after
+    a change, and a matching If-None-Match is answered with 304 without taking the state lock.
+    """
+    version = get_state_version()
+    not_modified = _queue_cache.not_modified(version)
+    if not_modified:
+        return not_modified
+
+    body = _queue_cache.get(version)
+    if body is None:
+        version, snapshot = get_queue_snapshot()
+        body = _queue_cache.put(version, _queue_schema.dump(_queue_payload(snapshot)))
+    return _queue_cache.response(body, version)
+
+
+@bp.route('/queue/events', methods=['GET'])
+@bp.doc(responses={
+    200: {'description': 'text/event-stream of queue snapshot and delta events'},
+    503: {'description': 'Too many open streams; poll GET /queue instead'},
+})
+def queue_events():
+    """Server-sent events for the queue.
+
+    A 'snapshot' event carries the same payload as GET /queue; after that, 'delta' events
+    are pushed only when the download state changes. Every stream holds a server thread, so at
+    most QUEUE_EVENTS_MAX_STREAMS are open at once; past that the request gets a 503 and the
+    client polls /queue instead.
+    """
+    if not _queue_event_streams.acquire(blocking=False):
+        return Response('Too many queue event streams', status=503, headers={
+            'Retry-After': str(QUEUE_EVENTS_RETRY_AFTER),
+        })
+
+    def stream():
+        version, snapshot = get_queue_snapshot()
+        current = _queue_schema.dump(_queue_payload(snapshot))
+        yield 'retry: 2000\n\n' + _sse_event('snapshot', {'version': version, **current})
+
+        deadline = time.monotonic() + QUEUE_EVENTS_MAX_AGE
+        while time.monotonic() < deadline:
+            if wait_for_state_change(version, QUEUE_EVENTS_KEEPALIVE) == version:
+                yield ': keepalive\n\n'
+                continue
+            version, snapshot = get_queue_snapshot()
+            previous, current = current, _queue_schema.dump(_queue_payload(snapshot))
+            delta = _queue_delta(previous, current)
+            if delta:
+                yield _sse_event('delta', {'version': version, **delta})
 
-        return {
-            'success': True,
-            'queued': queued,
-            'downloading': downloading,
-            'completed': completed,
-            'queue_size': len(queued),
-            'total_queue_size': len(queued) + len(downloading),
-        }
+    response = Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # don't let a reverse proxy hold events back
+    })
+    # Runs when the server closes the response, even if the client left before the first event
+    response.call_on_close(_queue_event_streams.release)
+    return response
 
 
 @bp.route('/history', methods=['DELETE'])
 @bp.response(200, HistoryResponseSchema)
 def clear_history():
-    with thread_lock:
-        download_history.clear()
-        completed_ids = [jid for jid, s in download_status.items() if s['status'] == 'completed']
-        for jid in completed_ids:
-            del download_status[jid]
+    database.delete_download_jobs('completed')
+    clear_completed_jobs()
     return {'status': 'ok'}
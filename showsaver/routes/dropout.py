@@ -2,29 +2,57 @@ from flask_smorest import Blueprint, abort
 
 from showsaver.processors import dropout
 from showsaver.schemas import (
-    EpisodeInfoQuerySchema, EpisodeInfoResponseSchema,
-    NewReleasesQuerySchema, NewReleasesResponseSchema
+    EpisodeInfoQuerySchema, EpisodeInfoResponseSchema, MetadataStatsResponseSchema,
+    NewReleasesQuerySchema, NewReleasesResponseSchema, ScrapeStatsResponseSchema
 )
+from showsaver.routes.caching import VersionedResponseCache
+from showsaver.jobs import get_metadata_stats
 
 bp = Blueprint('dropout', __name__, url_prefix='/dropout', description='Dropout metadata and releases')
 
+_new_releases_schema = NewReleasesResponseSchema()
+_new_releases_cache = VersionedResponseCache('new-releases')
+
 
 @bp.route('/new-releases', methods=['GET'])
 @bp.arguments(NewReleasesQuerySchema, location='query')
 @bp.response(200, NewReleasesResponseSchema)
+@bp.alt_response(304, description='Releases unchanged since the ETag in If-None-Match')
 @bp.alt_response(503)
 def new_releases(query_args):
+    """New releases, newest first.
+
+    While the scrape cache is fresh the serialized response is cached per version and
+    revalidated with ETag / If-None-Match.
+    """
     force_refresh = query_args.get('refresh', False)
-    result = dropout.get_new_releases(force_refresh=force_refresh)
+    incremental = not query_args.get('full', False)
 
-    if result['success']:
-        return {
-            'success': True,
-            'videos': result['videos'],
-            'count': len(result['videos']),
-            'cached': result.get('cached', False),
-        }
-    return abort(503, message=result.get('error', 'Failed to fetch new releases'))
+    version = None if force_refresh else dropout.get_new_releases_version()
+    if version is not None:
+        not_modified = _new_releases_cache.not_modified(version)
+        if not_modified:
+            return not_modified
+        body = _new_releases_cache.get(version)
+        if body is not None:
+            return _new_releases_cache.response(body, version)
+
+    result = dropout.get_new_releases(force_refresh=force_refresh, incremental=incremental)
+
+    if not result['success']:
+        return abort(503, message=result.get('error', 'Failed to fetch new releases'))
+
+    payload = {
+        'success': True,
+        'videos': result['videos'],
+        'count': len(result['videos']),
+        'cached': result.get('cached', False),
+    }
+    # Only cache a body built entirely at the version checked above; a scrape moves the version
+    if version is not None and dropout.get_new_releases_version() == version:
+        body = _new_releases_cache.put(version, _new_releases_schema.dump(payload))
+        return _new_releases_cache.response(body, version)
+    return payload
 
 
 @bp.route('/info', methods=['GET'])
@@ -40,3 +68,17 @@ def episode_info(query_args):
     if result.get('error') == 'not_yet_fetched':
         return {'success': False, 'message': 'not_yet_fetched', 'info': None}
     return abort(503, message=result.get('error', 'Failed to fetch episode info'))
+
+
+@bp.route('/metadata/stats', methods=['GET'])
+@bp.response(200, MetadataStatsResponseSchema)
+def metadata_stats():
+    """Background metadata queue depth and yt-dlp fetch latency (seconds)."""
+    return get_metadata_stats()
+
+
+@bp.route('/scrape/stats', methods=['GET'])
+@bp.response(200, ScrapeStatsResponseSchema)
+def scrape_stats():
+    """New-releases page fetches and how many were answered 304 Not Modified."""
+    return dropout.get_scrape_stats()
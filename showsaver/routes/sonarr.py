@@ -0,0 +1,13 @@
+from flask_smorest import Blueprint
+
+from showsaver.jobs import get_sonarr_status
+from showsaver.schemas import SonarrStatusResponseSchema
+
+bp = Blueprint('sonarr', __name__, url_prefix='/sonarr', description='Sonarr notifications')
+
+
+@bp.route('/status', methods=['GET'])
+@bp.response(200, SonarrStatusResponseSchema)
+def sonarr_status():
+    """Sonarr notifier status: commands sent and saved, retries and per-series state."""
+    return get_sonarr_status()
@@ -35,11 +35,18 @@ class JobStatusSchema(Schema):
     step = fields.Integer()
     step_type = fields.String()
     total_steps = fields.Integer()
+    extractions = fields.Integer()
+    placement_strategy = fields.String(allow_none=True)
+    placement_seconds = fields.Float(allow_none=True)
+    bytes_rewritten = fields.Integer(allow_none=True, metadata={'description': 'Bytes written by ffmpeg post-processing'})
+    ffmpeg_seconds = fields.Float(allow_none=True, metadata={'description': 'Wall time of ffmpeg post-processing'})
     started_at = fields.String(allow_none=True)
     completed_at = fields.String(allow_none=True)
     error = fields.String(allow_none=True)
     file_path = fields.String(allow_none=True)
     size = fields.Integer(allow_none=True)
+    stage = fields.String(metadata={'description': 'extract, download, postprocess, place or notify'})
+    stage_state = fields.String(metadata={'description': 'waiting or running'})
 
 
 class StatusResponseSchema(Schema):
@@ -47,6 +54,11 @@ class StatusResponseSchema(Schema):
     status = fields.Nested(JobStatusSchema)
 
 
+class StageBacklogSchema(Schema):
+    waiting = fields.Integer()
+    running = fields.Integer()
+
+
 class QueueResponseSchema(Schema):
     success = fields.Boolean()
     queued = fields.List(fields.Nested(JobStatusSchema))
@@ -54,6 +66,7 @@ class QueueResponseSchema(Schema):
     completed = fields.List(fields.Nested(JobStatusSchema))
     queue_size = fields.Integer()
     total_queue_size = fields.Integer()
+    stages = fields.Dict(keys=fields.String(), values=fields.Nested(StageBacklogSchema))
 
 
 # --- /history ---
@@ -74,6 +87,7 @@ class DropoutVideoSchema(Schema):
 
 class NewReleasesQuerySchema(Schema):
     refresh = fields.Boolean(required=False, load_default=False)
+    full = fields.Boolean(required=False, load_default=False)  # reprocess the whole page instead of stopping at known items
 
 
 class NewReleasesResponseSchema(Schema):
@@ -105,6 +119,53 @@ class EpisodeInfoResponseSchema(Schema):
     info = fields.Nested(DropoutEpisodeInfoSchema, allow_none=True)
 
 
+# --- /dropout/metadata/stats ---
+class MetadataStatsResponseSchema(Schema):
+    queue_depth = fields.Integer()
+    active = fields.Integer()
+    fetched = fields.Integer()
+    failed = fields.Integer()
+    last_latency = fields.Float(allow_none=True)
+    avg_latency = fields.Float(allow_none=True)
+    max_latency = fields.Float(allow_none=True)
+
+
+class ScrapeStatsResponseSchema(Schema):
+    requests = fields.Integer()
+    not_modified = fields.Integer()
+    not_modified_rate = fields.Float(allow_none=True)
+    last_parse_seconds = fields.Float(allow_none=True)
+
+
+# --- /sonarr/status ---
+class SonarrSeriesStatusSchema(Schema):
+    title = fields.String()
+    state = fields.String(metadata={'description': 'idle, waiting, rescanning, retrying or failed'})
+    rescans_requested = fields.Integer()
+    renames_requested = fields.Integer()
+    commands_sent = fields.Integer()
+    commands_saved = fields.Integer()
+    attempts = fields.Integer()
+    last_error = fields.String(allow_none=True)
+    last_sent_at = fields.Float(allow_none=True)
+
+
+class SonarrStatusResponseSchema(Schema):
+    enabled = fields.Boolean()
+    commands_requested = fields.Integer()
+    commands_sent = fields.Integer()
+    commands_saved = fields.Integer()
+    retries = fields.Integer()
+    failed = fields.Integer()
+    pending_series = fields.Integer()
+    queued_requests = fields.Integer()
+    pending_lookups = fields.Integer(metadata={'description': 'Requests waiting to retry the series lookup'})
+    last_error = fields.String(allow_none=True)
+    last_error_at = fields.Float(allow_none=True)
+    last_success_at = fields.Float(allow_none=True)
+    series = fields.Dict(keys=fields.String(), values=fields.Nested(SonarrSeriesStatusSchema))
+
+
 # --- /debug/memory ---
 class ErrorResponseSchema(Schema):
     error = fields.String()
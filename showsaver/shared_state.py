@@ -0,0 +1,171 @@
+"""
+Job state shared between processes through SQLite, for split deployments: one downloader process
+(python -m showsaver.workers) and any number of web processes with RUN_MODE=api.
+
+The downloader runs run_publisher(), which mirrors its in-memory state (showsaver.state) into the
+shared_state table and picks up the jobs, metadata requests and history clears the web processes
+write to the database. The web-side functions below match their showsaver.state counterparts;
+showsaver.jobs chooses between the two.
+"""
+import os
+import secrets
+import time
+
+from datetime import datetime
+from typing import Any
+
+from showsaver import database, notifier, state
+from showsaver.env import SHARED_STATE_POLL_INTERVAL
+from showsaver.state import METADATA_PRIORITY_BACKLOG
+
+QUEUE = 'queue'
+CLEAR_HISTORY = 'clear_history'
+
+# Versions restart from zero with the process, so shared versions and ETags carry a per-process tag
+PROCESS_TAG = f'{os.getpid():x}.{time.time_ns():x}'
+
+
+#
+# Downloader process
+#
+
+def publish_queue() -> None:
+    version, snapshot = state.get_queue_snapshot()
+    database.put_shared_state(QUEUE, f'{PROCESS_TAG}.{version}', {
+        **snapshot,
+        'metadata': state.get_metadata_stats(),
+        'sonarr': notifier.get_sonarr_status(),
+    })
+
+
+def ingest_requests(clear_history_version: str) -> str:
+    """Apply what the web processes wrote to the database. Returns the history clear version handled."""
+    picked_up = state.sync_jobs_from_database()
+    if picked_up:
+        print(f'Picked up {picked_up} queued download(s)')
+
+    for request in database.take_metadata_requests():
+        state.queue_metadata(request['url'], request['url_path'], request['priority'])
+
+    current = database.get_shared_state_version(CLEAR_HISTORY) or ''
+    if current != clear_history_version:
+        state.clear_completed_jobs()
+    return current
+
+
+def run_publisher() -> None:
+    """Keep the shared state in step with this process. Never returns."""
+    data_version = None
+    clear_history_version = database.get_shared_state_version(CLEAR_HISTORY) or ''
+    published = None
+    while True:
+        # data_version only moves when another connection commits, so an idle database costs one PRAGMA
+        current_data_version = database.get_data_version()
+        if current_data_version != data_version:
+            data_version = current_data_version
+            clear_history_version = ingest_requests(clear_history_version)
+
+        marker = (state.get_state_version(), state.get_metadata_stats(), notifier.get_sonarr_status())
+        if marker != published:
+            published = marker
+            publish_queue()
+
+        time.sleep(SHARED_STATE_POLL_INTERVAL)
+
+
+#
+# Web processes (RUN_MODE=api)
+#
+
+def _job_status_from_row(job: dict[str, Any]) -> dict[str, Any]:
+    job_status = state.create_job_status(job['id'], job['url'])
+    job_status.update({key: job[key] for key in ('status', 'queued_at', 'started_at', 'completed_at', 'error') if job[key]})
+    return job_status
+
+
+def _unpublished_state() -> tuple[str, dict[str, Any]]:
+    """
+    State as the job table has it, until the downloader publishes for the first time: active jobs
+    without progress, no history, and this process's (empty) metadata and Sonarr stats.
+    """
+    queued = [_job_status_from_row(job) for job in database.get_download_jobs('queued')]
+    downloading = [_job_status_from_row(job) for job in database.get_download_jobs('downloading')]
+    jobs = downloading + queued
+    version = f'unpublished.{len(jobs)}.{jobs[-1]["id"]}' if jobs else ''
+    return version, {
+        'queued': queued, 'downloading': downloading, 'completed': [],
+        'stages': state.stage_backlog(queued, downloading),
+        'metadata': state.get_metadata_stats(), 'sonarr': notifier.get_sonarr_status(),
+    }
+
+
+def _queue_state() -> tuple[str, dict[str, Any]]:
+    shared = database.get_shared_state(QUEUE)
+    if not shared or not shared['payload']:
+        return _unpublished_state()
+    return shared['version'], shared['payload']
+
+
+def get_state_version() -> str:
+    return database.get_shared_state_version(QUEUE) or _unpublished_state()[0]
+
+
+def wait_for_state_change(since_version: str, timeout: float) -> str:
+    deadline = time.monotonic() + timeout
+    while True:
+        version = get_state_version()
+        remaining = deadline - time.monotonic()
+        if version != since_version or remaining <= 0:
+            return version
+        time.sleep(min(SHARED_STATE_POLL_INTERVAL, remaining))
+
+
+def get_queue_snapshot() -> tuple[str, dict[str, Any]]:
+    version, payload = _queue_state()
+    return version, {
+        'queued': payload['queued'], 'downloading': payload['downloading'], 'completed': payload['completed'],
+        'stages': payload.get('stages', {}),
+    }
+
+
+def get_job_status(job_id: str) -> dict[str, Any] | None:
+    _, payload = _queue_state()
+    for job_status in payload['downloading'] + payload['queued'] + payload['completed']:
+        if job_status['id'] == job_id:
+            return job_status
+
+    # Not active or recent: fall back to the persisted row
+    job = database.get_download_job(job_id)
+    if not job:
+        return None
+    return _job_status_from_row(job)
+
+
+def queue_url(url: str) -> str:
+    job_id = f'{int(time.time())}_{secrets.token_hex(4)}'
+    if not database.insert_download_job_if_new(job_id, url, datetime.now().isoformat()):
+        return ''
+    return job_id
+
+
+def count_jobs(status: str) -> int:
+    return database.count_download_jobs(status)
+
+
+def clear_completed_jobs() -> None:
+    """Ask the downloader process to forget completed jobs; their rows are deleted by the caller."""
+    database.put_shared_state(CLEAR_HISTORY, str(time.time_ns()), None)
+
+
+def queue_metadata(url: str, url_path: str, priority: int=METADATA_PRIORITY_BACKLOG) -> None:
+    database.request_metadata(url, url_path, priority)
+
+
+def get_metadata_stats() -> dict[str, Any]:
+    _, payload = _queue_state()
+    return payload['metadata']
+
+
+def get_sonarr_status() -> dict[str, Any]:
+    _, payload = _queue_state()
+    return payload.get('sonarr', {})
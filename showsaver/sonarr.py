@@ -1,6 +1,10 @@
 import requests
+import threading
 import time
-from showsaver.env import SONARR_URL, SONARR_API_KEY
+
+from dataclasses import dataclass, field
+
+from showsaver.env import SONARR_URL, SONARR_API_KEY, SONARR_SERIES_CACHE_TTL
 
 
 def is_sonarr_enabled() -> bool:
@@ -16,21 +20,79 @@ def _get_headers() -> dict[str, str]:
     }
 
 
+# Every Sonarr call goes through one pooled session
+_session = requests.Session()
+_session.headers.update(_get_headers())
+
+
 def get_all_series():
     """Fetch all series from Sonarr library."""
     url = f"{SONARR_URL.rstrip('/')}/api/v3/series"
-    response = requests.get(url, headers=_get_headers(), timeout=10)
+    response = _session.get(url, timeout=10)
     response.raise_for_status()
     return response.json()
 
 
+@dataclass
+class SeriesIndex:
+    """Lookup structures built from one fetch of the Sonarr library."""
+    by_title: dict[str, int]                  # lowercased title -> id; the first series wins on duplicates
+    titles: list[tuple[str, int]]             # (lowercased title, id) in library order, for substring matches
+    built_at: float
+    _substring_hits: dict[str, int | None] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, series_list: list[dict]) -> 'SeriesIndex':
+        titles = [(series.get("title", "").lower(), series.get("id")) for series in series_list]
+        by_title: dict[str, int] = {}
+        for title, series_id in titles:
+            by_title.setdefault(title, series_id)
+        return cls(by_title, titles, time.monotonic())
+
+    def find(self, search_name: str, show_name: str) -> int | None:
+        # Case-insensitive search
+        search_name_lower = search_name.lower()
+        if search_name_lower in self.by_title:
+            return self.by_title[search_name_lower]
+
+        # If override was applied but not found, try original name
+        show_name_lower = show_name.lower()
+        if show_name_lower in self.by_title:
+            return self.by_title[show_name_lower]
+
+        # Try partial name search
+        if search_name_lower not in self._substring_hits:
+            self._substring_hits[search_name_lower] = next(
+                (series_id for title, series_id in self.titles if search_name_lower in title), None
+            )
+        return self._substring_hits[search_name_lower]
+
+
+_series_index: SeriesIndex | None = None
+_series_index_lock = threading.Lock()
+
+
+def _get_series_index(stale: SeriesIndex | None=None) -> tuple[SeriesIndex, bool]:
+    """Return (index, fetched) - fetching the library if expired, or if it is still the given stale index."""
+    global _series_index
+    with _series_index_lock:
+        index = _series_index
+        if index is None or index is stale or time.monotonic() - index.built_at > SONARR_SERIES_CACHE_TTL:
+            index = _series_index = SeriesIndex.build(get_all_series())
+            return index, True
+        return index, False
+
+
 def find_series_by_name(show_name: str, override_name: str|None=None) -> int | None:
     """
     Find a series ID in Sonarr by show name.
 
+    Lookups use a cached index of the library, refreshed after SONARR_SERIES_CACHE_TTL
+    or when a name isn't found (e.g. a series added since the last fetch).
+
     Args:
         show_name: The show name from yt-dlp metadata
-        overrides: Dict of show name overrides (original -> corrected)
+        override_name: Corrected show name to try first
 
     Returns:
         Series ID if found, None otherwise
@@ -40,28 +102,13 @@ def find_series_by_name(show_name: str, override_name: str|None=None) -> int | N
         # Apply override if present
         search_name = override_name
 
-
-    series_list = get_all_series()
-
-    # Case-insensitive search
-    search_name_lower = search_name.lower()
-    for series in series_list:
-        if series.get("title", "").lower() == search_name_lower:
-            return series.get("id")
-
-    # If override was applied but not found, try original name
-    if show_name != search_name:
-        show_name_lower = show_name.lower()
-        for series in series_list:
-            if series.get("title", "").lower() == show_name_lower:
-                return series.get("id")
-            
-    # Try partial name search
-    for series in series_list:
-        if search_name_lower in series.get("title", "").lower():
-            return series.get("id")
-
-    return None
+    index, fetched = _get_series_index()
+    series_id = index.find(search_name, show_name)
+    if series_id is None and not fetched:
+        # Refresh once on a miss; another thread may already have done it
+        index, _ = _get_series_index(stale=index)
+        series_id = index.find(search_name, show_name)
+    return series_id
 
 
 def rescan_series(series_id: int):
@@ -79,7 +126,7 @@ def rescan_series(series_id: int):
         "name": "RescanSeries",
         "seriesId": series_id
     }
-    response = requests.post(url, headers=_get_headers(), json=payload, timeout=30)
+    response = _session.post(url, json=payload, timeout=30)
     response.raise_for_status()
     return response.json()
 
@@ -99,65 +146,17 @@ def rename_series(series_ids):
         "name": "RenameSeries",
         "seriesIds": series_ids
     }
-    response = requests.post(url, headers=_get_headers(), json=payload, timeout=30)
+    response = _session.post(url, json=payload, timeout=30)
     response.raise_for_status()
     return response.json()
 
 
-def wait_for_command(command_id, timeout: int=30, poll_interval: int=3):
-    """
-    Poll /api/v3/command/{id} until Sonarr reports a terminal status.
+TERMINAL_COMMAND_STATUSES = {'completed', 'failed', 'aborted'}
 
-    Args:
-        command_id: The command ID returned by a previous POST to /api/v3/command
-        timeout: Maximum seconds to wait (default 120)
-        poll_interval: Seconds between polls (default 3)
 
-    Returns:
-        Final status string, e.g. 'completed', 'failed', 'aborted'
-    """
+def get_command_status(command_id) -> str:
+    """Current status of a command previously POSTed to /api/v3/command, e.g. 'started' or 'completed'."""
     url = f"{SONARR_URL.rstrip('/')}/api/v3/command/{command_id}"
-    terminal = {'completed', 'failed', 'aborted'}
-    deadline = time.monotonic() + timeout
-    while time.monotonic() < deadline:
-        response = requests.get(url, headers=_get_headers(), timeout=10)
-        response.raise_for_status()
-        status = response.json().get('status', '')
-        if status in terminal:
-            return status
-        time.sleep(poll_interval)
-    return 'timeout'
-
-
-def refresh_and_rescan_series(show_name: str, override_name: str|None=None, do_rename: bool=False) -> bool:
-    """
-    Main entry point: find series and trigger rescan.
-
-    Args:
-        show_name: The show name from yt-dlp metadata
-        override_name: Potential overriden name of show
-
-    Returns:
-        True if rescan was triggered, False otherwise
-    """
-    if not is_sonarr_enabled():
-        return False
-
-    series_id = find_series_by_name(show_name, override_name)
-
-    if series_id is None:
-        print(f"Sonarr: Series '{show_name}' not found in library")
-        return False
-
-    rescan_ret = rescan_series(series_id)
-    command_id = rescan_ret.get('id')
-    print(f"Sonarr: Triggered rescan for series '{show_name}' (ID: {series_id})")
-
-    if command_id and do_rename:
-        final_status = wait_for_command(command_id)
-        print(f"Sonarr: Rescan finished with status '{final_status}' for '{show_name}'")
-
-    if do_rename:
-        rename_series([series_id])
-        print(f"Sonarr: Triggered rename for series '{show_name}' (ID: {series_id})")
-    return True
+    response = _session.get(url, timeout=10)
+    response.raise_for_status()
+    return response.json().get('status', '')
@@ -0,0 +1,56 @@
+import time
+
+from yt_dlp.postprocessor.sponsorblock import SponsorBlockPP
+from yt_dlp.utils import PostProcessingError
+
+from showsaver import database
+from showsaver.env import (
+    SPONSORBLOCK_API, SPONSORBLOCK_CACHE_TTL, SPONSORBLOCK_NEGATIVE_TTL, SPONSORBLOCK_OFFLINE
+)
+
+
+class CachedSponsorBlockPP(SponsorBlockPP):
+    """
+    SponsorBlockPP that keeps the segments it looks up in SQLite, keyed by video id.
+
+    Found segments are reused for SPONSORBLOCK_CACHE_TTL, an empty answer for SPONSORBLOCK_NEGATIVE_TTL
+    (segments are usually submitted in the days after a release). When the API fails, stale segments
+    are used if there are any, otherwise none, so a SponsorBlock outage never fails a download.
+    With offline set the API is never called.
+    """
+
+    def __init__(self, downloader=None, categories=None, api=SPONSORBLOCK_API,
+                 cache_ttl: float=SPONSORBLOCK_CACHE_TTL, negative_ttl: float=SPONSORBLOCK_NEGATIVE_TTL,
+                 offline: bool=SPONSORBLOCK_OFFLINE):
+        super().__init__(downloader, categories, api)
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.offline = offline
+
+    def _is_fresh(self, cached: dict) -> bool:
+        if set(cached['categories']) != set(self._categories):
+            return False
+        ttl = self.cache_ttl if cached['segments'] else self.negative_ttl
+        return time.time() - cached['fetched_at'] < ttl
+
+    def _requested(self, segments: list[dict]) -> list[dict]:
+        """Cached segments may have been fetched for other categories."""
+        return [segment for segment in segments if segment['category'] in self._categories]
+
+    def _get_sponsor_segments(self, video_id, service):
+        cached = database.get_sponsorblock_segments(video_id, service)
+        if cached and (self.offline or self._is_fresh(cached)):
+            self.write_debug(f'Using cached SponsorBlock segments for {video_id}')
+            return self._requested(cached['segments'])
+        if self.offline:
+            self.to_screen(f'Offline mode: no cached SponsorBlock segments for {video_id}, skipping')
+            return []
+
+        try:
+            segments = super()._get_sponsor_segments(video_id, service)
+        except PostProcessingError as e:
+            self.report_warning(f'{e}; {"using stale cached" if cached else "continuing without"} segments')
+            return self._requested(cached['segments']) if cached else []
+
+        database.upsert_sponsorblock_segments(video_id, service, list(self._categories), segments)
+        return segments
@@ -1,22 +1,127 @@
+import itertools
 import queue
 import threading
 import time
 
+from collections import Counter
 from datetime import datetime
 from typing import Any
 
+from showsaver import database
+from showsaver.env import PROGRESS_UPDATE_RATE
+from showsaver.pipeline import DOWNLOAD, EXTRACT, STAGES
+from showsaver.progress import ProgressPublisher
+
 download_queue: queue.Queue = queue.Queue()
 download_status: dict[str, Any] = {}
 download_history: list[dict] = []
 
-metadata_queue: queue.Queue = queue.Queue()
-metadata_in_flight: set[str] = set()   # keyed by url_path; guarded by thread_lock
+# Items are (priority, seq, {'url_path', 'url'}); lower priority values are served first
+metadata_queue: queue.PriorityQueue = queue.PriorityQueue()
+# url_path -> priority it is queued at, or METADATA_RUNNING once a worker has it; guarded by thread_lock
+metadata_in_flight: dict[str, int] = {}
+metadata_stats: dict[str, Any] = {
+    'fetched': 0,
+    'failed': 0,
+    'last_latency': None,
+    'avg_latency': None,
+    'max_latency': None,
+}
+
+HISTORY_SIZE = 10   # completed jobs shown, and reloaded on startup
+
+METADATA_RUNNING = -1
+METADATA_PRIORITY_VISIBLE = 0   # shown in the UI right now
+METADATA_PRIORITY_BACKLOG = 1
+_metadata_seq = itertools.count()
 
 thread_lock = threading.Lock()
+# Notified whenever download_status or download_history changes; shares thread_lock
+state_changed = threading.Condition(thread_lock)
+_state_version = 0
+
+# Derived from download_status and kept in step by the helpers below; guarded by thread_lock
+_url_index: dict[str, str] = {}        # url -> id of its job, for every job that has not failed
+_status_counts: Counter[str] = Counter()
+_job_counter = itertools.count()
+
+
+def _bump_state_version() -> None:
+    """Must be called with thread_lock held, after mutating download_status or download_history."""
+    global _state_version
+    _state_version += 1
+    state_changed.notify_all()
+
+
+def _progress_changed() -> None:
+    with thread_lock:
+        _bump_state_version()
+
+
+# Progress of downloading jobs lives here rather than in download_status, so progress hooks never
+# take thread_lock; it is merged into job copies on read and folded back in when a job finishes.
+job_progress = ProgressPublisher(1 / PROGRESS_UPDATE_RATE, _progress_changed)
+
+
+def _with_progress(job_status: dict[str, Any]) -> dict[str, Any]:
+    """Copy of a job's status including its latest published progress."""
+    job_copy = job_status.copy()
+    progress = job_progress.get(job_status['id'])
+    if progress:
+        job_copy.update(progress.as_fields())
+    return job_copy
+
+
+def get_state_version() -> int:
+    return _state_version
+
+
+def wait_for_state_change(since_version: int, timeout: float) -> int:
+    """Block until the state version moves past since_version or timeout elapses. Returns the current version."""
+    with thread_lock:
+        state_changed.wait_for(lambda: _state_version != since_version, timeout)
+        return _state_version
+
+
+def get_queue_snapshot() -> tuple[int, dict[str, Any]]:
+    """The active jobs and recent history, with the state version they were taken at."""
+    with thread_lock:
+        queued = []
+        downloading = []
+        for job_status in download_status.values():
+            if job_status['status'] == 'queued':
+                queued.append(job_status.copy())
+            elif job_status['status'] == 'downloading':
+                downloading.append(_with_progress(job_status))
+        completed = [job_status.copy() for job_status in download_history[-HISTORY_SIZE:]]
+        return _state_version, {
+            'queued': queued, 'downloading': downloading, 'completed': completed, 'stages': stage_backlog(queued, downloading),
+        }
+
+
+def stage_backlog(queued: list[dict], downloading: list[dict]) -> dict[str, dict[str, int]]:
+    """Jobs waiting for and running in each stage. Queued jobs are the extract stage's backlog."""
+    stages = {stage: {'waiting': 0, 'running': 0} for stage in STAGES}
+    stages[EXTRACT]['waiting'] = len(queued)
+    for job_status in downloading:
+        stage = job_status.get('stage')
+        if stage in stages:
+            stages[stage][job_status.get('stage_state', 'running')] += 1
+    return stages
+
+
+def get_job_status(job_id: str) -> dict[str, Any] | None:
+    with thread_lock:
+        job_status = download_status.get(job_id)
+        return _with_progress(job_status) if job_status else None
 
 
 def generate_job_id() -> str:
-    return f"{int(time.time())}_{len(download_status)}"
+    """Must be called with thread_lock held."""
+    while True:
+        job_id = f"{int(time.time())}_{next(_job_counter)}"
+        if job_id not in download_status:
+            return job_id
 
 
 def create_job_status(job_id: str, url: str) -> dict[str, Any]:
@@ -30,26 +135,202 @@ def create_job_status(job_id: str, url: str) -> dict[str, Any]:
         'step': 0,
         'step_type': '',
         'total_steps': 0,
+        'extractions': 0,
     }
 
 
-def queue_url(url: str) -> str:
-    for job_status in download_status.values():
-        if url == job_status.get('url', '') and job_status.get('status', '') != 'failed':
-            return ''
+def _add_job(job_status: dict[str, Any]) -> None:
+    """Must be called with thread_lock held."""
+    download_status[job_status['id']] = job_status
+    _status_counts[job_status['status']] += 1
+    if job_status['status'] != 'failed':
+        _url_index[job_status['url']] = job_status['id']
+    _bump_state_version()
+
+
+def _unindex_job(job_status: dict[str, Any]) -> None:
+    """Must be called with thread_lock held."""
+    if _url_index.get(job_status['url']) == job_status['id']:
+        del _url_index[job_status['url']]
 
-    job_id = generate_job_id()
-    job_status = create_job_status(job_id, url)
 
+def set_job_status(job_id: str, status: str, record_history: bool=False, **fields) -> None:
+    """Transition a job to a new status, optionally appending it to the history in the same step."""
+    # Any updates to data here must be reflected to JobStatusSchema
     with thread_lock:
-        download_status[job_id] = job_status.copy()
+        job_status = download_status[job_id]
+        _status_counts[job_status['status']] -= 1
+        _status_counts[status] += 1
+        job_status['status'] = status
+        if status != 'downloading':
+            progress = job_progress.pop(job_id)
+            if progress:
+                job_status.update(progress.as_fields())
+        job_status.update(fields)
+        if status == 'failed':
+            _unindex_job(job_status)
+        if record_history:
+            download_history.append(job_status.copy())
+        _bump_state_version()
+
 
+def update_job(job_id: str, **fields) -> None:
+    """Merge non-status fields into a job's status."""
+    with thread_lock:
+        download_status[job_id].update(fields)
+        _bump_state_version()
+
+
+def set_job_stage(job_id: str, stage: str, stage_state: str) -> None:
+    """Record the stage a downloading job is in, and whether it is 'waiting' for a worker there or 'running'."""
+    with thread_lock:
+        job_status = download_status[job_id]
+        if stage != DOWNLOAD:
+            # Download progress is final once the job moves on
+            progress = job_progress.pop(job_id)
+            if progress:
+                job_status.update(progress.as_fields())
+        job_status['stage'] = stage
+        job_status['stage_state'] = stage_state
+        _bump_state_version()
+
+
+def remove_job(job_id: str) -> None:
+    with thread_lock:
+        job_status = download_status.pop(job_id, None)
+        job_progress.pop(job_id)
+        if job_status:
+            _status_counts[job_status['status']] -= 1
+            _unindex_job(job_status)
+            _bump_state_version()
+
+
+def clear_completed_jobs() -> None:
+    """Forget completed jobs, so their URLs can be queued again."""
+    with thread_lock:
+        download_history.clear()
+        for job_id in [jid for jid, s in download_status.items() if s['status'] == 'completed']:
+            _unindex_job(download_status.pop(job_id))
+        # Jobs restored as completed on startup are only indexed, not in download_status
+        for url in [url for url, jid in _url_index.items() if jid not in download_status]:
+            del _url_index[url]
+        _status_counts['completed'] = 0
+        _bump_state_version()
+
+
+def count_jobs(status: str) -> int:
+    with thread_lock:
+        return _status_counts[status]
+
+
+def queue_url(url: str) -> str:
+    # Download workers re-queue expanded playlist entries concurrently, so the duplicate
+    # check and the insert must happen under the same lock.
+    with thread_lock:
+        if url in _url_index:
+            return ''
+
+        job_id = generate_job_id()
+        job_status = create_job_status(job_id, url)
+        _add_job(job_status)
+
+    # Persist before handing the job to a worker, so it survives a restart
+    database.insert_download_job(job_id, url, job_status['queued_at'])
     download_queue.put({'id': job_id, 'url': url})
     return job_id
 
 
-def queue_metadata(url: str, url_path: str):
+def restore_jobs() -> int:
+    """
+    Reload persisted jobs on startup. Jobs that were downloading when the process stopped are
+    queued again; the latest completed jobs repopulate the history, and every completed URL stays a
+    duplicate until the history is cleared. Returns the number of jobs queued.
+    """
+    interrupted = database.requeue_interrupted_download_jobs()
+    if interrupted:
+        print(f'Re-queued {interrupted} interrupted download(s)')
+    database.delete_download_jobs('failed')
+
+    queued_jobs = database.get_download_jobs('queued')
+    completed_urls = database.get_download_job_urls('completed')
+    with thread_lock:
+        _url_index.update(completed_urls)
+        for job in database.get_download_jobs('completed', limit=HISTORY_SIZE):
+            job_status = create_job_status(job['id'], job['url'])
+            job_status.update({
+                'status': 'completed',
+                'queued_at': job['queued_at'],
+                'started_at': job['started_at'],
+                'completed_at': job['completed_at'],
+                'file_path': '',
+                'size': 0,
+            })
+            download_history.append(job_status)
+        _bump_state_version()
+
+        for job in queued_jobs:
+            job_status = create_job_status(job['id'], job['url'])
+            job_status['queued_at'] = job['queued_at']
+            _add_job(job_status)
+
+    for job in queued_jobs:
+        download_queue.put({'id': job['id'], 'url': job['url']})
+    return len(queued_jobs)
+
+
+def sync_jobs_from_database() -> int:
+    """Pick up jobs that other processes queued in the database. Returns the number picked up."""
+    queued_jobs = database.get_download_jobs('queued')
+    with thread_lock:
+        new_jobs = [job for job in queued_jobs if job['id'] not in download_status]
+        for job in new_jobs:
+            job_status = create_job_status(job['id'], job['url'])
+            job_status['queued_at'] = job['queued_at']
+            _add_job(job_status)
+
+    for job in new_jobs:
+        download_queue.put({'id': job['id'], 'url': job['url']})
+    return len(new_jobs)
+
+
+def queue_metadata(url: str, url_path: str, priority: int=METADATA_PRIORITY_BACKLOG):
+    """Queue a metadata fetch, or bump an already queued one to a more urgent priority."""
+    with thread_lock:
+        current = metadata_in_flight.get(url_path)
+        if current is not None and current <= priority:
+            return
+        metadata_in_flight[url_path] = priority
+        metadata_queue.put((priority, next(_metadata_seq), {'url_path': url_path, 'url': url}))
+
+
+def start_metadata_fetch(url_path: str, priority: int) -> bool:
+    """
+    Mark a dequeued item as running. Returns False for a stale entry left behind when the
+    item was re-queued at a more urgent priority.
+    """
+    with thread_lock:
+        if metadata_in_flight.get(url_path) != priority:
+            return False
+        metadata_in_flight[url_path] = METADATA_RUNNING
+        return True
+
+
+def finish_metadata_fetch(url_path: str, latency: float, succeeded: bool) -> None:
+    with thread_lock:
+        metadata_in_flight.pop(url_path, None)
+        metadata_stats['fetched' if succeeded else 'failed'] += 1
+        count = metadata_stats['fetched'] + metadata_stats['failed']
+        avg = metadata_stats['avg_latency'] or 0.0
+        metadata_stats['avg_latency'] = avg + (latency - avg) / count
+        metadata_stats['last_latency'] = latency
+        metadata_stats['max_latency'] = max(metadata_stats['max_latency'] or 0.0, latency)
+
+
+def get_metadata_stats() -> dict[str, Any]:
     with thread_lock:
-        if url_path not in metadata_in_flight:
-            metadata_in_flight.add(url_path)
-            metadata_queue.put({'url_path': url_path, 'url': url})
+        running = sum(1 for p in metadata_in_flight.values() if p == METADATA_RUNNING)
+        return {
+            **metadata_stats,
+            'queue_depth': len(metadata_in_flight) - running,
+            'active': running,
+        }
@@ -87,6 +87,21 @@ function formatStepType(stepType) {
     return labels[stepType] || 'Downloading';
 }
 
+// Label for a downloading job that has moved past the download stage, or '' while it downloads
+function formatStage(item) {
+    if (item.stage === 'download' && item.stage_state !== 'waiting') return '';
+    const labels = {
+        'extract': 'Fetching metadata',
+        'download': 'Download',
+        'postprocess': 'Post-processing',
+        'place': 'Copying to library',
+        'notify': 'Notifying Sonarr'
+    };
+    const label = labels[item.stage];
+    if (!label) return '';
+    return item.stage_state === 'waiting' ? `Waiting: ${label}` : label;
+}
+
 function formatBytes(bytes) {
     if (!bytes || bytes <= 0) return '';
     const units = ['B', 'KB', 'MB', 'GB', 'TB'];
@@ -137,7 +152,8 @@ function renderQueueItems(allItems) {
                 formatEta(item.eta) ? `ETA ${formatEta(item.eta)}` : ''
             ].filter(Boolean).join(' • ');
 
-            queueItem.appendChild(makeElement('div', 'queue-item-step', `Step ${step}/${totalSteps}: ${stepLabel}`));
+            const stageLabel = formatStage(item);
+            queueItem.appendChild(makeElement('div', 'queue-item-step', stageLabel || `Step ${step}/${totalSteps}: ${stepLabel}`));
             progressBar.style.width = `${clampPercent(item.progress)}%`;
             progress.appendChild(progressBar);
             queueItem.appendChild(progress);
@@ -150,74 +166,160 @@ function renderQueueItems(allItems) {
     clearAndAppend(panelQueueList, ...queueItems);
 }
 
-// Poll for queue status
+// Latest known queue state: {queued, downloading, completed}, from /queue or the event stream
+let queueData = null;
+
+function renderQueue() {
+    if (!queueData) return;
+    const data = queueData;
+
+    const allItems = [
+        ...data.downloading.map(d => ({...d, displayStatus: 'downloading'})),
+        ...data.queued.map(q => ({...q, displayStatus: 'queued'})),
+        ...[...data.completed].reverse().map(c => ({...c, displayStatus: 'completed'}))
+    ];
+
+    if (pendingJob) {
+        if (pendingJob.id === null) {
+            // Still waiting for server response — always show pending
+            allItems.unshift({ ...pendingJob, displayStatus: 'pending', status: 'pending' });
+        } else {
+            const knownIds = new Set([
+                ...data.downloading.map(d => d.id),
+                ...data.queued.map(q => q.id),
+                ...data.completed.map(c => c.id)
+            ]);
+            if (knownIds.has(pendingJob.id)) {
+                pendingJob = null;
+            } else {
+                allItems.unshift({ ...pendingJob, displayStatus: 'pending', status: 'pending' });
+            }
+        }
+    }
+
+    clearHistoryBtn.style.display = data.completed.length > 0 ? 'block' : 'none';
+
+    renderQueueItems(allItems);
+
+    const activeCount = data.downloading.length + data.queued.length;
+    if (activeCount > 0) {
+        activityBadge.textContent = activeCount;
+        activityBadge.classList.remove('hidden');
+    } else {
+        activityBadge.classList.add('hidden');
+    }
+
+    if (data.downloading.length > 0) {
+        const avg = data.downloading.reduce((sum, d) => sum + (d.progress || 0), 0) / data.downloading.length;
+        progressRingFill.style.strokeDashoffset = RING_CIRCUMFERENCE * (1 - avg / 100);
+    } else {
+        progressRingFill.style.strokeDashoffset = RING_CIRCUMFERENCE;
+    }
+
+    const currentIds = new Set(data.downloading.map(d => d.id));
+    if ([...currentIds].some(id => !prevDownloadingIds.has(id))) {
+        openPanel();
+    }
+    prevDownloadingIds = currentIds;
+}
+
+function setConnectionLost(lost) {
+    if (lost === connectionLost) return;
+    connectionLost = lost;
+    connectionToast.classList.toggle('show', lost);
+}
+
+// Poll for queue status; used when the event stream is unavailable
 async function updateQueueStatus() {
     try {
         const response = await fetch('/queue');
         const data = await response.json();
 
-        if (connectionLost) {
-            connectionLost = false;
-            connectionToast.classList.remove('show');
-        }
+        setConnectionLost(false);
 
         if (data.success) {
-            const allItems = [
-                ...data.downloading.map(d => ({...d, displayStatus: 'downloading'})),
-                ...data.queued.map(q => ({...q, displayStatus: 'queued'})),
-                ...[...data.completed].reverse().map(c => ({...c, displayStatus: 'completed'}))
-            ];
-
-            if (pendingJob) {
-                if (pendingJob.id === null) {
-                    // Still waiting for server response — always show pending
-                    allItems.unshift({ ...pendingJob, displayStatus: 'pending', status: 'pending' });
-                } else {
-                    const knownIds = new Set([
-                        ...data.downloading.map(d => d.id),
-                        ...data.queued.map(q => q.id),
-                        ...data.completed.map(c => c.id)
-                    ]);
-                    if (knownIds.has(pendingJob.id)) {
-                        pendingJob = null;
-                    } else {
-                        allItems.unshift({ ...pendingJob, displayStatus: 'pending', status: 'pending' });
-                    }
-                }
-            }
+            queueData = data;
+            renderQueue();
+        }
+    } catch (error) {
+        console.error('Failed to update queue status:', error);
+        setConnectionLost(true);
+    }
+}
 
-            clearHistoryBtn.style.display = data.completed.length > 0 ? 'block' : 'none';
+// Active jobs keyed by id, in queue order; the event stream's deltas are applied here
+let queueJobs = new Map();
 
-            renderQueueItems(allItems);
+function rebuildQueueData(completed) {
+    const jobs = [...queueJobs.values()];
+    queueData = {
+        queued: jobs.filter(job => job.status === 'queued'),
+        downloading: jobs.filter(job => job.status === 'downloading'),
+        completed
+    };
+}
 
-            const activeCount = data.downloading.length + data.queued.length;
-            if (activeCount > 0) {
-                activityBadge.textContent = activeCount;
-                activityBadge.classList.remove('hidden');
-            } else {
-                activityBadge.classList.add('hidden');
-            }
+function applyQueueSnapshot(snapshot) {
+    queueJobs = new Map([...snapshot.downloading, ...snapshot.queued].map(job => [job.id, job]));
+    rebuildQueueData(snapshot.completed);
+}
 
-            if (data.downloading.length > 0) {
-                const avg = data.downloading.reduce((sum, d) => sum + (d.progress || 0), 0) / data.downloading.length;
-                progressRingFill.style.strokeDashoffset = RING_CIRCUMFERENCE * (1 - avg / 100);
-            } else {
-                progressRingFill.style.strokeDashoffset = RING_CIRCUMFERENCE;
-            }
+function applyQueueDelta(delta) {
+    for (const job of delta.changed || []) {
+        queueJobs.set(job.id, { ...(queueJobs.get(job.id) || {}), ...job });
+    }
+    for (const id of delta.removed || []) {
+        queueJobs.delete(id);
+    }
+    rebuildQueueData(delta.completed || queueData.completed);
+}
 
-            const currentIds = new Set(data.downloading.map(d => d.id));
-            if ([...currentIds].some(id => !prevDownloadingIds.has(id))) {
-                openPanel();
-            }
-            prevDownloadingIds = currentIds;
-        }
-    } catch (error) {
-        console.error('Failed to update queue status:', error);
-        if (!connectionLost) {
-            connectionLost = true;
-            connectionToast.classList.add('show');
-        }
+const QUEUE_POLL_INTERVAL = 1000;
+const QUEUE_STREAM_RETRY = 15000;
+let queuePollTimer = null;
+let queueEvents = null;
+
+function startQueuePolling() {
+    if (queuePollTimer) return;
+    queuePollTimer = setInterval(updateQueueStatus, QUEUE_POLL_INTERVAL);
+    updateQueueStatus();
+}
+
+function stopQueuePolling() {
+    clearInterval(queuePollTimer);
+    queuePollTimer = null;
+}
+
+// Prefer pushed updates from /queue/events; fall back to polling /queue while the stream is down
+function connectQueueEvents() {
+    if (!window.EventSource) {
+        startQueuePolling();
+        return;
     }
+
+    queueEvents = new EventSource('/queue/events');
+
+    queueEvents.addEventListener('snapshot', (event) => {
+        stopQueuePolling();
+        setConnectionLost(false);
+        applyQueueSnapshot(JSON.parse(event.data));
+        renderQueue();
+    });
+
+    queueEvents.addEventListener('delta', (event) => {
+        if (!queueData) return;
+        applyQueueDelta(JSON.parse(event.data));
+        renderQueue();
+    });
+
+    queueEvents.onerror = () => {
+        // Streams are closed by the server periodically and EventSource reconnects on its own;
+        // only fall back to polling when that reconnect fails.
+        if (queueEvents.readyState !== EventSource.CLOSED) return;
+        queueEvents = null;
+        startQueuePolling();
+        setTimeout(connectQueueEvents, QUEUE_STREAM_RETRY);
+    };
 }
 
 form.addEventListener('submit', async (e) => {
@@ -235,6 +337,7 @@ form.addEventListener('submit', async (e) => {
     // Open panel immediately with a pending entry before the server responds
     pendingJob = { id: null, url: text };
     openPanel();
+    renderQueue();
 
     try {
         const response = await fetch('/submit', {
@@ -259,12 +362,14 @@ form.addEventListener('submit', async (e) => {
     } finally {
         submitBtn.disabled = false;
         submitBtn.classList.remove('loading');
+        // The job may already have arrived through the event stream
+        renderQueue();
     }
 });
 
 clearHistoryBtn.addEventListener('click', async () => {
     await fetch('/history', { method: 'DELETE' });
-    updateQueueStatus();
+    if (queuePollTimer) updateQueueStatus();
 });
 
 clearBtn.addEventListener('click', () => {
@@ -272,9 +377,9 @@ clearBtn.addEventListener('click', () => {
     textInput.focus();
 });
 
-// Update queue status every 1 second
-setInterval(updateQueueStatus, 1000);
-updateQueueStatus(); // Initial load
+// Initial load, then pushed updates (or polling every second as a fallback)
+updateQueueStatus();
+connectQueueEvents();
 
 // Dropout New Releases Panel
 const releasesGrid = document.getElementById('releasesGrid');
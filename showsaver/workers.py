@@ -0,0 +1,242 @@
+import os
+import queue
+import threading
+import time
+import yt_dlp.version
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import urlparse
+
+from showsaver import database
+from showsaver import downloader
+from showsaver import notifier
+from showsaver import pipeline
+from showsaver import shared_state
+from showsaver import ytdl_pool
+from showsaver.env import (
+    CONFIG_DIR, SHOW_DIR, DOWNLOAD_WORKERS, EXTRACT_WORKERS, METADATA_RATE_LIMIT, METADATA_WORKERS,
+    PLACE_WORKERS, POSTPROCESS_WORKERS, STAGE_QUEUE_SIZE, URL
+)
+from showsaver.processors import dropout
+from showsaver.ratelimit import HostRateLimiter
+from showsaver.sonarr import is_sonarr_enabled
+from showsaver.state import (
+    download_queue, job_progress, queue_url, restore_jobs,
+    set_job_stage, set_job_status, update_job, remove_job, metadata_queue, start_metadata_fetch, finish_metadata_fetch
+)
+
+URL_LIST_FILE_PATH = os.path.join(CONFIG_DIR, 'urls.txt')
+
+
+@dataclass
+class _Job:
+    id: str
+    episode: downloader.Episode
+
+
+def _fail_job(job_id: str, e: Exception) -> None:
+    print(str(e))
+    completed_at = datetime.now().isoformat()
+    database.finish_download_job(job_id, 'failed', completed_at, str(e))
+    set_job_status(job_id, 'failed', error=str(e), completed_at=completed_at)
+
+
+def _run_stage(job: _Job, stage: str, work: Callable[[], None]) -> _Job | None:
+    set_job_stage(job.id, stage, 'running')
+    try:
+        work()
+    except Exception as e:
+        _fail_job(job.id, e)
+        return None
+    return job
+
+
+def _status_updater(job_id: str) -> Callable[..., None]:
+    def update_status(**fields) -> None:
+        update_job(job_id, **fields)
+    return update_status
+
+
+def extract_job(item: dict | None) -> _Job | None:
+    """Extract stage: claim a queued job and resolve its metadata. Playlists are expanded into new jobs."""
+    if item is None:
+        return None
+    url = item['url']
+    job_id = item['id']
+
+    # The job table is the source of truth; skip anything that is no longer queued there
+    started_at = datetime.now().isoformat()
+    if not database.claim_download_job(job_id, started_at):
+        return None
+
+    set_job_status(job_id, 'downloading', started_at=started_at, stage=pipeline.EXTRACT, stage_state='running')
+    try:
+        episode = downloader.extract_episode(url, dropout.DropoutProcessor(), _status_updater(job_id))
+    except Exception as e:
+        _fail_job(job_id, e)
+        return None
+
+    if isinstance(episode, list):
+        for entry_url in episode:
+            queue_url(entry_url)
+        database.delete_download_job(job_id)
+        remove_job(job_id)
+        return None
+    return _Job(job_id, episode)
+
+
+def download_job(job: _Job) -> _Job | None:
+    def update_progress(progress: downloader.ProgressUpdate) -> None:
+        job_progress.publish(job.id, progress)
+
+    return _run_stage(job, pipeline.DOWNLOAD, lambda: downloader.download_episode(
+        job.episode, update_progress, _status_updater(job.id)
+    ))
+
+
+def postprocess_job(job: _Job) -> _Job | None:
+    return _run_stage(job, pipeline.POSTPROCESS, lambda: downloader.postprocess_episode(
+        job.episode, _status_updater(job.id)
+    ))
+
+
+def place_job(job: _Job) -> _Job | None:
+    return _run_stage(job, pipeline.PLACE, lambda: downloader.place_episode(
+        job.episode, SHOW_DIR, _status_updater(job.id)
+    ))
+
+
+def notify_job(job: _Job) -> None:
+    """Notify stage: the last one, so the job completes here."""
+    if _run_stage(job, pipeline.NOTIFY, lambda: downloader.notify_episode(job.episode)) is None:
+        return None
+    completed_at = datetime.now().isoformat()
+    database.finish_download_job(job.id, 'completed', completed_at)
+    set_job_status(job.id, 'completed', record_history=True, completed_at=completed_at, file_path='', size=0)
+    return None
+
+
+def _stage_failed(item: _Job | dict | None, e: Exception) -> None:
+    """A stage handler raised outside its own error handling (e.g. the database was locked)."""
+    job_id = item.id if isinstance(item, _Job) else (item or {}).get('id')
+    if job_id:
+        _fail_job(job_id, e)
+
+
+def build_pipeline() -> pipeline.Stage:
+    """Wire up the job stages; the extract stage reads the download queue. Returns the first stage."""
+    def waiting(job: _Job, stage: str) -> None:
+        set_job_stage(job.id, stage, 'waiting')
+
+    def stage(name: str, handler, workers: int, **kwargs) -> pipeline.Stage:
+        return pipeline.Stage(name, handler, workers, on_error=_stage_failed, **kwargs)
+
+    first = stage(pipeline.EXTRACT, extract_job, EXTRACT_WORKERS, inbox=download_queue)
+    (first
+        .then(stage(pipeline.DOWNLOAD, download_job, DOWNLOAD_WORKERS, queue_size=STAGE_QUEUE_SIZE), waiting)
+        .then(stage(pipeline.POSTPROCESS, postprocess_job, POSTPROCESS_WORKERS, queue_size=STAGE_QUEUE_SIZE), waiting)
+        .then(stage(pipeline.PLACE, place_job, PLACE_WORKERS, queue_size=STAGE_QUEUE_SIZE), waiting)
+        .then(stage(pipeline.NOTIFY, notify_job, 1, queue_size=STAGE_QUEUE_SIZE), waiting))
+    return first
+
+
+_metadata_rate_limiter = HostRateLimiter(METADATA_RATE_LIMIT)
+
+
+def metadata_worker() -> None:
+    """Background worker that fills in episode metadata via yt-dlp. METADATA_WORKERS of these run concurrently."""
+    print(f'Metadata thread started: {threading.current_thread().name}')
+    while True:
+        try:
+            priority, _, episode_url_data = metadata_queue.get(timeout=1)
+        except queue.Empty:
+            continue
+
+        url_path = episode_url_data['url_path']
+        full_url = episode_url_data['url']
+        if not start_metadata_fetch(url_path, priority):
+            metadata_queue.task_done()
+            continue
+
+        succeeded = False
+        _metadata_rate_limiter.wait(urlparse(full_url).hostname or '')
+        start = time.monotonic()
+        try:
+            dropout.fetch_and_store_episode_info(full_url)
+            succeeded = True
+            print(f'Metadata fetch succeeded for {full_url}')
+        except Exception as e:
+            print(f'Metadata fetch failed for {full_url}: {e}')
+        finally:
+            finish_metadata_fetch(url_path, time.monotonic() - start, succeeded)
+            metadata_queue.task_done()
+
+
+def get_urls_to_process() -> list[str]:
+    urls = []
+    if URL:
+        urls.append(URL)
+
+    with open(URL_LIST_FILE_PATH, 'r') as url_list_file:
+        file_urls = [line.strip() for line in url_list_file if line.strip()]
+        urls.extend(file_urls)
+
+    return urls
+
+
+def create_config_files():
+    netrc_path = os.path.join(CONFIG_DIR, '.netrc')
+    if not os.path.exists(netrc_path):
+        with open(netrc_path, 'w') as netrc_file:
+            print('Created .netrc file: ' + netrc_path)
+
+    if not os.path.exists(URL_LIST_FILE_PATH):
+        with open(URL_LIST_FILE_PATH, 'w') as url_list_file:
+            print('Created url text file: ' + URL_LIST_FILE_PATH)
+
+
+def start_workers() -> None:
+    """Restore persisted jobs and start the job stage, progress, Sonarr notifier and metadata threads."""
+    create_config_files()
+
+    print("yt-dlp version: " + yt_dlp.version.__version__)
+    if is_sonarr_enabled():
+        print("Sonarr integration enabled")
+    else:
+        print("Sonarr integration disabled")
+
+    # Metadata extraction runs on the extract workers (get_metadata) and the metadata workers
+    ytdl_pool.metadata_pool.prewarm(downloader.METADATA_YT_OPTS, EXTRACT_WORKERS)
+    ytdl_pool.metadata_pool.prewarm(dropout.EPISODE_INFO_YT_OPTS, METADATA_WORKERS)
+
+    restored = restore_jobs()
+    if restored:
+        print(f'Restored {restored} queued download(s)')
+
+    for url in get_urls_to_process():
+        queue_url(url)
+
+    stage = build_pipeline()
+    while stage:
+        stage.start()
+        stage = stage.next
+    threading.Thread(target=job_progress.run, name='progress-publisher', daemon=True).start()
+    if is_sonarr_enabled():
+        threading.Thread(target=notifier.sonarr_notifier.run, name='sonarr-notifier', daemon=True).start()
+    for i in range(METADATA_WORKERS):
+        metadata_thread = threading.Thread(target=metadata_worker, name=f'metadata-worker-{i + 1}', daemon=True)
+        metadata_thread.start()
+
+
+def main():
+    """Downloader process for RUN_MODE=api deployments: runs every job once, for any number of API workers."""
+    database.init_db()
+    start_workers()
+    print('Sharing job state through the database')
+    shared_state.run_publisher()
+
+
+if __name__ == "__main__":
+    main()
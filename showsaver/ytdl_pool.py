@@ -0,0 +1,115 @@
+import os
+import threading
+import yt_dlp
+
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from yt_dlp.cookies import YoutubeDLCookieJar
+
+from showsaver.env import COOKIE_PATH
+
+_cookie_jar: YoutubeDLCookieJar | None = None
+_cookie_lock = threading.Lock()
+_saved_cookies: frozenset | None = None   # what the cookie file holds, as of the last load or save
+
+
+def shared_cookie_jar() -> YoutubeDLCookieJar:
+    """One cookie jar for every YoutubeDL instance, so a Dropout login is reused instead of repeated."""
+    global _cookie_jar
+    with _cookie_lock:
+        if _cookie_jar is None:
+            jar = YoutubeDLCookieJar(str(COOKIE_PATH))
+            if os.access(COOKIE_PATH, os.R_OK):
+                try:
+                    jar.load()
+                except Exception as e:
+                    print(f'Unable to load cookies from {COOKIE_PATH}: {e}')
+            _cookie_jar = jar
+            _mark_saved(jar)
+        return _cookie_jar
+
+
+def _cookie_state(jar: YoutubeDLCookieJar) -> frozenset:
+    with jar._cookies_lock:
+        return frozenset((c.domain, c.path, c.name, c.value, c.expires) for c in jar)
+
+
+def _mark_saved(jar: YoutubeDLCookieJar) -> None:
+    global _saved_cookies
+    _saved_cookies = _cookie_state(jar)
+
+
+def save_cookies() -> None:
+    jar = shared_cookie_jar()
+    tmp_path = f'{COOKIE_PATH}.tmp'
+    # The jar's own lock keeps concurrent extractions from mutating it mid-save
+    with _cookie_lock, jar._cookies_lock:
+        try:
+            jar.save(tmp_path)
+            os.replace(tmp_path, COOKIE_PATH)
+        except OSError as e:
+            print(f'Unable to save cookies to {COOKIE_PATH}: {e}')
+            return
+        _mark_saved(jar)
+
+
+def save_cookies_if_changed() -> None:
+    """Save the jar only if its cookies differ from what was last loaded or saved; most lookups change nothing."""
+    if _cookie_state(shared_cookie_jar()) != _saved_cookies:
+        save_cookies()
+
+
+def create_youtube_dl(opts: dict) -> yt_dlp.YoutubeDL:
+    # YoutubeDL fills defaults into the params dict it is given, so keep the caller's untouched
+    ydl = yt_dlp.YoutubeDL(dict(opts))
+    # cookiejar is a cached_property; seeding it means the instance never loads its own
+    ydl.__dict__['cookiejar'] = shared_cookie_jar()
+    return ydl
+
+
+def _options_key(opts: dict) -> str:
+    return repr(sorted(opts.items(), key=lambda item: item[0]))
+
+
+class YoutubeDLPool:
+    """
+    Reusable YoutubeDL instances for metadata-only extraction, keyed by option set. Reuse skips
+    extractor setup and netrc parsing, and each instance is only used by one thread at a time.
+    """
+
+    def __init__(self, max_idle_per_key: int = 8):
+        self._max_idle_per_key = max_idle_per_key
+        self._idle: dict[str, list[yt_dlp.YoutubeDL]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def prewarm(self, opts: dict, count: int) -> None:
+        key = _options_key(opts)
+        instances = [create_youtube_dl(opts) for _ in range(count)]
+        with self._lock:
+            idle = self._idle[key]
+            idle.extend(instances[:max(0, self._max_idle_per_key - len(idle))])
+
+    @contextmanager
+    def checkout(self, opts: dict) -> Iterator[yt_dlp.YoutubeDL]:
+        key = _options_key(opts)
+        with self._lock:
+            idle = self._idle[key]
+            ydl = idle.pop() if idle else None
+        if ydl is None:
+            ydl = create_youtube_dl(opts)
+
+        try:
+            yield ydl
+        finally:
+            save_cookies_if_changed()
+            with self._lock:
+                idle = self._idle[key]
+                if len(idle) < self._max_idle_per_key:
+                    idle.append(ydl)
+                    ydl = None
+            if ydl is not None:
+                ydl.close()
+
+
+metadata_pool = YoutubeDLPool()
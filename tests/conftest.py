@@ -0,0 +1,29 @@
+import pytest
+
+from showsaver import downloader, state
+from showsaver.routes import downloads
+
+
+def _reset_state() -> None:
+    """Clear every piece of module-level job state, as if the process had just started."""
+    with state.thread_lock:
+        state.download_status.clear()
+        state.download_history.clear()
+        state._url_index.clear()
+        state._status_counts.clear()
+        state.metadata_in_flight.clear()
+        state.metadata_stats.update(fetched=0, failed=0, last_latency=None, avg_latency=None, max_latency=None)
+    state.job_progress._latest.clear()
+    for q in (state.download_queue, state.metadata_queue):
+        while not q.empty():
+            q.get_nowait()
+    downloads._queue_cache.clear()
+    downloader._prefetched_info.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    """Runs around every test; tests that simulate a restart call the returned function themselves."""
+    _reset_state()
+    yield _reset_state
+    _reset_state()
@@ -134,3 +134,196 @@ class TestReads:
         rows = db.get_all_dropout_episodes()
         assert len(rows) == 2
         assert {r['url_path'] for r in rows} == {'a', 'b'}
+
+
+class TestSeasonUrls:
+    def test_unknown_slug_returns_none(self, db):
+        assert db.get_dropout_season_url('nope') is None
+
+    def test_upsert_replaces_existing_slug(self, db):
+        db.upsert_dropout_season_url('ep', 'http://x/season:1/videos/ep', 1)
+        db.upsert_dropout_season_url('ep', 'http://x/season:2/videos/ep', 2)
+        row = db.get_dropout_season_url('ep')
+        assert row['season'] == 2
+        assert row['url'] == 'http://x/season:2/videos/ep'
+
+    def test_recent_seasons_most_recent_first_and_distinct(self, db):
+        db.upsert_dropout_season_url('a', 'http://x/a', 10)
+        time.sleep(0.01)
+        db.upsert_dropout_season_url('b', 'http://x/b', 20)
+        time.sleep(0.01)
+        db.upsert_dropout_season_url('c', 'http://x/c', 10)
+        assert db.get_recent_dropout_seasons(5) == [10, 20]
+        assert db.get_recent_dropout_seasons(1) == [10]
+
+
+class TestReleasePages:
+    PAGE_URL = 'https://watch.dropout.tv/new-releases'
+
+    def test_unknown_page_returns_none(self, db):
+        assert db.get_dropout_release_page(self.PAGE_URL) is None
+
+    def test_upsert_round_trips_validators_and_urls(self, db):
+        db.upsert_dropout_release_page(self.PAGE_URL, '"v1"', None, [URL])
+        db.upsert_dropout_release_page(self.PAGE_URL, '"v2"', 'Sat, 17 Oct 2026 10:00:00 GMT', [URL, URL + '-2'])
+        page = db.get_dropout_release_page(self.PAGE_URL)
+        assert page['etag'] == '"v2"'
+        assert page['last_modified'] == 'Sat, 17 Oct 2026 10:00:00 GMT'
+        assert page['release_urls'] == [URL, URL + '-2']
+
+
+class TestDownloadJobs:
+    def test_claim_only_succeeds_once(self, db):
+        db.insert_download_job('1', 'http://x/a', '2026-01-01T00:00:00')
+        assert db.claim_download_job('1', '2026-01-01T00:00:01') is True
+        assert db.claim_download_job('1', '2026-01-01T00:00:02') is False
+        [row] = db.get_download_jobs('downloading')
+        assert row['started_at'] == '2026-01-01T00:00:01'
+
+    def test_requeue_interrupted_resets_downloading_jobs(self, db):
+        db.insert_download_job('1', 'http://x/a', '2026-01-01T00:00:00')
+        db.insert_download_job('2', 'http://x/b', '2026-01-01T00:00:00')
+        db.claim_download_job('1', '2026-01-01T00:00:01')
+        assert db.requeue_interrupted_download_jobs() == 1
+        assert [r['id'] for r in db.get_download_jobs('queued')] == ['1', '2']
+
+    def test_finish_and_delete_by_status(self, db):
+        db.insert_download_job('1', 'http://x/a', '2026-01-01T00:00:00')
+        db.finish_download_job('1', 'failed', '2026-01-01T00:00:05', 'boom')
+        [row] = db.get_download_jobs('failed')
+        assert row['error'] == 'boom'
+        db.delete_download_jobs('failed')
+        assert db.get_download_jobs('failed') == []
+
+
+class TestConnections:
+    def test_same_thread_reuses_connection(self, db):
+        assert db.get_connection() is db.get_connection()
+
+    def test_threads_get_their_own_connection(self, db):
+        import threading
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(db.get_connection()))
+        thread.start()
+        thread.join()
+        assert seen[0] is not db.get_connection()
+
+    def test_pragmas_applied_to_every_connection(self, db):
+        conn = db.get_connection()
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -16000
+
+    def test_connection_is_per_database_path(self, db, tmp_path, monkeypatch):
+        first = db.get_connection()
+        monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'other.db'))
+        assert db.get_connection() is not first
+
+    def test_close_connection_opens_a_fresh_one(self, db):
+        first = db.get_connection()
+        db.close_connection()
+        assert db.get_connection() is not first
+
+
+class TestBulk:
+    EPISODES = [
+        {'url_path': 'a', 'url': 'http://x/a', 'title': 'Title \uff02A\uff02', 'thumbnail': 'thumb', 'duration': 100},
+        {'url_path': 'b', 'url': 'http://x/b', 'title': 'Title B', 'thumbnail': 'thumb', 'duration': 200},
+    ]
+
+    def test_bulk_basic_inserts_all_rows(self, db):
+        db.upsert_dropout_episodes_basic(self.EPISODES)
+        rows = db.get_dropout_episodes(['a', 'b'])
+        assert set(rows) == {'a', 'b'}
+        assert rows['a']['title'] == "Title 'A'"
+        assert rows['b']['show_name'] == ''
+
+    def test_bulk_basic_preserves_show_name(self, db):
+        db.upsert_dropout_episode('a', 'http://x/a', 'Game Changer', 'Old', 'thumb', 1)
+        db.upsert_dropout_episodes_basic(self.EPISODES)
+        assert db.get_dropout_episode('a')['show_name'] == 'Game Changer'
+        assert db.get_dropout_episode('a')['duration'] == 100
+
+    def test_bulk_read_omits_unknown_paths(self, db):
+        db.upsert_dropout_episodes_basic(self.EPISODES[:1])
+        assert set(db.get_dropout_episodes(['a', 'missing'])) == {'a'}
+
+    def test_bulk_read_of_nothing_is_empty(self, db):
+        assert db.get_dropout_episodes([]) == {}
+
+
+class TestItemIds:
+    def _episode(self, item_id):
+        return {'url_path': URL_PATH, 'url': URL, 'title': TITLE, 'thumbnail': '', 'duration': 60, 'item_id': item_id}
+
+    def test_bulk_basic_stores_item_id(self, db):
+        db.upsert_dropout_episodes_basic([self._episode(42)])
+        assert db.get_dropout_episode(URL_PATH)['item_id'] == 42
+
+    def test_missing_item_id_keeps_stored_value(self, db):
+        db.upsert_dropout_episodes_basic([self._episode(42)])
+        db.upsert_dropout_episodes_basic([self._episode(None)])
+        assert db.get_dropout_episode(URL_PATH)['item_id'] == 42
+
+    def test_init_db_adds_column_to_existing_table(self, db):
+        with db.get_connection() as conn:
+            conn.execute("ALTER TABLE dropout_episodes DROP COLUMN item_id")
+        db.init_db()
+        with db.get_connection() as conn:
+            cols = {row['name'] for row in conn.execute("PRAGMA table_info(dropout_episodes)")}
+        assert 'item_id' in cols
+
+
+class TestSharedState:
+    def test_insert_if_new_skips_active_urls(self, db):
+        assert db.insert_download_job_if_new('1', URL, 'now') is True
+        assert db.insert_download_job_if_new('2', URL, 'now') is False
+        db.finish_download_job('1', 'failed', 'now', 'boom')
+        assert db.insert_download_job_if_new('3', URL, 'now') is True
+
+    def test_take_metadata_requests_empties_the_table(self, db):
+        db.request_metadata(URL, 'b', 1)
+        db.request_metadata(URL, 'a', 0)
+        assert [r['url_path'] for r in db.take_metadata_requests()] == ['a', 'b']
+        assert db.take_metadata_requests() == []
+
+    def test_shared_state_round_trip(self, db):
+        assert db.get_shared_state('queue') is None
+        db.put_shared_state('queue', 'v1', {'queued': []})
+        assert db.get_shared_state('queue') == {'version': 'v1', 'payload': {'queued': []}}
+        assert db.get_shared_state_version('queue') == 'v1'
+
+    def test_episode_writes_bump_the_shared_counter(self, db):
+        before = int(db.get_shared_state_version('dropout_episodes'))
+        db.upsert_dropout_episode_basic(URL_PATH, URL, TITLE, '', 60)
+        db.upsert_dropout_episode_basic(URL_PATH, URL, TITLE, '', 61)
+        assert int(db.get_shared_state_version('dropout_episodes')) == before + 2
+
+    def test_api_mode_reads_the_shared_counter(self, db, monkeypatch):
+        monkeypatch.setattr(db, 'RUN_MODE', 'api')
+        before = db.get_dropout_episodes_version()
+        db.upsert_dropout_episode_basic(URL_PATH, URL, TITLE, '', 60)
+        assert db.get_dropout_episodes_version() == before + 1
+
+    def test_data_version_moves_on_other_connections_commits(self, db):
+        import threading
+        before = db.get_data_version()
+        thread = threading.Thread(target=db.request_metadata, args=(URL, 'a', 0))
+        thread.start()
+        thread.join()
+        assert db.get_data_version() != before
+
+
+class TestEpisodesVersion:
+    def test_every_episode_write_bumps_version(self, db):
+        start = db.get_dropout_episodes_version()
+        db.upsert_dropout_episode_basic(URL_PATH, URL, TITLE, THUMB, DURATION)
+        db.upsert_dropout_episodes_basic([{'url_path': 'b', 'url': 'u', 'title': 't', 'thumbnail': '', 'duration': 1}])
+        db.upsert_dropout_episode(URL_PATH, URL, 'Show', TITLE, THUMB, DURATION)
+        assert db.get_dropout_episodes_version() == start + 3
+
+    def test_reads_do_not_bump_version(self, db):
+        start = db.get_dropout_episodes_version()
+        db.get_dropout_episode(URL_PATH)
+        db.get_dropout_episodes([URL_PATH])
+        assert db.get_dropout_episodes_version() == start
@@ -0,0 +1,208 @@
+import pytest
+
+from showsaver import downloader
+from showsaver.placement import PlacementResult, PlacementStrategy
+from showsaver.remux import RewriteStats
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    """Stubs out the network-bound stages of process_url and records what they were given."""
+    calls = {'metadata': [], 'download': [], 'postprocess': []}
+    info = {'series': 'Game Changer', 'season_number': 1, 'episode_number': 1, 'title': 'Ep'}
+
+    def _get_metadata(url):
+        calls['metadata'].append(url)
+        return dict(info)
+
+    def _download_show(show_url, info_dict, progress_callback=None, processor=None, on_extract=None):
+        calls['download'].append((show_url, info_dict))
+        show_path = str(tmp_path / 'episode.mkv')
+        return show_path, {**info_dict, 'filepath': show_path, 'sponsorblock_chapters': []}
+
+    def _postprocess_show(show_path, downloaded_info):
+        calls['postprocess'].append((show_path, downloaded_info))
+        return show_path, RewriteStats(2048, 0.5)
+
+    monkeypatch.setattr(downloader, 'get_metadata', _get_metadata)
+    monkeypatch.setattr(downloader, 'find_corrected_url', lambda _url, _info: (None, None))
+    monkeypatch.setattr(downloader, 'download_show', _download_show)
+    monkeypatch.setattr(downloader, 'postprocess_show', _postprocess_show)
+    monkeypatch.setattr(downloader, 'copy_to_destination',
+                        lambda *_args, **_kwargs: PlacementResult(PlacementStrategy.HARDLINK, 0.01))
+    monkeypatch.setattr(downloader.sonarr_notifier, 'request', lambda *_args, **_kwargs: None)
+    return calls
+
+
+@pytest.fixture
+def youtube_dl(monkeypatch):
+    """Stands in for the YoutubeDL that download_show drives and records the calls made on it."""
+    calls = {'process_ie_result': [], 'download': [], 'extract_info': []}
+
+    class FakeYoutubeDL:
+        fail_processing = False
+
+        def __init__(self, opts):
+            self.params = opts
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_args):
+            return False
+
+        def add_post_processor(self, pp, when):
+            pass
+
+        def sanitize_info(self, info_dict, remove_private_keys=False):
+            return dict(info_dict)
+
+        def process_ie_result(self, info_dict, download=False):
+            calls['process_ie_result'].append(info_dict['webpage_url'])
+            if FakeYoutubeDL.fail_processing:
+                raise downloader.yt_dlp.utils.DownloadError('HTTP Error 403: Forbidden')
+            return info_dict
+
+        def extract_info(self, url, download=True):
+            calls['extract_info'].append(url)
+
+        def download(self, url):
+            calls['download'].append(url)
+            self.extract_info(url)
+
+        def evaluate_outtmpl(self, _outtmpl, info_dict):
+            return f"{info_dict['title']}.mp4"
+
+    monkeypatch.setattr(downloader.ytdl_pool, 'create_youtube_dl', FakeYoutubeDL)
+    monkeypatch.setattr(downloader.ytdl_pool, 'save_cookies', lambda: None)
+    calls['youtube_dl'] = FakeYoutubeDL
+    return calls
+
+
+def _downloaded_episode():
+    url = 'https://watch.dropout.tv/videos/ep'
+    return downloader.Episode(url, {'title': 'Ep', 'webpage_url': url}, extractions=1)
+
+
+def test_download_reuses_extracted_info(youtube_dl):
+    episode = _downloaded_episode()
+    fields = {}
+    downloader.download_episode(episode, status_callback=lambda **f: fields.update(f))
+
+    assert youtube_dl['process_ie_result'] == [episode.url]
+    assert youtube_dl['extract_info'] == []
+    assert episode.extractions == 1
+    assert 'extractions' not in fields
+    assert episode.show_path.endswith('Ep.mp4')
+
+
+def test_download_re_extracts_when_extracted_info_fails(youtube_dl):
+    youtube_dl['youtube_dl'].fail_processing = True
+    episode = _downloaded_episode()
+    fields = {}
+    downloader.download_episode(episode, status_callback=lambda **f: fields.update(f))
+
+    assert youtube_dl['download'] == [episode.url]
+    assert youtube_dl['extract_info'] == [episode.url]
+    assert episode.extractions == 2
+    assert fields['extractions'] == 2
+
+
+def test_single_episode_is_extracted_once(pipeline, tmp_path):
+    fields = {}
+    downloader.process_url('https://watch.dropout.tv/videos/ep', tmp_path, status_callback=lambda **f: fields.update(f))
+
+    assert pipeline['metadata'] == ['https://watch.dropout.tv/videos/ep']
+    assert fields['extractions'] == 1
+
+
+def test_download_stage_receives_extracted_info(pipeline, tmp_path):
+    downloader.process_url('https://watch.dropout.tv/videos/ep', tmp_path)
+
+    [(url, info_dict)] = pipeline['download']
+    assert url == 'https://watch.dropout.tv/videos/ep'
+    assert info_dict['series'] == 'Game Changer'
+
+
+def test_postprocess_stage_receives_downloaded_info(pipeline, tmp_path):
+    downloader.process_url('https://watch.dropout.tv/videos/ep', tmp_path)
+
+    [(show_path, downloaded_info)] = pipeline['postprocess']
+    assert show_path == str(tmp_path / 'episode.mkv')
+    assert downloaded_info['sponsorblock_chapters'] == []
+
+
+def test_corrected_url_counts_second_extraction(pipeline, monkeypatch, tmp_path):
+    corrected = 'https://watch.dropout.tv/dimension-20/season:3/videos/ep'
+    monkeypatch.setattr(downloader, 'find_corrected_url', lambda _url, _info: (corrected, {'series': 'Dimension 20'}))
+    fields = {}
+    downloader.process_url('https://watch.dropout.tv/videos/ep', tmp_path, status_callback=lambda **f: fields.update(f))
+
+    assert fields['extractions'] == 2
+    assert pipeline['download'][0][0] == corrected
+
+
+def test_placement_is_reported_in_status(pipeline, tmp_path):
+    fields = {}
+    downloader.process_url('https://watch.dropout.tv/videos/ep', tmp_path, status_callback=lambda **f: fields.update(f))
+
+    assert fields['placement_strategy'] == 'hardlink'
+    assert fields['placement_seconds'] == 0.01
+
+
+def test_rewrite_stats_are_reported_in_status(pipeline, tmp_path):
+    fields = {}
+    downloader.process_url('https://watch.dropout.tv/videos/ep', tmp_path, status_callback=lambda **f: fields.update(f))
+
+    assert fields['bytes_rewritten'] == 2048
+    assert fields['ffmpeg_seconds'] == 0.5
+
+
+class TestPlaylistExpansion:
+    PLAYLIST_URL = 'https://watch.dropout.tv/game-changer/season:2'
+
+    @pytest.fixture
+    def playlist(self, monkeypatch):
+        episodes = {
+            'https://watch.dropout.tv/videos/c': {'season_number': 2, 'episode_number': 3},
+            'https://watch.dropout.tv/videos/a': {'season_number': 2, 'episode_number': 1},
+            'https://watch.dropout.tv/videos/broken': None,
+            'https://watch.dropout.tv/videos/b': {'season_number': 2, 'episode_number': 2},
+        }
+        fetched = []
+
+        def _get_metadata(url):
+            fetched.append(url)
+            if url == self.PLAYLIST_URL:
+                return {'_type': 'playlist', 'entries': [{'url': u} for u in episodes]}
+            if episodes[url] is None:
+                raise Exception('extraction failed')
+            return {'series': 'Game Changer', 'title': url, **episodes[url]}
+
+        monkeypatch.setattr(downloader, 'get_metadata', _get_metadata)
+        return fetched
+
+    def test_entries_are_sorted_by_season_and_episode(self, playlist, tmp_path):
+        expanded = downloader.process_url(self.PLAYLIST_URL, tmp_path)
+        assert expanded == [
+            'https://watch.dropout.tv/videos/a',
+            'https://watch.dropout.tv/videos/b',
+            'https://watch.dropout.tv/videos/c',
+            'https://watch.dropout.tv/videos/broken',
+        ]
+
+    def test_entry_download_reuses_prefetched_info(self, pipeline, playlist, tmp_path):
+        downloader.process_url(self.PLAYLIST_URL, tmp_path)
+        playlist.clear()
+        fields = {}
+
+        downloader.process_url('https://watch.dropout.tv/videos/b', tmp_path, status_callback=lambda **f: fields.update(f))
+
+        assert playlist == []
+        assert pipeline['download'][0][1]['episode_number'] == 2
+        assert fields['extractions'] == 1
+
+    def test_prefetched_info_is_used_once(self, playlist, tmp_path):
+        downloader.process_url(self.PLAYLIST_URL, tmp_path)
+        assert downloader._take_prefetched_info('https://watch.dropout.tv/videos/a') is not None
+        assert downloader._take_prefetched_info('https://watch.dropout.tv/videos/a') is None
@@ -11,6 +11,7 @@ def mock_releases(monkeypatch):
     # Reset in-memory cache so each test starts clean
     dropout._new_releases_cache['data'] = None
     dropout._new_releases_cache['timestamp'] = 0
+    dropout._new_releases_cache['rows'] = None
 
     state = {
         'scraped': [
@@ -19,18 +20,55 @@ def mock_releases(monkeypatch):
         ],
         'db_row': None,
         'enqueued': [],
+        'priorities': [],
         'basic_upserts': 0,
+        'upserted': [],
+        'reads': 0,
+        'stored': {},
+        'not_modified': False,
+        'validators_sent': [],
+        'page': None,
+        'known_ids_sent': [],
     }
 
-    monkeypatch.setattr(dropout, '_get_new_releases_bs', lambda: state['scraped'])
-    monkeypatch.setattr(dropout.database, 'get_dropout_episode', lambda _url_path: state['db_row'])
+    def _scrape(validators=None, known_ids=None):
+        state['validators_sent'].append(validators)
+        state['known_ids_sent'].append(known_ids)
+        if state['not_modified']:
+            return dropout._ReleasesPage(not_modified=True)
+        videos, stopped_at = [], None
+        for video in state['scraped']:
+            if known_ids and video['id'] in known_ids:
+                stopped_at = video['id']
+                break
+            videos.append(video)
+        return dropout._ReleasesPage(not_modified=False, videos=videos, etag='"v1"', stopped_at=stopped_at)
+    monkeypatch.setattr(dropout, '_get_new_releases_bs', _scrape)
+    monkeypatch.setattr(dropout.database, 'get_dropout_release_page', lambda url: state['page'])
 
-    def _basic(*_args, **_kwargs):
+    def _store_page(url, etag, last_modified, release_urls):
+        state['page'] = {'url': url, 'etag': etag, 'last_modified': last_modified, 'release_urls': release_urls}
+    monkeypatch.setattr(dropout.database, 'upsert_dropout_release_page', _store_page)
+
+    def _read(url_paths):
+        state['reads'] += 1
+        if not state['db_row']:
+            return {}
+        return {
+            p: {**state['stored'][p], 'fetched_at': 0, **state['db_row']}
+            for p in url_paths if p in state['stored']
+        }
+    monkeypatch.setattr(dropout.database, 'get_dropout_episodes', _read)
+
+    def _basic(episodes):
         state['basic_upserts'] += 1
-    monkeypatch.setattr(dropout.database, 'upsert_dropout_episode_basic', _basic)
+        state['upserted'].extend(episodes)
+        state['stored'].update((e['url_path'], e) for e in episodes)
+    monkeypatch.setattr(dropout.database, 'upsert_dropout_episodes_basic', _basic)
 
-    def _queue(url, url_path):
+    def _queue(url, url_path, priority):
         state['enqueued'].append((url, url_path))
+        state['priorities'].append(priority)
     monkeypatch.setattr(dropout, 'queue_metadata', _queue)
 
     return state
@@ -85,3 +123,222 @@ class TestApiPayload:
         mock_releases['db_row'] = {'show_name': '', 'metadata_fetched_at': None}
         result = dropout.get_new_releases(force_refresh=True)
         assert result['videos'][0]['metadata_fetched_at'] is None
+
+
+class TestQueueMetadataPriority:
+    def test_displayed_releases_are_queued_ahead_of_the_rest(self, mock_releases):
+        mock_releases['scraped'] = [
+            {'id': i, 'url': f'https://watch.dropout.tv/videos/ep-{i}',
+             'title': f'Ep {i}', 'thumbnail': 'https://t/1.jpg', 'duration': 100}
+            for i in range(dropout.DISPLAYED_RELEASES + 2)
+        ]
+        dropout.get_new_releases(force_refresh=True)
+        assert mock_releases['priorities'] == (
+            [dropout.METADATA_PRIORITY_VISIBLE] * dropout.DISPLAYED_RELEASES
+            + [dropout.METADATA_PRIORITY_BACKLOG] * 2
+        )
+
+
+class TestBulkDatabaseAccess:
+    def test_whole_page_is_upserted_in_one_call(self, mock_releases):
+        mock_releases['scraped'] = [
+            {'id': i, 'url': f'https://watch.dropout.tv/videos/ep-{i}',
+             'title': f'Ep {i}', 'thumbnail': 'https://t/1.jpg', 'duration': 100}
+            for i in range(5)
+        ]
+        dropout.get_new_releases(force_refresh=True)
+        assert mock_releases['basic_upserts'] == 1
+        assert [e['url_path'] for e in mock_releases['upserted']] == [f'ep-{i}' for i in range(5)]
+
+
+class TestCachedPath:
+    def test_fresh_cache_polls_reuse_rows_without_touching_the_database(self, mock_releases):
+        mock_releases['db_row'] = {'show_name': '', 'metadata_fetched_at': None}
+        dropout.get_new_releases(force_refresh=True)
+        reads_after_scrape = mock_releases['reads']
+
+        first = dropout.get_new_releases()
+        second = dropout.get_new_releases()
+
+        assert first['cached'] is True and second['cached'] is True
+        assert second['videos'] == first['videos']
+        assert mock_releases['reads'] == reads_after_scrape + 1
+
+    def test_episode_upsert_invalidates_cached_rows(self, mock_releases, monkeypatch):
+        mock_releases['db_row'] = {'show_name': '', 'metadata_fetched_at': None}
+        dropout.get_new_releases(force_refresh=True)
+        dropout.get_new_releases()
+
+        mock_releases['db_row'] = {'show_name': 'Game Changer', 'metadata_fetched_at': time.time()}
+        monkeypatch.setattr(dropout.database, '_episodes_version', dropout.database._episodes_version + 1)
+
+        result = dropout.get_new_releases()
+        assert result['videos'][0]['show_name'] == 'Game Changer'
+
+
+class TestConditionalFetch:
+    def test_validators_from_last_fetch_are_sent(self, mock_releases):
+        dropout.get_new_releases(force_refresh=True)
+        dropout.get_new_releases(force_refresh=True)
+        assert mock_releases['validators_sent'][0] is None
+        assert mock_releases['validators_sent'][1]['etag'] == '"v1"'
+        assert mock_releases['page']['release_urls'] == ['https://watch.dropout.tv/videos/ep-one']
+
+    def test_not_modified_skips_upsert_and_serves_stored_releases(self, mock_releases):
+        mock_releases['db_row'] = {'show_name': 'Game Changer', 'metadata_fetched_at': time.time()}
+        dropout.get_new_releases(force_refresh=True)
+
+        # A fresh process only has the stored page to go on
+        dropout._new_releases_cache['data'] = None
+        dropout._new_releases_cache['rows'] = None
+        mock_releases['not_modified'] = True
+        result = dropout.get_new_releases(force_refresh=True)
+
+        assert mock_releases['basic_upserts'] == 1
+        assert result['success'] is True
+        assert [v['url_path'] for v in result['videos']] == ['ep-one']
+        assert dropout._new_releases_cache['data'] == ['https://watch.dropout.tv/videos/ep-one']
+
+    def test_not_modified_still_queues_missing_metadata(self, mock_releases):
+        mock_releases['db_row'] = {'show_name': '', 'metadata_fetched_at': None}
+        dropout.get_new_releases(force_refresh=True)
+        mock_releases['enqueued'].clear()
+
+        mock_releases['not_modified'] = True
+        dropout.get_new_releases(force_refresh=True)
+        assert mock_releases['enqueued'] == [('https://watch.dropout.tv/videos/ep-one', 'ep-one')]
+
+
+class _FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class TestScrapeRequest:
+    @pytest.fixture
+    def session(self, monkeypatch):
+        calls = {'headers': [], 'responses': []}
+        def _get(url, headers=None, timeout=None):
+            calls['headers'].append(headers)
+            return calls['responses'].pop(0)
+        monkeypatch.setattr(dropout._scrape_session, 'get', _get)
+        monkeypatch.setitem(dropout._scrape_stats, 'requests', 0)
+        monkeypatch.setitem(dropout._scrape_stats, 'not_modified', 0)
+        return calls
+
+    def test_conditional_headers(self, session):
+        session['responses'].append(_FakeResponse(304))
+        page = dropout._get_new_releases_bs({'etag': '"abc"', 'last_modified': 'Sat, 17 Oct 2026 10:00:00 GMT'})
+        assert page.not_modified is True
+        assert session['headers'][0] == {
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Sat, 17 Oct 2026 10:00:00 GMT',
+        }
+
+    def test_unconditional_without_validators(self, session):
+        session['responses'].append(_FakeResponse(200, '<html></html>', {'ETag': '"new"'}))
+        page = dropout._get_new_releases_bs()
+        assert session['headers'][0] == {}
+        assert page.not_modified is False
+        assert page.videos == []
+        assert page.etag == '"new"'
+
+    def test_hit_rate(self, session):
+        session['responses'].extend([_FakeResponse(200, '<html></html>'), _FakeResponse(304), _FakeResponse(304)])
+        for _ in range(3):
+            dropout._get_new_releases_bs({'etag': '"abc"'})
+        stats = dropout.get_scrape_stats()
+        assert stats['requests'] == 3
+        assert stats['not_modified'] == 2
+        assert stats['not_modified_rate'] == pytest.approx(2 / 3)
+
+    def test_server_error_returns_none(self, session):
+        session['responses'].append(_FakeResponse(500))
+        assert dropout._get_new_releases_bs() is None
+
+
+def _videos(ids):
+    return [
+        {'id': i, 'url': f'https://watch.dropout.tv/videos/ep-{i}',
+         'title': f'Ep {i}', 'thumbnail': 'https://t/1.jpg', 'duration': 100}
+        for i in ids
+    ]
+
+
+class TestIncrementalScrape:
+    @pytest.fixture
+    def scraped_once(self, mock_releases):
+        mock_releases['db_row'] = {'show_name': 'Game Changer', 'metadata_fetched_at': time.time()}
+        mock_releases['scraped'] = _videos([5, 4, 3, 2, 1])
+        dropout.get_new_releases(force_refresh=True)
+        mock_releases['upserted'].clear()
+        mock_releases['enqueued'].clear()
+        return mock_releases
+
+    def test_only_new_items_are_upserted(self, scraped_once):
+        scraped_once['scraped'] = _videos([7, 6, 5, 4, 3, 2, 1])
+        result = dropout.get_new_releases(force_refresh=True)
+
+        assert scraped_once['known_ids_sent'][-1] == {5, 4, 3, 2, 1}
+        assert [e['url_path'] for e in scraped_once['upserted']] == ['ep-7', 'ep-6']
+        # New items first, then the known rows, keeping the stored page length
+        assert [v['id'] for v in result['videos']] == [7, 6, 5, 4, 3]
+        assert result['videos'][2]['show_name'] == 'Game Changer'
+        assert scraped_once['page']['release_urls'] == [v['url'] for v in result['videos']]
+
+    def test_item_ids_are_stored(self, scraped_once):
+        scraped_once['scraped'] = _videos([6, 5, 4, 3, 2])
+        dropout.get_new_releases(force_refresh=True)
+        assert [e['item_id'] for e in scraped_once['upserted']] == [6]
+
+    def test_unchanged_top_item_upserts_nothing(self, scraped_once):
+        dropout.get_new_releases(force_refresh=True)
+        assert scraped_once['upserted'] == []
+        assert [v['id'] for v in dropout.get_new_releases()['videos'] if 'id' in v] == [5, 4, 3, 2, 1]
+
+    def test_known_rows_missing_metadata_are_still_queued(self, scraped_once):
+        scraped_once['db_row'] = {'show_name': '', 'metadata_fetched_at': None}
+        scraped_once['scraped'] = _videos([6, 5, 4, 3, 2, 1])
+        dropout.get_new_releases(force_refresh=True)
+
+        assert [url_path for _, url_path in scraped_once['enqueued']] == ['ep-6', 'ep-5', 'ep-4', 'ep-3', 'ep-2']
+        assert scraped_once['upserted'][0]['url_path'] == 'ep-6' and len(scraped_once['upserted']) == 1
+
+    def test_full_mode_reprocesses_the_page(self, scraped_once):
+        dropout.get_new_releases(force_refresh=True, incremental=False)
+        assert scraped_once['known_ids_sent'][-1] == set()
+        assert len(scraped_once['upserted']) == 5
+
+
+class TestIncrementalParse:
+    def test_stops_at_first_known_id(self, monkeypatch):
+        page = (
+            '<ul>'
+            + ''.join(
+                f'<li class="js-collection-item" data-item-id="{i}"><a href="/videos/ep-{i}">'
+                f'<strong title="Ep {i}"></strong></a><div class="duration-container">1:00</div></li>'
+                for i in (9, 8, 7, 6)
+            )
+            + '</ul>'
+        )
+        monkeypatch.setattr(dropout._scrape_session, 'get', lambda url, headers=None, timeout=None: _FakeResponse(200, page))
+        result = dropout._get_new_releases_bs(known_ids={7, 6})
+        assert [v['id'] for v in result.videos] == [9, 8]
+        assert result.stopped_at == 7
+
+
+class TestReleasesVersion:
+    def test_none_until_scraped_and_after_ttl(self, mock_releases, monkeypatch):
+        assert dropout.get_new_releases_version() is None
+        dropout.get_new_releases(force_refresh=True)
+        assert dropout.get_new_releases_version() is not None
+        monkeypatch.setitem(dropout._new_releases_cache, 'timestamp', time.time() - dropout.CACHE_TTL - 1)
+        assert dropout.get_new_releases_version() is None
+
+    def test_changes_with_episode_writes(self, mock_releases, monkeypatch):
+        dropout.get_new_releases(force_refresh=True)
+        before = dropout.get_new_releases_version()
+        monkeypatch.setattr(dropout.database, '_episodes_version', dropout.database._episodes_version + 1)
+        assert dropout.get_new_releases_version() != before
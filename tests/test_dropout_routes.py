@@ -0,0 +1,64 @@
+import pytest
+from flask import Flask
+from flask_smorest import Api
+
+from showsaver.routes import dropout as dropout_routes
+from showsaver.routes.dropout import bp as dropout_bp
+
+
+@pytest.fixture
+def releases(monkeypatch):
+    calls = {'get': 0, 'version': 'v1'}
+
+    def _get(force_refresh=False, incremental=True):
+        calls['get'] += 1
+        return {'success': True, 'videos': [{'id': 1, 'title': 'Ep One', 'url': 'u'}], 'cached': True}
+
+    monkeypatch.setattr(dropout_routes.dropout, 'get_new_releases', _get)
+    monkeypatch.setattr(dropout_routes.dropout, 'get_new_releases_version', lambda: calls['version'])
+    dropout_routes._new_releases_cache.clear()
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config.update(API_TITLE='Test API', API_VERSION='1.0.0', OPENAPI_VERSION='3.0.3')
+    api = Api(app)
+    api.register_blueprint(dropout_bp)
+    with app.test_client() as test_client:
+        yield test_client
+
+
+class TestNewReleasesETag:
+    def test_cached_body_is_reused_and_revalidated(self, client, releases):
+        first = client.get('/dropout/new-releases')
+        assert first.get_json()['videos'][0]['title'] == 'Ep One'
+
+        second = client.get('/dropout/new-releases')
+        assert second.get_data() == first.get_data()
+        assert releases['get'] == 1
+
+        third = client.get('/dropout/new-releases', headers={'If-None-Match': first.headers['ETag']})
+        assert third.status_code == 304
+        assert releases['get'] == 1
+
+    def test_new_version_rebuilds(self, client, releases):
+        first = client.get('/dropout/new-releases')
+        releases['version'] = 'v2'
+        second = client.get('/dropout/new-releases', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 200
+        assert releases['get'] == 2
+
+    def test_refresh_bypasses_cache(self, client, releases):
+        client.get('/dropout/new-releases')
+        client.get('/dropout/new-releases?refresh=true')
+        assert releases['get'] == 2
+
+    def test_stale_cache_is_not_stored(self, client, releases):
+        releases['version'] = None
+        response = client.get('/dropout/new-releases')
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
+        client.get('/dropout/new-releases')
+        assert releases['get'] == 2
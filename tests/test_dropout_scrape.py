@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+from showsaver.processors import dropout
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'dropout_new_releases.html'
+
+BACKENDS = ['bs4-full', 'bs4']
+if dropout.lxml:
+    BACKENDS.append('lxml')
+
+
+@pytest.fixture(scope='module')
+def html():
+    return FIXTURE.read_text(encoding='utf-8')
+
+
+@pytest.fixture(scope='module')
+def baseline(html):
+    return dropout._parse_new_releases(html, 'bs4-full')
+
+
+class TestParseNewReleases:
+    def test_baseline_items(self, baseline):
+        # 48 items on the page, one without a duration
+        assert len(baseline) == 47
+        first = baseline[0]
+        assert set(first) == {'title', 'url', 'thumbnail', 'duration', 'id'}
+        assert isinstance(first['id'], int)
+        assert isinstance(first['duration'], int)
+        assert all('/new-releases' not in video['url'] for video in baseline)
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_backends_match_baseline(self, html, baseline, backend):
+        assert dropout._parse_new_releases(html, backend) == baseline
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_entities_decoded(self, html, backend):
+        titles = [video['title'] for video in dropout._parse_new_releases(html, backend)]
+        assert 'Some ＂Quoted＂ Title?' in titles
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_no_items(self, backend):
+        assert dropout._parse_new_releases('<html><body><ul></ul></body></html>', backend) == []
+
+    def test_default_backend(self):
+        assert dropout.HTML_BACKEND == ('lxml' if dropout.lxml else 'bs4')
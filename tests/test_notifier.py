@@ -0,0 +1,212 @@
+import pytest
+from flask import Flask
+from flask_smorest import Api
+
+from showsaver import notifier
+from showsaver.routes import sonarr as sonarr_routes
+
+
+@pytest.fixture
+def sonarr_api(monkeypatch):
+    """Stands in for the Sonarr API and records the commands sent."""
+    api = {'commands': [], 'statuses': {}, 'failing': set()}
+    series_ids = {'Game Changer': 1, 'Dimension 20': 2, 'Make Some Noise': 3}
+
+    monkeypatch.setattr(notifier.sonarr, 'is_sonarr_enabled', lambda: True)
+
+    def find_series_by_name(show_name, override_name=None):
+        if 'lookup' in api['failing']:
+            raise ConnectionError('series lookup unavailable')
+        return series_ids.get(override_name)
+
+    monkeypatch.setattr(notifier.sonarr, 'find_series_by_name', find_series_by_name)
+
+    def command(name, payload, command_id):
+        if name in api['failing']:
+            raise ConnectionError(f'{name} unavailable')
+        api['commands'].append((name, payload))
+        return {'id': command_id}
+
+    monkeypatch.setattr(notifier.sonarr, 'rescan_series', lambda series_id: command('RescanSeries', series_id, 100 + series_id))
+    monkeypatch.setattr(notifier.sonarr, 'rename_series', lambda ids: command('RenameSeries', list(ids), 200))
+    monkeypatch.setattr(notifier.sonarr, 'get_command_status', lambda command_id: api['statuses'].get(command_id, 'completed'))
+    return api
+
+
+def _notify(sonarr_notifier, now, *requests):
+    for request in requests:
+        sonarr_notifier.request(*request)
+    sonarr_notifier.drain(now)
+
+
+class TestSonarrNotifier:
+    def test_season_batch_sends_one_rescan(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=60)
+        for minute in range(20):
+            _notify(sonarr_notifier, minute * 30, ('Game Changer',))
+            assert sonarr_notifier.flush(minute * 30) == []
+
+        assert sonarr_notifier.flush(19 * 30 + 60) == [1]
+        assert sonarr_api['commands'] == [('RescanSeries', 1)]
+
+        stats = sonarr_notifier.get_stats()
+        assert stats['commands_requested'] == 20
+        assert stats['commands_sent'] == 1
+        assert stats['commands_saved'] == 19
+        assert stats['series']['1']['commands_saved'] == 19
+        assert stats['series']['1']['state'] == 'idle'
+
+    def test_renames_share_one_command(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=60)
+        _notify(sonarr_notifier, 0,
+                ('Dimension 20', None, True), ('Dimension 20', None, True), ('Make Some Noise', None, True))
+
+        assert sorted(sonarr_notifier.flush(60)) == [2, 3]
+        assert sonarr_api['commands'] == [('RescanSeries', 2), ('RescanSeries', 3), ('RenameSeries', [2, 3])]
+
+        stats = sonarr_notifier.get_stats()
+        assert stats['commands_requested'] == 6
+        assert stats['commands_sent'] == 3
+        assert stats['commands_saved'] == 3
+        assert stats['series']['2']['commands_saved'] == 2
+        assert stats['series']['3']['commands_saved'] == 0
+
+    def test_series_come_due_independently(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=60)
+        _notify(sonarr_notifier, 0, ('Game Changer',))
+        _notify(sonarr_notifier, 50, ('Dimension 20',))
+
+        assert sonarr_notifier.flush(60) == [1]
+        assert sonarr_notifier.flush(110) == [2]
+
+    def test_rename_waits_for_rescan_by_polling(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0)
+        sonarr_api['statuses'][102] = 'started'
+        _notify(sonarr_notifier, 0, ('Dimension 20', None, True))
+
+        sonarr_notifier.flush(0)
+        assert sonarr_api['commands'] == [('RescanSeries', 2)]
+        assert sonarr_notifier.get_stats()['series']['2']['state'] == 'rescanning'
+
+        sonarr_notifier.flush(1)
+        assert len(sonarr_api['commands']) == 1
+
+        sonarr_api['statuses'][102] = 'completed'
+        sonarr_notifier.flush(notifier.COMMAND_POLL_INTERVAL)
+        assert sonarr_api['commands'][-1] == ('RenameSeries', [2])
+
+    def test_rename_goes_ahead_after_rescan_timeout(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0)
+        sonarr_api['statuses'][102] = 'started'
+        _notify(sonarr_notifier, 0, ('Dimension 20', None, True))
+
+        sonarr_notifier.flush(0)
+        sonarr_notifier.flush(notifier.COMMAND_TIMEOUT)
+        assert sonarr_api['commands'][-1] == ('RenameSeries', [2])
+
+    def test_failed_rescan_is_retried_with_backoff(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0, retry_backoff=10)
+        sonarr_api['failing'].add('RescanSeries')
+        _notify(sonarr_notifier, 0, ('Game Changer',))
+
+        sonarr_notifier.flush(0)
+        stats = sonarr_notifier.get_stats()
+        assert stats['retries'] == 1
+        assert stats['last_error'] == 'RescanSeries unavailable'
+        assert stats['series']['1']['state'] == 'retrying'
+
+        # Second attempt waits 10s, the next one 20s
+        assert sonarr_notifier.flush(9) == []
+        assert sonarr_notifier.flush(10) == [1]
+        assert sonarr_notifier.flush(29) == []
+
+        sonarr_api['failing'].clear()
+        assert sonarr_notifier.flush(30) == [1]
+        assert sonarr_api['commands'] == [('RescanSeries', 1)]
+        assert sonarr_notifier.get_stats()['series']['1']['state'] == 'idle'
+
+    def test_failed_rename_retries_without_rescanning_again(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0, retry_backoff=10)
+        sonarr_api['failing'].add('RenameSeries')
+        _notify(sonarr_notifier, 0, ('Dimension 20', None, True))
+        sonarr_notifier.flush(0)
+
+        sonarr_api['failing'].clear()
+        sonarr_notifier.flush(10)
+        assert sonarr_api['commands'] == [('RescanSeries', 2), ('RenameSeries', [2])]
+
+    def test_gives_up_after_max_attempts(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0, max_attempts=2, retry_backoff=1)
+        sonarr_api['failing'].add('RescanSeries')
+        _notify(sonarr_notifier, 0, ('Game Changer',))
+
+        sonarr_notifier.flush(0)
+        sonarr_notifier.flush(1)
+        assert sonarr_notifier.flush(100) == []
+
+        stats = sonarr_notifier.get_stats()
+        assert stats['failed'] == 1
+        assert stats['pending_series'] == 0
+        assert stats['series']['1']['state'] == 'failed'
+
+    def test_failed_lookup_is_retried_with_backoff(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0, retry_backoff=10)
+        sonarr_api['failing'].add('lookup')
+        _notify(sonarr_notifier, 0, ('Game Changer',))
+
+        stats = sonarr_notifier.get_stats()
+        assert stats['pending_lookups'] == 1
+        assert stats['retries'] == 1
+        assert stats['last_error'] == 'series lookup unavailable'
+        assert sonarr_notifier.flush(9) == []
+
+        sonarr_api['failing'].clear()
+        assert sonarr_notifier.flush(10) == [1]
+        assert sonarr_api['commands'] == [('RescanSeries', 1)]
+        assert sonarr_notifier.get_stats()['pending_lookups'] == 0
+
+    def test_failed_lookup_gives_up_after_max_attempts(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0, max_attempts=2, retry_backoff=1)
+        sonarr_api['failing'].add('lookup')
+        _notify(sonarr_notifier, 0, ('Game Changer',))
+        sonarr_notifier.flush(1)
+        sonarr_notifier.flush(100)
+
+        stats = sonarr_notifier.get_stats()
+        assert stats['failed'] == 1
+        assert stats['pending_lookups'] == 0
+
+    def test_unknown_series_is_dropped(self, sonarr_api):
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0)
+        _notify(sonarr_notifier, 0, ('Not In Sonarr',))
+
+        assert sonarr_notifier.flush(0) == []
+        assert sonarr_notifier.get_stats()['commands_requested'] == 0
+
+    def test_disabled_sonarr_queues_nothing(self, sonarr_api, monkeypatch):
+        monkeypatch.setattr(notifier.sonarr, 'is_sonarr_enabled', lambda: False)
+        sonarr_notifier = notifier.SonarrNotifier(quiet_window=0)
+
+        _notify(sonarr_notifier, 0, ('Game Changer',))
+        assert sonarr_notifier.flush(0) == []
+        assert sonarr_api['commands'] == []
+
+
+def test_status_route_reports_notifier_stats(sonarr_api, monkeypatch):
+    sonarr_notifier = notifier.SonarrNotifier(quiet_window=60)
+    _notify(sonarr_notifier, 0, ('Game Changer',), ('Game Changer',))
+    monkeypatch.setattr(sonarr_routes, 'get_sonarr_status',
+                        lambda: {'enabled': True, **sonarr_notifier.get_stats()})
+
+    app = Flask(__name__)
+    app.config.update(API_TITLE='Test API', API_VERSION='1.0.0', OPENAPI_VERSION='3.0.3')
+    api = Api(app)
+    api.register_blueprint(sonarr_routes.bp)
+    response = app.test_client().get('/sonarr/status')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['enabled'] is True
+    assert body['pending_series'] == 1
+    assert body['series']['1']['state'] == 'waiting'
+    assert body['series']['1']['rescans_requested'] == 2
@@ -0,0 +1,180 @@
+import queue
+import sqlite3
+import threading
+
+import pytest
+
+from showsaver import database, downloader, pipeline, state, workers
+
+
+class TestStage:
+    def test_items_flow_through_every_stage(self):
+        done = queue.Queue()
+        first = pipeline.Stage('double', lambda n: n * 2, workers=1)
+        first.then(pipeline.Stage('collect', done.put, workers=1))
+        stage = first
+        while stage:
+            stage.start()
+            stage = stage.next
+
+        for n in range(3):
+            first.inbox.put(n)
+        assert sorted(done.get(timeout=5) for _ in range(3)) == [0, 2, 4]
+
+    def test_none_stops_an_item(self):
+        done = queue.Queue()
+        first = pipeline.Stage('filter', lambda n: n if n % 2 else None, workers=1)
+        first.then(pipeline.Stage('collect', done.put, workers=1))
+        first.start()
+        first.next.start()
+
+        for n in range(4):
+            first.inbox.put(n)
+        first.inbox.join()
+        first.next.inbox.join()
+        assert sorted(done.queue) == [1, 3]
+
+    def test_next_download_overlaps_previous_postprocess(self):
+        """The first stage moves on to the next item while the second is still busy with the previous one."""
+        release = threading.Event()
+        downloaded = []
+        second_download_started = threading.Event()
+
+        def download(n):
+            downloaded.append(n)
+            if n == 2:
+                second_download_started.set()
+            return n
+
+        def postprocess(n):
+            release.wait(timeout=5)
+
+        first = pipeline.Stage('download', download, workers=1)
+        first.then(pipeline.Stage('postprocess', postprocess, workers=1))
+        first.start()
+        first.next.start()
+
+        first.inbox.put(1)
+        first.inbox.put(2)
+        assert second_download_started.wait(timeout=5)
+        release.set()
+
+    def test_on_enqueue_sees_the_next_stage(self):
+        seen = []
+        done = threading.Event()
+        first = pipeline.Stage('a', lambda n: n, workers=1)
+        first.then(pipeline.Stage('b', lambda n: done.set(), workers=1), lambda item, stage: seen.append((item, stage)))
+        first.start()
+        first.next.start()
+
+        first.inbox.put('job')
+        assert done.wait(timeout=5)
+        assert seen == [('job', 'b')]
+
+    def test_worker_survives_a_raising_handler(self):
+        done = queue.Queue()
+        errors = []
+
+        def handler(n):
+            if n == 1:
+                raise RuntimeError('database is locked')
+            return n
+
+        first = pipeline.Stage('a', handler, workers=1, on_error=lambda item, e: errors.append((item, str(e))))
+        first.then(pipeline.Stage('collect', done.put, workers=1))
+        first.start()
+        first.next.start()
+
+        for n in range(1, 4):
+            first.inbox.put(n)
+        assert [done.get(timeout=5) for _ in range(2)] == [2, 3]
+        assert errors == [(1, 'database is locked')]
+
+
+class TestJobStages:
+    @pytest.fixture(autouse=True)
+    def temp_db(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+        database.init_db()
+
+    @pytest.fixture
+    def stages(self, monkeypatch):
+        """Stub stage functions that record the job stage seen by each."""
+        seen = []
+
+        def record(stage):
+            def run(episode, *_args, **_kwargs):
+                job_status = next(iter(state.download_status.values()))
+                seen.append((stage, job_status['stage'], job_status['stage_state']))
+            return run
+
+        monkeypatch.setattr(downloader, 'extract_episode',
+                            lambda url, *_args, **_kwargs: downloader.Episode(url, {'series': 'Game Changer'}))
+        monkeypatch.setattr(downloader, 'download_episode', record('download'))
+        monkeypatch.setattr(downloader, 'postprocess_episode', record('postprocess'))
+        monkeypatch.setattr(downloader, 'place_episode', record('place'))
+        monkeypatch.setattr(downloader, 'notify_episode', record('notify'))
+        return seen
+
+    def _run(self, item):
+        job = workers.extract_job(item)
+        for handler in (workers.download_job, workers.postprocess_job, workers.place_job, workers.notify_job):
+            if job is None:
+                return
+            job = handler(job)
+
+    def test_job_runs_each_stage_then_completes(self, stages):
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        self._run(state.download_queue.get_nowait())
+
+        assert stages == [
+            ('download', 'download', 'running'),
+            ('postprocess', 'postprocess', 'running'),
+            ('place', 'place', 'running'),
+            ('notify', 'notify', 'running'),
+        ]
+        assert state.get_job_status(job_id)['status'] == 'completed'
+        assert database.get_download_job(job_id)['status'] == 'completed'
+
+    def test_failing_stage_fails_the_job(self, stages, monkeypatch):
+        def fail(*_args):
+            raise RuntimeError('ffmpeg exploded')
+
+        monkeypatch.setattr(downloader, 'postprocess_episode', fail)
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        self._run(state.download_queue.get_nowait())
+
+        job_status = state.get_job_status(job_id)
+        assert job_status['status'] == 'failed'
+        assert 'ffmpeg exploded' in job_status['error']
+        assert job_status['stage'] == 'postprocess'
+        assert [stage for stage, _, _ in stages] == ['download']
+
+
+    def test_unhandled_stage_error_fails_the_job(self, stages, monkeypatch):
+        claim_download_job = database.claim_download_job
+        calls = []
+
+        def locked_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError('database is locked')
+            return claim_download_job(*args)
+
+        monkeypatch.setattr(database, 'claim_download_job', locked_once)
+        done = queue.Queue()
+        first = pipeline.Stage(pipeline.EXTRACT, workers.extract_job, 1, on_error=workers._stage_failed)
+        first.then(pipeline.Stage('collect', done.put, 1))
+        first.start()
+        first.next.start()
+
+        failed_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        first.inbox.put(state.download_queue.get_nowait())
+        first.inbox.join()
+        assert state.get_job_status(failed_id)['status'] == 'failed'
+        assert 'database is locked' in state.get_job_status(failed_id)['error']
+
+        # The worker is still there for the next job
+        next_id = state.queue_url('https://watch.dropout.tv/videos/b')
+        first.inbox.put(state.download_queue.get_nowait())
+        assert done.get(timeout=5).id == next_id
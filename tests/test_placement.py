@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from showsaver import placement
+from showsaver.placement import PlacementStrategy, place_file
+
+CONTENT = b'fake video bytes' * 1024
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / 'tmp' / 'episode.mkv'
+    path.parent.mkdir()
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def dst(tmp_path):
+    path = tmp_path / 'tvshows' / 'episode.mkv'
+    path.parent.mkdir()
+    return path
+
+
+def test_move_allowed_renames_on_same_filesystem(src, dst):
+    result = place_file(str(src), str(dst), allow_move=True)
+    assert result.strategy == PlacementStrategy.RENAME
+    assert dst.read_bytes() == CONTENT
+    assert not src.exists()
+
+
+def test_without_move_hardlinks_and_keeps_source(src, dst):
+    result = place_file(str(src), str(dst))
+    assert result.strategy == PlacementStrategy.HARDLINK
+    assert src.exists()
+    assert os.stat(src).st_ino == os.stat(dst).st_ino
+
+
+def test_hardlink_replaces_existing_destination(src, dst):
+    dst.write_bytes(b'old')
+    place_file(str(src), str(dst))
+    assert dst.read_bytes() == CONTENT
+
+
+def test_cross_filesystem_falls_back_to_a_copy(src, dst, monkeypatch):
+    monkeypatch.setattr(placement, '_same_filesystem', lambda _src, _dst: False)
+    result = place_file(str(src), str(dst), allow_move=True)
+    assert result.strategy not in (PlacementStrategy.RENAME, PlacementStrategy.HARDLINK)
+    assert src.exists()
+    assert dst.read_bytes() == CONTENT
+    assert os.stat(src).st_ino != os.stat(dst).st_ino
+
+
+def test_falls_through_every_failing_strategy_to_buffered_copy(src, dst, monkeypatch):
+    def _fail(_src, _dst):
+        raise OSError('not supported')
+
+    for name in ('_hardlink', '_reflink', '_copy_file_range', '_sendfile'):
+        monkeypatch.setattr(placement, name, _fail)
+    src.chmod(0o640)
+
+    result = place_file(str(src), str(dst))
+
+    assert result.strategy == PlacementStrategy.BUFFERED_COPY
+    assert result.seconds >= 0
+    assert dst.read_bytes() == CONTENT
+    assert (dst.stat().st_mode & 0o777) == 0o640
+
+
+@pytest.mark.parametrize('copy_fn', ['_copy_file_range', '_sendfile', '_buffered_copy'])
+def test_copy_strategies_copy_full_contents(src, dst, copy_fn):
+    if copy_fn == '_copy_file_range' and not hasattr(os, 'copy_file_range'):
+        pytest.skip('copy_file_range unavailable')
+    if copy_fn == '_sendfile' and not hasattr(os, 'sendfile'):
+        pytest.skip('sendfile unavailable')
+    getattr(placement, copy_fn)(str(src), str(dst))
+    assert dst.read_bytes() == CONTENT
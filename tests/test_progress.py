@@ -0,0 +1,86 @@
+from showsaver import downloader
+from showsaver.progress import ProgressPublisher, ProgressUpdate, StreamType
+
+
+def _update(percent=50.0):
+    return ProgressUpdate(
+        percent=percent, total_bytes=100.0, speed_bytes=10.0, eta=5.0,
+        step=1, total_steps=2, step_type=StreamType.VIDEO,
+    )
+
+
+class TestProgressPublisher:
+    def test_latest_update_wins(self):
+        publisher = ProgressPublisher(1, lambda: None)
+        publisher.publish('job', _update(10))
+        publisher.publish('job', _update(20))
+        assert publisher.get('job').percent == 20
+        assert publisher.pop('job').percent == 20
+        assert publisher.get('job') is None
+
+    def test_flush_coalesces_publishes(self):
+        changes = []
+        publisher = ProgressPublisher(1, lambda: changes.append(1))
+        for percent in range(10):
+            publisher.publish('job', _update(percent))
+        assert publisher.flush() is True
+        assert publisher.flush() is False
+        assert changes == [1]
+
+    def test_as_fields_matches_job_status_fields(self):
+        assert _update(42.9).as_fields() == {
+            'progress': 42,
+            'total_bytes': 100.0,
+            'speed_bytes': 10.0,
+            'eta': 5.0,
+            'step': 1,
+            'step_type': 'video',
+            'total_steps': 2,
+        }
+
+
+def _hook_call(filename='video.mp4', downloaded=10, total=100, vcodec='avc1', acodec='none'):
+    return {
+        'status': 'downloading',
+        'filename': filename,
+        'downloaded_bytes': downloaded,
+        'total_bytes': total,
+        'speed': 1.0,
+        'eta': 1.0,
+        'info_dict': {'vcodec': vcodec, 'acodec': acodec},
+    }
+
+
+class TestProgressHook:
+    def test_updates_are_throttled(self):
+        updates = []
+        hook = downloader.make_progress_hook(updates.append, interval=60)
+        for downloaded in range(10, 60, 10):
+            hook(_hook_call(downloaded=downloaded))
+        assert [u.percent for u in updates] == [10.0]
+
+    def test_step_changes_and_completion_always_report(self):
+        updates = []
+        hook = downloader.make_progress_hook(updates.append, interval=60)
+        hook(_hook_call(downloaded=10))
+        hook(_hook_call(downloaded=50))
+        hook(_hook_call(downloaded=100))
+        hook(_hook_call(filename='audio.m4a', downloaded=5, vcodec='none', acodec='mp4a'))
+        assert [(u.percent, u.step, u.step_type) for u in updates] == [
+            (10.0, 1, StreamType.VIDEO),
+            (100.0, 1, StreamType.VIDEO),
+            (5.0, 2, StreamType.AUDIO),
+        ]
+
+    def test_zero_interval_reports_every_call(self):
+        updates = []
+        hook = downloader.make_progress_hook(updates.append, interval=0)
+        for downloaded in range(10, 60, 10):
+            hook(_hook_call(downloaded=downloaded))
+        assert len(updates) == 5
+
+    def test_non_downloading_status_is_ignored(self):
+        updates = []
+        hook = downloader.make_progress_hook(updates.append, interval=0)
+        hook({'status': 'finished'})
+        assert updates == []
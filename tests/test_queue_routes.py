@@ -0,0 +1,141 @@
+import json
+
+import pytest
+from flask import Flask
+from flask_smorest import Api
+
+from showsaver import database, state
+from showsaver.routes import downloads
+from showsaver.routes.downloads import bp as downloads_bp
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    database.init_db()
+    app = Flask(__name__)
+    app.config.update(
+        API_TITLE='Test API',
+        API_VERSION='1.0.0',
+        OPENAPI_VERSION='3.0.3',
+    )
+    api = Api(app)
+    api.register_blueprint(downloads_bp)
+    with app.test_client() as test_client:
+        yield test_client
+
+
+def _read_events(chunks, count):
+    """Parse the next count events off a streaming response body."""
+    events = []
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk.decode() if isinstance(chunk, bytes) else chunk
+        while '\n\n' in buffer:
+            block, buffer = buffer.split('\n\n', 1)
+            lines = dict(line.split(': ', 1) for line in block.splitlines() if line.startswith(('event', 'data')))
+            if 'event' in lines:
+                events.append((lines['event'], json.loads(lines['data'])))
+            if len(events) == count:
+                return events
+    return events
+
+
+class TestQueue:
+    def test_queue_lists_active_jobs(self, client):
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        data = client.get('/queue').get_json()
+        assert [j['id'] for j in data['queued']] == [job_id]
+        assert data['total_queue_size'] == 1
+
+
+class TestQueueETag:
+    def test_unchanged_queue_is_not_modified(self, client, monkeypatch):
+        state.queue_url('https://watch.dropout.tv/videos/a')
+        first = client.get('/queue')
+        assert first.headers['ETag']
+
+        # Revalidation must not need the state lock
+        monkeypatch.setattr(downloads, 'get_queue_snapshot', None)
+        second = client.get('/queue', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+        assert second.headers['ETag'] == first.headers['ETag']
+
+    def test_change_invalidates_etag(self, client):
+        first = client.get('/queue')
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        second = client.get('/queue', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 200
+        assert second.headers['ETag'] != first.headers['ETag']
+        assert [j['id'] for j in second.get_json()['queued']] == [job_id]
+
+    def test_body_is_built_once_per_version(self, client, monkeypatch):
+        calls = []
+        snapshot = downloads.get_queue_snapshot
+        monkeypatch.setattr(downloads, 'get_queue_snapshot', lambda: calls.append(1) or snapshot())
+        assert client.get('/queue').get_data() == client.get('/queue').get_data()
+        assert len(calls) == 1
+
+
+class TestQueueDelta:
+    def _payload(self, queued=(), downloading=(), completed=(), stages=None):
+        return {'queued': list(queued), 'downloading': list(downloading), 'completed': list(completed), 'stages': stages or {}}
+
+    def test_no_changes_is_empty(self):
+        payload = self._payload(queued=[{'id': 'a', 'status': 'queued'}])
+        assert downloads._queue_delta(payload, payload) == {}
+
+    def test_only_changed_fields_are_sent(self):
+        before = self._payload(downloading=[{'id': 'a', 'status': 'downloading', 'progress': 10, 'url': 'u'}])
+        after = self._payload(downloading=[{'id': 'a', 'status': 'downloading', 'progress': 20, 'url': 'u'}])
+        assert downloads._queue_delta(before, after) == {'changed': [{'id': 'a', 'progress': 20}]}
+
+    def test_new_jobs_are_sent_whole_and_finished_jobs_removed(self):
+        done = {'id': 'a', 'status': 'completed'}
+        before = self._payload(downloading=[{'id': 'a', 'status': 'downloading'}])
+        after = self._payload(queued=[{'id': 'b', 'status': 'queued', 'url': 'u'}], completed=[done])
+        assert downloads._queue_delta(before, after) == {
+            'changed': [{'id': 'b', 'status': 'queued', 'url': 'u'}],
+            'removed': ['a'],
+            'completed': [done],
+        }
+
+    def test_stage_backlog_is_resent_when_it_changes(self):
+        before = self._payload(stages={'download': {'waiting': 0, 'running': 1}})
+        after = self._payload(stages={'download': {'waiting': 1, 'running': 1}})
+        assert downloads._queue_delta(before, after) == {'stages': {'download': {'waiting': 1, 'running': 1}}}
+
+
+class TestQueueEvents:
+    def test_snapshot_then_deltas(self, client, monkeypatch):
+        monkeypatch.setattr(downloads, 'QUEUE_EVENTS_KEEPALIVE', 0.01)
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+
+        response = client.get('/queue/events', buffered=False)
+        assert response.mimetype == 'text/event-stream'
+        stream = iter(response.response)
+
+        (event, snapshot), = _read_events(stream, 1)
+        assert event == 'snapshot'
+        assert [j['id'] for j in snapshot['queued']] == [job_id]
+
+        state.set_job_status(job_id, 'downloading')
+        (event, delta), = _read_events(stream, 1)
+        assert event == 'delta'
+        assert delta['changed'] == [{'id': job_id, 'status': 'downloading'}]
+        assert delta['version'] == state.get_state_version()
+        response.close()
+
+    def test_streams_over_the_limit_get_503(self, client, monkeypatch):
+        monkeypatch.setattr(downloads, '_queue_event_streams', downloads.threading.BoundedSemaphore(1))
+
+        first = client.get('/queue/events', buffered=False)
+        assert first.status_code == 200
+        over = client.get('/queue/events', buffered=False)
+        assert over.status_code == 503
+        assert over.headers['Retry-After'] == str(downloads.QUEUE_EVENTS_RETRY_AFTER)
+
+        first.close()
+        again = client.get('/queue/events', buffered=False)
+        assert again.status_code == 200
+        again.close()
@@ -0,0 +1,22 @@
+import time
+
+from showsaver.ratelimit import HostRateLimiter
+
+
+def test_disabled_limiter_never_waits():
+    limiter = HostRateLimiter(0)
+    assert all(limiter.wait('watch.dropout.tv') == 0.0 for _ in range(10))
+
+
+def test_requests_to_one_host_are_spaced_out():
+    limiter = HostRateLimiter(50)  # 20ms apart
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.wait('watch.dropout.tv')
+    assert time.monotonic() - start >= 0.055
+
+
+def test_hosts_are_limited_independently():
+    limiter = HostRateLimiter(1)
+    limiter.wait('a.example')
+    assert limiter.wait('b.example') == 0.0
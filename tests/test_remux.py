@@ -0,0 +1,107 @@
+import pytest
+import yt_dlp
+
+from showsaver import downloader
+from showsaver.remux import SinglePassPP, run_postprocessors
+
+DURATION = 600.0
+SPONSOR = {'start_time': 0.0, 'end_time': 30.0, 'category': 'sponsor', 'category_names': ['Sponsor'],
+           'title': 'Sponsor', 'type': 'skip', '_categories': [('sponsor', 0.0, 30.0, 'Sponsor')]}
+
+
+@pytest.fixture
+def episode(tmp_path):
+    video = tmp_path / 'episode.mp4'
+    video.write_bytes(b'video')
+    subtitle = tmp_path / 'episode.en.vtt'
+    subtitle.write_text('WEBVTT\n')
+    return {
+        'id': 'ep', 'title': 'Ep', 'ext': 'mp4', 'duration': DURATION, 'filepath': str(video),
+        'chapters': [{'start_time': 0.0, 'end_time': DURATION, 'title': 'Ep'}],
+        'sponsorblock_chapters': [],
+        'requested_subtitles': {'en': {'ext': 'vtt', 'filepath': str(subtitle)}},
+    }
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """Records ffmpeg runs instead of starting ffmpeg; each run writes a 4 KiB output."""
+    runs = []
+
+    def real_run_ffmpeg(self, input_path_opts, output_path_opts):
+        runs.append((input_path_opts, output_path_opts))
+        for path, _opts in output_path_opts:
+            with open(path, 'wb') as f:
+                f.write(b'\0' * 4096)
+        return ''
+
+    monkeypatch.setattr(yt_dlp.postprocessor.FFmpegPostProcessor, 'real_run_ffmpeg', real_run_ffmpeg)
+    monkeypatch.setattr(yt_dlp.postprocessor.FFmpegPostProcessor, 'available', True)
+    monkeypatch.setattr(SinglePassPP, '_get_real_video_duration', lambda self, _path: DURATION)
+    return runs
+
+
+def _postprocess(info):
+    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as yt:
+        pp = SinglePassPP(yt, remove_sponsor_segments=['sponsor'], already_have_subtitle=False)
+        return run_postprocessors(yt, [pp], info)
+
+
+class TestSinglePassPP:
+    def test_cut_chapters_and_subtitles_in_one_run(self, episode, ffmpeg, tmp_path):
+        episode['sponsorblock_chapters'] = [SPONSOR]
+        info, stats = _postprocess(episode)
+
+        assert len(ffmpeg) == 1
+        inputs, [(output, opts)] = ffmpeg[0]
+        # Video and subtitle are both cut; the rewritten chapters come from a metadata input
+        assert [opts for _path, opts in inputs] == [['-f', 'concat', '-safe', '0']] * 2 + [[]]
+        assert opts[opts.index('-map_chapters') + 1] == '2'
+        assert ['-map', '1:0'] == opts[opts.index('1:0') - 1:opts.index('1:0') + 1]
+        assert output.endswith('.temp.mp4')
+
+        assert info['duration'] == DURATION - 30
+        assert info['chapters'][0]['start_time'] == 0
+        assert stats.bytes_rewritten == 4096
+        assert stats.ffmpeg_seconds > 0
+        # Work files and the embedded subtitle are cleaned up
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['episode.mp4']
+
+    def test_no_segments_skips_the_cut(self, episode, ffmpeg):
+        _info, stats = _postprocess(episode)
+
+        assert len(ffmpeg) == 1
+        inputs, [(_output, opts)] = ffmpeg[0]
+        assert inputs == [(episode['filepath'], []), (episode['requested_subtitles']['en']['filepath'], [])]
+        assert '-map_chapters' not in opts
+        assert stats.bytes_rewritten == 4096
+
+    def test_nothing_to_do_leaves_the_file_alone(self, episode, ffmpeg):
+        episode['requested_subtitles'] = {}
+        info, stats = _postprocess(episode)
+
+        assert ffmpeg == []
+        assert stats.bytes_rewritten == 0
+        assert stats.ffmpeg_seconds == 0
+        assert info['chapters'] == [{'start_time': 0.0, 'end_time': DURATION, 'title': 'Ep'}]
+
+    def test_cut_without_subtitles_keeps_existing_subtitle_streams(self, episode, ffmpeg):
+        episode['requested_subtitles'] = {}
+        episode['sponsorblock_chapters'] = [SPONSOR]
+        _postprocess(episode)
+
+        [(inputs, [(_output, opts)])] = ffmpeg
+        assert len(inputs) == 2
+        assert '-0:s' not in opts
+
+
+def test_separate_mode_counts_each_rewrite(episode, ffmpeg, monkeypatch):
+    monkeypatch.setattr(downloader, 'POSTPROCESS_MODE', 'separate')
+    monkeypatch.setattr(yt_dlp.postprocessor.ModifyChaptersPP, '_get_real_video_duration', lambda self, _path: DURATION)
+    episode['sponsorblock_chapters'] = [SPONSOR]
+
+    _show_path, stats = downloader.postprocess_show(episode['filepath'], episode)
+
+    # ModifyChapters cuts the video and the subtitle separately, then FFmpegEmbedSubtitle writes the video again
+    assert len(ffmpeg) == 3
+    assert stats.bytes_rewritten == 2 * 4096
@@ -0,0 +1,108 @@
+import pytest
+
+from showsaver import database, downloader
+
+SLUG = 'poppy-persona-non-grata'
+SHOW_URL = f'https://watch.dropout.tv/videos/{SLUG}'
+D20_INFO = {'series': 'Dimension 20: Some Campaign'}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    database.init_db()
+    return database
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Answers HEAD probes from a set of URLs that exist and records every probe sent."""
+    state = {'existing': set(), 'probed': [], 'unextractable': set()}
+
+    def _probe(url):
+        state['probed'].append(url)
+        return url in state['existing']
+
+    def _get_metadata(url):
+        if url in state['unextractable']:
+            raise downloader.yt_dlp.utils.DownloadError(f'Unable to extract {url}')
+        return {'series': 'Dimension 20', 'webpage_url': url}
+
+    monkeypatch.setattr(downloader, '_probe_url', _probe)
+    monkeypatch.setattr(downloader, 'get_metadata', _get_metadata)
+    return state
+
+
+def _season_url(season):
+    return downloader.DIM20_SEASON_URL.format(season=season, slug=SLUG)
+
+
+def test_non_dim20_show_is_not_probed(db, probes):
+    assert downloader.find_corrected_url(SHOW_URL, {'series': 'Game Changer'}) == (None, None)
+    assert probes['probed'] == []
+
+
+def test_probe_finds_season_and_persists_it(db, probes):
+    probes['existing'] = {_season_url(27)}
+
+    url, info = downloader.find_corrected_url(SHOW_URL, D20_INFO)
+
+    assert url == _season_url(27)
+    assert info['webpage_url'] == _season_url(27)
+    assert db.get_dropout_season_url(SLUG)['season'] == 27
+
+
+def test_lowest_matching_season_wins_within_a_batch(db, probes):
+    probes['existing'] = {_season_url(3), _season_url(5)}
+    url, _ = downloader.find_corrected_url(SHOW_URL, D20_INFO)
+    assert url == _season_url(3)
+
+
+def test_cached_slug_sends_no_probes(db, probes):
+    db.upsert_dropout_season_url(SLUG, _season_url(12), 12)
+
+    url, _ = downloader.find_corrected_url(SHOW_URL, D20_INFO)
+
+    assert url == _season_url(12)
+    assert probes['probed'] == []
+
+
+def test_recently_matched_seasons_are_probed_first(db, probes):
+    db.upsert_dropout_season_url('other-episode', downloader.DIM20_SEASON_URL.format(season=30, slug='other-episode'), 30)
+    probes['existing'] = {_season_url(30)}
+
+    downloader.find_corrected_url(SHOW_URL, D20_INFO)
+
+    assert probes['probed'][0] == _season_url(30)
+    assert len(probes['probed']) <= downloader.SEASON_PROBE_WORKERS
+
+
+def test_no_match_returns_none(db, probes):
+    assert downloader.find_corrected_url(SHOW_URL, D20_INFO) == (None, None)
+    assert len(probes['probed']) == downloader.MAX_PROBE_SEASON
+
+
+@pytest.mark.parametrize('status_code, found', [(200, True), (301, True), (404, False), (403, False), (429, False), (503, False)])
+def test_only_success_and_redirect_count_as_found(monkeypatch, status_code, found):
+    monkeypatch.setattr(downloader._probe_session, 'head', lambda url, timeout: type('R', (), {'status_code': status_code})())
+    assert downloader._probe_url(_season_url(1)) is found
+
+
+def test_probe_hit_that_fails_extraction_is_not_persisted(db, probes):
+    probes['existing'] = {_season_url(4)}
+    probes['unextractable'] = {_season_url(4)}
+
+    assert downloader.find_corrected_url(SHOW_URL, D20_INFO) == (None, None)
+    assert db.get_dropout_season_url(SLUG) is None
+    assert db.get_recent_dropout_seasons(5) == []
+
+
+def test_cached_url_that_fails_extraction_is_forgotten(db, probes):
+    db.upsert_dropout_season_url(SLUG, _season_url(12), 12)
+    probes['unextractable'] = {_season_url(12)}
+    probes['existing'] = {_season_url(27)}
+
+    url, _ = downloader.find_corrected_url(SHOW_URL, D20_INFO)
+
+    assert url == _season_url(27)
+    assert db.get_dropout_season_url(SLUG)['season'] == 27
@@ -0,0 +1,100 @@
+import pytest
+
+from showsaver import database, shared_state, state
+
+
+@pytest.fixture(autouse=True)
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    monkeypatch.setattr(shared_state, 'SHARED_STATE_POLL_INTERVAL', 0.01)
+    database.init_db()
+
+
+URL = 'https://watch.dropout.tv/videos/a'
+
+
+class TestWebSide:
+    def test_queue_url_dedupes_through_the_database(self):
+        job_id = shared_state.queue_url(URL)
+        assert job_id
+        assert shared_state.queue_url(URL) == ''
+        assert shared_state.count_jobs('queued') == 1
+
+    def test_failed_url_can_be_queued_again(self):
+        job_id = shared_state.queue_url(URL)
+        database.finish_download_job(job_id, 'failed', 'now', 'boom')
+        assert shared_state.queue_url(URL)
+
+    def test_empty_state_before_the_downloader_publishes(self):
+        version, snapshot = shared_state.get_queue_snapshot()
+        assert version == ''
+        assert snapshot['queued'] == snapshot['downloading'] == snapshot['completed'] == []
+        assert snapshot['stages']['extract'] == {'waiting': 0, 'running': 0}
+        assert shared_state.get_metadata_stats()['queue_depth'] == 0
+        assert shared_state.get_sonarr_status()['pending_series'] == 0
+
+    def test_queued_jobs_show_before_the_downloader_publishes(self):
+        job_id = shared_state.queue_url(URL)
+
+        version, snapshot = shared_state.get_queue_snapshot()
+        assert [j['id'] for j in snapshot['queued']] == [job_id]
+        assert snapshot['stages']['extract']['waiting'] == 1
+        assert version and shared_state.get_state_version() == version
+        assert shared_state.wait_for_state_change('', timeout=0.02) == version
+
+    def test_job_status_falls_back_to_the_persisted_row(self):
+        job_id = shared_state.queue_url(URL)
+        job_status = shared_state.get_job_status(job_id)
+        assert job_status['status'] == 'queued'
+        assert job_status['url'] == URL
+        assert shared_state.get_job_status('missing') is None
+
+    def test_wait_times_out_without_changes(self):
+        assert shared_state.wait_for_state_change('', timeout=0.02) == ''
+
+
+class TestRoundTrip:
+    def test_downloader_picks_up_web_jobs_and_publishes_them(self):
+        job_id = shared_state.queue_url(URL)
+
+        shared_state.ingest_requests('')
+        assert state.download_status[job_id]['status'] == 'queued'
+        assert state.download_queue.get_nowait() == {'id': job_id, 'url': URL}
+
+        shared_state.publish_queue()
+        version, snapshot = shared_state.get_queue_snapshot()
+        assert version.endswith(f'.{state.get_state_version()}')
+        assert [j['id'] for j in snapshot['queued']] == [job_id]
+        assert shared_state.get_job_status(job_id)['id'] == job_id
+
+    def test_jobs_are_picked_up_once(self):
+        shared_state.queue_url(URL)
+        shared_state.ingest_requests('')
+        shared_state.ingest_requests('')
+        assert state.download_queue.qsize() == 1
+
+    def test_state_change_is_seen_by_waiters(self):
+        shared_state.publish_queue()
+        version = shared_state.get_state_version()
+        state.queue_url(URL)
+        shared_state.publish_queue()
+        assert shared_state.wait_for_state_change(version, timeout=1) != version
+
+    def test_metadata_requests_keep_most_urgent_priority(self):
+        shared_state.queue_metadata(URL, 'a', state.METADATA_PRIORITY_BACKLOG)
+        shared_state.queue_metadata(URL, 'a', state.METADATA_PRIORITY_VISIBLE)
+        shared_state.ingest_requests('')
+        assert state.metadata_in_flight == {'a': state.METADATA_PRIORITY_VISIBLE}
+        assert database.take_metadata_requests() == []
+
+    def test_history_clear_is_applied_once(self):
+        job_id = state.queue_url(URL)
+        state.set_job_status(job_id, 'completed', record_history=True)
+
+        handled = shared_state.ingest_requests('')
+        assert len(state.download_history) == 1
+
+        shared_state.clear_completed_jobs()
+        handled = shared_state.ingest_requests(handled)
+        assert state.download_history == []
+        assert shared_state.ingest_requests(handled) == handled
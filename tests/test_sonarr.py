@@ -0,0 +1,88 @@
+import pytest
+
+from showsaver import sonarr
+
+
+SERIES = [
+    {'id': 1, 'title': 'Dimension 20'},
+    {'id': 2, 'title': 'Game Changer'},
+    {'id': 3, 'title': 'Very Important People'},
+]
+
+
+@pytest.fixture
+def library(monkeypatch):
+    """Serve a mutable series list and count library fetches."""
+    state = {'series': list(SERIES), 'fetches': 0}
+
+    def get_all_series():
+        state['fetches'] += 1
+        return state['series']
+
+    monkeypatch.setattr(sonarr, 'get_all_series', get_all_series)
+    monkeypatch.setattr(sonarr, '_series_index', None)
+    return state
+
+
+class TestFindSeriesByName:
+    def test_exact_match_is_case_insensitive(self, library):
+        assert sonarr.find_series_by_name('game changer') == 2
+
+    def test_override_then_original_then_substring(self, library):
+        assert sonarr.find_series_by_name('Game Changer', override_name='Dimension 20') == 1
+        assert sonarr.find_series_by_name('Game Changer', override_name='Unknown Name') == 2
+        assert sonarr.find_series_by_name('Important') == 3
+
+    def test_hits_are_served_from_the_cached_index(self, library):
+        for _ in range(5):
+            assert sonarr.find_series_by_name('Dimension 20') == 1
+            assert sonarr.find_series_by_name('Important') == 3
+        assert library['fetches'] == 1
+
+    def test_miss_refreshes_once(self, library):
+        sonarr.find_series_by_name('Dimension 20')
+        library['series'] = library['series'] + [{'id': 4, 'title': 'Make Some Noise'}]
+
+        assert sonarr.find_series_by_name('Make Some Noise') == 4
+        assert library['fetches'] == 2
+
+        assert sonarr.find_series_by_name('Not In Sonarr') is None
+        assert library['fetches'] == 3
+
+    def test_first_fetch_miss_does_not_refetch(self, library):
+        assert sonarr.find_series_by_name('Not In Sonarr') is None
+        assert library['fetches'] == 1
+
+    def test_expired_index_is_rebuilt(self, library, monkeypatch):
+        sonarr.find_series_by_name('Dimension 20')
+        monkeypatch.setattr(sonarr, 'SONARR_SERIES_CACHE_TTL', -1)
+        sonarr.find_series_by_name('Dimension 20')
+        assert library['fetches'] == 2
+
+
+def test_all_calls_share_one_session(monkeypatch):
+    calls = []
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {'id': 7, 'status': 'completed'}
+
+    def record(method):
+        def call(url, **kwargs):
+            calls.append((method, url))
+            return Response()
+        return call
+
+    monkeypatch.setattr(sonarr._session, 'get', record('get'))
+    monkeypatch.setattr(sonarr._session, 'post', record('post'))
+    monkeypatch.setattr(sonarr.requests, 'get', None)
+    monkeypatch.setattr(sonarr.requests, 'post', None)
+
+    sonarr.get_all_series()
+    sonarr.rescan_series(1)
+    sonarr.rename_series([1])
+    assert sonarr.get_command_status(7) == 'completed'
+    assert [method for method, _ in calls] == ['get', 'post', 'post', 'get']
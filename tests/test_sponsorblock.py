@@ -0,0 +1,144 @@
+import hashlib
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import yt_dlp
+
+from showsaver import database
+from showsaver.sponsorblock import CachedSponsorBlockPP
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+CATEGORIES = ['sponsor', 'intro']
+SEGMENT = {'segment': [10.0, 20.0], 'category': 'sponsor', 'actionType': 'skip', 'videoDuration': 100.0, 'description': ''}
+
+
+@pytest.fixture
+def sponsorblock_server():
+    """Local stand-in for the SponsorBlock API. Set 'segments' per video id, or 'status' to fail requests."""
+    server_state = {'segments': {}, 'status': 200, 'requests': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server_state['requests'].append(self.path)
+            if server_state['status'] != 200:
+                self.send_error(server_state['status'])
+                return
+            prefix = self.path.split('/api/skipSegments/', 1)[1].split('?', 1)[0]
+            matches = [
+                {'videoID': video_id, 'segments': segments}
+                for video_id, segments in server_state['segments'].items()
+                if hashlib.sha256(video_id.encode('ascii')).hexdigest().startswith(prefix)
+            ]
+            if not matches:
+                self.send_error(404)
+                return
+            body = json.dumps(matches).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    server_state['url'] = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server_state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    database.init_db()
+
+
+@pytest.fixture
+def make_pp(sponsorblock_server):
+    ydls = []
+
+    def make(**kwargs):
+        ydl = yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True, 'extractor_retries': 0})
+        ydls.append(ydl)
+        return CachedSponsorBlockPP(ydl, categories=CATEGORIES, api=sponsorblock_server['url'], **kwargs)
+
+    yield make
+    for ydl in ydls:
+        ydl.close()
+
+
+class TestCachedSponsorBlockPP:
+    def test_segments_are_fetched_once(self, sponsorblock_server, make_pp):
+        sponsorblock_server['segments'][VIDEO_ID] = [SEGMENT]
+        pp = make_pp()
+
+        assert pp._get_sponsor_segments(VIDEO_ID, 'YouTube') == [SEGMENT]
+        assert pp._get_sponsor_segments(VIDEO_ID, 'YouTube') == [SEGMENT]
+        assert len(sponsorblock_server['requests']) == 1
+
+    def test_no_segments_is_cached_for_the_negative_ttl(self, sponsorblock_server, make_pp):
+        pp = make_pp(negative_ttl=3600)
+
+        assert pp._get_sponsor_segments(VIDEO_ID, 'YouTube') == []
+        assert pp._get_sponsor_segments(VIDEO_ID, 'YouTube') == []
+        assert len(sponsorblock_server['requests']) == 1
+        assert database.get_sponsorblock_segments(VIDEO_ID, 'YouTube')['segments'] == []
+
+    def test_expired_entries_are_refetched(self, sponsorblock_server, make_pp):
+        pp = make_pp(negative_ttl=0)
+        assert pp._get_sponsor_segments(VIDEO_ID, 'YouTube') == []
+
+        sponsorblock_server['segments'][VIDEO_ID] = [SEGMENT]
+        assert pp._get_sponsor_segments(VIDEO_ID, 'YouTube') == [SEGMENT]
+        assert len(sponsorblock_server['requests']) == 2
+
+    def test_other_categories_are_refetched(self, sponsorblock_server, make_pp):
+        sponsorblock_server['segments'][VIDEO_ID] = [SEGMENT]
+        database.upsert_sponsorblock_segments(VIDEO_ID, 'YouTube', ['outro'], [])
+
+        assert make_pp()._get_sponsor_segments(VIDEO_ID, 'YouTube') == [SEGMENT]
+        assert len(sponsorblock_server['requests']) == 1
+
+    def test_failing_api_falls_back_to_stale_segments(self, sponsorblock_server, make_pp):
+        sponsorblock_server['segments'][VIDEO_ID] = [SEGMENT]
+        make_pp()._get_sponsor_segments(VIDEO_ID, 'YouTube')
+
+        sponsorblock_server['status'] = 500
+        assert make_pp(cache_ttl=0)._get_sponsor_segments(VIDEO_ID, 'YouTube') == [SEGMENT]
+
+    def test_failing_api_without_cache_skips_segments(self, sponsorblock_server, make_pp):
+        sponsorblock_server['status'] = 500
+        assert make_pp()._get_sponsor_segments(VIDEO_ID, 'YouTube') == []
+        assert database.get_sponsorblock_segments(VIDEO_ID, 'YouTube') is None
+
+    def test_offline_uses_only_the_cache(self, sponsorblock_server, make_pp):
+        database.upsert_sponsorblock_segments(VIDEO_ID, 'YouTube', CATEGORIES, [SEGMENT])
+        pp = make_pp(offline=True, cache_ttl=0)
+
+        assert pp._get_sponsor_segments(VIDEO_ID, 'YouTube') == [SEGMENT]
+        assert pp._get_sponsor_segments('unknownvid1', 'YouTube') == []
+        assert sponsorblock_server['requests'] == []
+
+    def test_run_builds_chapters_from_cached_segments(self, sponsorblock_server, make_pp):
+        sponsorblock_server['segments'][VIDEO_ID] = [SEGMENT]
+        info = {'id': VIDEO_ID, 'extractor_key': 'Youtube', 'duration': 100.0}
+
+        _, info = make_pp().run(info)
+        [chapter] = info['sponsorblock_chapters']
+        assert (chapter['start_time'], chapter['end_time'], chapter['category']) == (10.0, 20.0, 'sponsor')
+
+
+def test_cached_entries_record_fetch_time():
+    before = time.time()
+    database.upsert_sponsorblock_segments(VIDEO_ID, 'YouTube', CATEGORIES, [SEGMENT])
+    entry = database.get_sponsorblock_segments(VIDEO_ID, 'YouTube')
+    assert entry['fetched_at'] >= before
+    assert entry['categories'] == CATEGORIES
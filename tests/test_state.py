@@ -0,0 +1,290 @@
+import threading
+
+import pytest
+
+from showsaver import database, pipeline, state
+from showsaver.progress import ProgressUpdate, StreamType
+
+
+@pytest.fixture(autouse=True)
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    database.init_db()
+
+
+def test_queue_url_skips_duplicate():
+    assert state.queue_url('https://watch.dropout.tv/videos/a')
+    assert state.queue_url('https://watch.dropout.tv/videos/a') == ''
+    assert state.download_queue.qsize() == 1
+
+
+def test_queue_url_allows_requeue_after_failure():
+    job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+    state.set_job_status(job_id, 'failed', error='boom')
+    assert state.queue_url('https://watch.dropout.tv/videos/a')
+
+
+def test_concurrent_queue_url_queues_each_url_once():
+    urls = [f'https://watch.dropout.tv/videos/ep-{i}' for i in range(50)]
+    barrier = threading.Barrier(4)
+
+    def submit_all():
+        barrier.wait()
+        for url in urls:
+            state.queue_url(url)
+
+    threads = [threading.Thread(target=submit_all) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert state.download_queue.qsize() == len(urls)
+    assert sorted(s['url'] for s in state.download_status.values()) == sorted(urls)
+
+
+def test_queued_count_tracks_transitions():
+    first = state.queue_url('https://watch.dropout.tv/videos/a')
+    state.queue_url('https://watch.dropout.tv/videos/b')
+    assert state.count_jobs('queued') == 2
+
+    state.set_job_status(first, 'downloading')
+    assert state.count_jobs('queued') == 1
+    assert state.count_jobs('downloading') == 1
+
+    state.set_job_status(first, 'completed', record_history=True)
+    assert state.count_jobs('downloading') == 0
+    assert [h['id'] for h in state.download_history] == [first]
+
+
+def test_completed_url_is_duplicate_until_history_cleared():
+    job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+    state.set_job_status(job_id, 'completed', record_history=True)
+    assert state.queue_url('https://watch.dropout.tv/videos/a') == ''
+
+    state.clear_completed_jobs()
+
+    assert state.count_jobs('completed') == 0
+    assert state.queue_url('https://watch.dropout.tv/videos/a')
+
+
+def test_removed_job_frees_its_url():
+    job_id = state.queue_url('https://watch.dropout.tv/playlist')
+    state.remove_job(job_id)
+    assert state.count_jobs('queued') == 0
+    assert state.queue_url('https://watch.dropout.tv/playlist')
+
+
+def test_job_ids_are_unique_within_the_same_second():
+    job_ids = {state.queue_url(f'https://watch.dropout.tv/videos/ep-{i}') for i in range(100)}
+    assert len(job_ids) == 100
+
+
+class TestStateVersion:
+    def test_every_job_mutation_bumps_version(self):
+        versions = [state.get_state_version()]
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        versions.append(state.get_state_version())
+        state.set_job_status(job_id, 'downloading')
+        versions.append(state.get_state_version())
+        state.update_job(job_id, progress=50)
+        versions.append(state.get_state_version())
+        state.set_job_status(job_id, 'completed', record_history=True)
+        versions.append(state.get_state_version())
+        state.clear_completed_jobs()
+        versions.append(state.get_state_version())
+        assert versions == sorted(set(versions))
+
+    def test_wait_returns_immediately_when_already_changed(self):
+        version = state.get_state_version()
+        state.queue_url('https://watch.dropout.tv/videos/a')
+        assert state.wait_for_state_change(version, timeout=5) == version + 1
+
+    def test_wait_times_out_without_changes(self):
+        version = state.get_state_version()
+        assert state.wait_for_state_change(version, timeout=0.01) == version
+
+    def test_wait_wakes_on_change_from_another_thread(self):
+        version = state.get_state_version()
+        timer = threading.Timer(0.05, state.queue_url, args=['https://watch.dropout.tv/videos/a'])
+        timer.start()
+        assert state.wait_for_state_change(version, timeout=5) > version
+        timer.join()
+
+    def test_snapshot_groups_active_jobs(self):
+        queued_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        downloading_id = state.queue_url('https://watch.dropout.tv/videos/b')
+        state.set_job_status(downloading_id, 'downloading')
+        version, snapshot = state.get_queue_snapshot()
+        assert version == state.get_state_version()
+        assert [j['id'] for j in snapshot['queued']] == [queued_id]
+        assert [j['id'] for j in snapshot['downloading']] == [downloading_id]
+        assert snapshot['completed'] == []
+
+
+class TestJobProgress:
+    def _progress(self, percent):
+        return ProgressUpdate(percent, 100.0, 1.0, 1.0, 1, 1, StreamType.VIDEO_AUDIO)
+
+    def test_published_progress_is_merged_into_reads(self):
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        state.set_job_status(job_id, 'downloading')
+        state.job_progress.publish(job_id, self._progress(40))
+        _, snapshot = state.get_queue_snapshot()
+        assert snapshot['downloading'][0]['progress'] == 40
+        assert state.get_job_status(job_id)['progress'] == 40
+        # The stored status is only touched when the job leaves 'downloading'
+        assert state.download_status[job_id]['progress'] == 0
+
+    def test_flush_bumps_version_once(self):
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        version = state.get_state_version()
+        state.job_progress.publish(job_id, self._progress(10))
+        state.job_progress.publish(job_id, self._progress(20))
+        state.job_progress.flush()
+        assert state.get_state_version() == version + 1
+
+    def test_finished_job_keeps_final_progress(self):
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        state.set_job_status(job_id, 'downloading')
+        state.job_progress.publish(job_id, self._progress(100))
+        state.set_job_status(job_id, 'completed', record_history=True)
+        assert state.job_progress.get(job_id) is None
+        assert state.download_history[-1]['progress'] == 100
+
+
+class TestRestoreJobs:
+    def test_queued_job_is_persisted(self):
+        job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+        [row] = database.get_download_jobs('queued')
+        assert row['id'] == job_id
+
+    def test_restart_requeues_queued_and_interrupted_jobs_in_order(self, reset_state):
+        first = state.queue_url('https://watch.dropout.tv/videos/a')
+        second = state.queue_url('https://watch.dropout.tv/videos/b')
+        assert database.claim_download_job(first, '2026-01-01T00:00:00')
+        reset_state()  # simulate a process restart
+
+        assert state.restore_jobs() == 2
+
+        assert [state.download_queue.get_nowait()['id'] for _ in range(2)] == [first, second]
+        assert state.download_status[first]['status'] == 'queued'
+        assert state.queue_url('https://watch.dropout.tv/videos/a') == ''
+
+    def test_completed_url_stays_a_duplicate_after_restart(self, reset_state):
+        done = state.queue_url('https://watch.dropout.tv/videos/a')
+        database.finish_download_job(done, 'completed', '2026-01-01T00:00:00')
+        reset_state()
+
+        state.restore_jobs()
+
+        assert state.queue_url('https://watch.dropout.tv/videos/a') == ''
+        assert [job['id'] for job in database.get_download_jobs('completed')] == [done]
+        assert database.get_download_jobs('queued') == []
+
+        state.clear_completed_jobs()
+        assert state.queue_url('https://watch.dropout.tv/videos/a')
+
+    def test_restart_loads_only_recent_history(self, reset_state):
+        job_ids = []
+        for n in range(state.HISTORY_SIZE + 3):
+            job_ids.append(state.queue_url(f'https://watch.dropout.tv/videos/{n}'))
+            database.finish_download_job(job_ids[-1], 'completed', '2026-01-01T00:00:00')
+        reset_state()
+
+        state.restore_jobs()
+
+        assert [h['id'] for h in state.download_history] == job_ids[-state.HISTORY_SIZE:]
+        assert state.queue_url('https://watch.dropout.tv/videos/0') == ''
+
+    def test_restart_restores_history_and_drops_failed(self, reset_state):
+        done = state.queue_url('https://watch.dropout.tv/videos/a')
+        failed = state.queue_url('https://watch.dropout.tv/videos/b')
+        database.finish_download_job(done, 'completed', '2026-01-01T00:00:00')
+        database.finish_download_job(failed, 'failed', '2026-01-01T00:00:00', 'boom')
+        reset_state()
+
+        assert state.restore_jobs() == 0
+
+        assert [h['id'] for h in state.download_history] == [done]
+        assert state.download_history[0]['status'] == 'completed'
+        assert database.get_download_jobs('failed') == []
+
+
+class TestMetadataQueue:
+    def test_visible_items_are_served_before_backlog(self):
+        state.queue_metadata('https://x/old', 'old')
+        state.queue_metadata('https://x/new', 'new', state.METADATA_PRIORITY_VISIBLE)
+        assert state.metadata_queue.get_nowait()[2]['url_path'] == 'new'
+        assert state.metadata_queue.get_nowait()[2]['url_path'] == 'old'
+
+    def test_duplicate_is_not_queued_twice(self):
+        state.queue_metadata('https://x/a', 'a')
+        state.queue_metadata('https://x/a', 'a')
+        assert state.metadata_queue.qsize() == 1
+
+    def test_bumped_item_leaves_a_stale_entry_that_is_skipped(self):
+        state.queue_metadata('https://x/a', 'a')
+        state.queue_metadata('https://x/a', 'a', state.METADATA_PRIORITY_VISIBLE)
+
+        first = state.metadata_queue.get_nowait()
+        stale = state.metadata_queue.get_nowait()
+        assert state.start_metadata_fetch('a', first[0]) is True
+        assert state.start_metadata_fetch('a', stale[0]) is False
+
+    def test_running_item_is_not_requeued(self):
+        state.queue_metadata('https://x/a', 'a')
+        priority, _, _ = state.metadata_queue.get_nowait()
+        state.start_metadata_fetch('a', priority)
+
+        state.queue_metadata('https://x/a', 'a', state.METADATA_PRIORITY_VISIBLE)
+
+        assert state.metadata_queue.empty()
+        assert state.get_metadata_stats()['active'] == 1
+
+    def test_stats_track_depth_and_latency(self, monkeypatch):
+        monkeypatch.setitem(state.metadata_stats, 'fetched', 0)
+        monkeypatch.setitem(state.metadata_stats, 'failed', 0)
+        monkeypatch.setitem(state.metadata_stats, 'avg_latency', None)
+        monkeypatch.setitem(state.metadata_stats, 'max_latency', None)
+        state.queue_metadata('https://x/a', 'a')
+        state.queue_metadata('https://x/b', 'b')
+        assert state.get_metadata_stats()['queue_depth'] == 2
+
+        state.start_metadata_fetch('a', state.METADATA_PRIORITY_BACKLOG)
+        state.finish_metadata_fetch('a', 2.0, True)
+        state.start_metadata_fetch('b', state.METADATA_PRIORITY_BACKLOG)
+        state.finish_metadata_fetch('b', 4.0, False)
+
+        stats = state.get_metadata_stats()
+        assert stats['queue_depth'] == 0
+        assert (stats['fetched'], stats['failed']) == (1, 1)
+        assert stats['avg_latency'] == 3.0
+        assert stats['max_latency'] == 4.0
+        assert stats['last_latency'] == 4.0
+
+
+def test_queue_snapshot_counts_stage_backlog():
+    state.queue_url('https://watch.dropout.tv/videos/a')
+    waiting = state.queue_url('https://watch.dropout.tv/videos/b')
+    running = state.queue_url('https://watch.dropout.tv/videos/c')
+    for job_id, stage_state in ((waiting, 'waiting'), (running, 'running')):
+        state.set_job_status(job_id, 'downloading')
+        state.set_job_stage(job_id, pipeline.POSTPROCESS, stage_state)
+
+    _, snapshot = state.get_queue_snapshot()
+    assert snapshot['stages'][pipeline.EXTRACT] == {'waiting': 1, 'running': 0}
+    assert snapshot['stages'][pipeline.POSTPROCESS] == {'waiting': 1, 'running': 1}
+    assert snapshot['stages'][pipeline.DOWNLOAD] == {'waiting': 0, 'running': 0}
+
+
+def test_leaving_download_stage_keeps_final_progress():
+    job_id = state.queue_url('https://watch.dropout.tv/videos/a')
+    state.set_job_status(job_id, 'downloading')
+    state.job_progress.publish(job_id, ProgressUpdate(
+        percent=100.0, total_bytes=100.0, speed_bytes=0.0, eta=0.0, step=1, total_steps=1, step_type=StreamType.VIDEO,
+    ))
+    state.set_job_stage(job_id, pipeline.POSTPROCESS, 'waiting')
+
+    assert state.job_progress.get(job_id) is None
+    assert state.get_job_status(job_id)['progress'] == 100
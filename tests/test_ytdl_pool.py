@@ -0,0 +1,96 @@
+import http.cookiejar
+
+import pytest
+
+from showsaver import ytdl_pool
+from showsaver.ytdl_pool import YoutubeDLPool
+
+OPTS = {'quiet': True, 'skip_download': True}
+
+
+@pytest.fixture(autouse=True)
+def cookie_path(tmp_path, monkeypatch):
+    path = tmp_path / 'cookies.txt'
+    monkeypatch.setattr(ytdl_pool, 'COOKIE_PATH', path)
+    monkeypatch.setattr(ytdl_pool, '_cookie_jar', None)
+    monkeypatch.setattr(ytdl_pool, '_saved_cookies', None)
+    return path
+
+
+def _cookie(name, value):
+    return http.cookiejar.Cookie(
+        0, name, value, None, False, 'watch.dropout.tv', True, False, '/', True,
+        True, 2_000_000_000, False, None, None, {},
+    )
+
+
+def test_instance_is_reused_after_checkin():
+    pool = YoutubeDLPool()
+    with pool.checkout(OPTS) as first:
+        pass
+    with pool.checkout(OPTS) as second:
+        assert second is first
+
+
+def test_concurrent_checkouts_get_distinct_instances():
+    pool = YoutubeDLPool()
+    with pool.checkout(OPTS) as first, pool.checkout(OPTS) as second:
+        assert first is not second
+
+
+def test_option_sets_do_not_share_instances():
+    pool = YoutubeDLPool()
+    with pool.checkout(OPTS) as first:
+        pass
+    with pool.checkout({**OPTS, 'extract_flat': 'in_playlist'}) as other:
+        assert other is not first
+
+
+def test_prewarmed_instances_are_handed_out():
+    pool = YoutubeDLPool()
+    pool.prewarm(OPTS, 2)
+    assert len(pool._idle[ytdl_pool._options_key(OPTS)]) == 2
+    with pool.checkout(OPTS), pool.checkout(OPTS):
+        assert pool._idle[ytdl_pool._options_key(OPTS)] == []
+
+
+def test_idle_instances_are_capped():
+    pool = YoutubeDLPool(max_idle_per_key=1)
+    with pool.checkout(OPTS), pool.checkout(OPTS):
+        pass
+    assert len(pool._idle[ytdl_pool._options_key(OPTS)]) == 1
+
+
+def test_instances_share_one_cookie_jar_saved_on_checkin(cookie_path):
+    pool = YoutubeDLPool()
+    with pool.checkout(OPTS) as first, pool.checkout({**OPTS, 'quiet': False}) as second:
+        assert first.cookiejar is second.cookiejar
+        first.cookiejar.set_cookie(_cookie('_session', 'abc'))
+
+    assert '_session\tabc' in cookie_path.read_text()
+
+
+def test_checkin_without_cookie_changes_does_not_write(cookie_path, monkeypatch):
+    pool = YoutubeDLPool()
+    with pool.checkout(OPTS) as ydl:
+        ydl.cookiejar.set_cookie(_cookie('_session', 'abc'))
+    saves = []
+    monkeypatch.setattr(ytdl_pool, 'save_cookies', lambda: saves.append(1))
+
+    with pool.checkout(OPTS):
+        pass
+    assert saves == []
+
+    with pool.checkout(OPTS) as ydl:
+        ydl.cookiejar.set_cookie(_cookie('_session', 'def'))
+    assert saves == [1]
+
+
+def test_saved_cookies_are_loaded_after_restart(cookie_path, monkeypatch):
+    ytdl_pool.shared_cookie_jar().set_cookie(_cookie('_session', 'abc'))
+    ytdl_pool.save_cookies()
+    monkeypatch.setattr(ytdl_pool, '_cookie_jar', None)
+
+    ydl = ytdl_pool.create_youtube_dl(OPTS)
+
+    assert ydl.cookiejar.get_cookies_for_url('https://watch.dropout.tv/')[0].value == 'abc'